@@ -0,0 +1,214 @@
+"""
+Modelių saugojimas masyvų formatu
+Medžių masyvai, koeficientai ir scaler parametrai saugomi kaip .npy failai su JSON aprašu.
+Įkeliama per memory mapping: įkėlimo laikas beveik pastovus, o keli procesai
+dalijasi tais pačiais atminties puslapiais.
+
+Kiekvienas išsaugojimas rašomas į naują katalogą models/<modelis>_arrays.<laikas>-<pid>,
+o aktyvi versija perjungiama vienu aprašo (models/<modelis>_arrays.json) pervadinimu.
+Senų versijų katalogai šalinami vėliau (jei jie dar atverti, pvz. Windows su memory
+mapping, bandoma kito išsaugojimo metu).
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+from fast_inference import compile_model, ENGINE_TYPES
+
+FORMAT_VERSION = 2
+# Kiek naujausių ankstesnių versijų palikti (skaitytojai gali būti perskaitę seną aprašą)
+KEEP_OLD_VERSIONS = 1
+LOAD_ATTEMPTS = 5
+
+
+def arrays_dir(model_name):
+    """Senojo (1 versijos) masyvų formato katalogas modeliui"""
+    return f'models/{model_name}_arrays'
+
+
+def manifest_path(model_name):
+    """Aktyvios masyvų formato versijos aprašo kelias"""
+    return f'models/{model_name}_arrays.json'
+
+
+def _version_dirs(model_name):
+    """Visų versijų katalogai (nuo seniausio)"""
+    prefix = os.path.basename(arrays_dir(model_name)) + '.'
+    if not os.path.isdir('models'):
+        return []
+    names = [name for name in os.listdir('models')
+             if name.startswith(prefix) and os.path.isdir(os.path.join('models', name))]
+    return [os.path.join('models', name) for name in sorted(names, key=lambda name: name[len(prefix):])]
+
+
+def _read_manifest(model_name):
+    with open(manifest_path(model_name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def collect_old_arrays(model_name):
+    """
+    Pašalina senas masyvų versijas (aktyvi ir KEEP_OLD_VERSIONS naujausių paliekamos)
+
+    Returns:
+        pašalintų katalogų skaičius
+    """
+    active = None
+    if os.path.exists(manifest_path(model_name)):
+        try:
+            active = os.path.normpath(_read_manifest(model_name)['directory'])
+        except (OSError, ValueError, KeyError):
+            return 0
+    old = [path for path in _version_dirs(model_name) if os.path.normpath(path) != active]
+    if active is not None:
+        # Naujesnės už aktyvią versijos gali būti dar rašomos kito proceso
+        old = [path for path in old if os.path.basename(path) < os.path.basename(active)]
+        old = old[:max(0, len(old) - KEEP_OLD_VERSIONS)]
+    removed = 0
+    for path in old + [arrays_dir(model_name)]:
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += not os.path.exists(path)
+    return removed
+
+
+def save_model_arrays(model, scaler, model_name='random_forest'):
+    """
+    Išsaugo modelį masyvų formatu
+
+    Returns:
+        True, jei modelis palaikomas ir išsaugotas; kitaip False (aktyvi versija pašalinama)
+    """
+    engine = compile_model(model, scaler)
+    if engine is None:
+        if os.path.exists(manifest_path(model_name)):
+            os.remove(manifest_path(model_name))
+        collect_old_arrays(model_name)
+        return False
+
+    arrays, params = engine.to_arrays()
+    version_dir = f"{arrays_dir(model_name)}.{time.time_ns():020d}-{os.getpid()}-{threading.get_ident()}"
+    os.makedirs(version_dir)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'engine': type(engine).__name__,
+        'model_type': type(model).__name__,
+        'directory': version_dir,
+        'params': params,
+        'arrays': {},
+    }
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        np.save(os.path.join(version_dir, f'{name}.npy'), array, allow_pickle=False)
+        manifest['arrays'][name] = {'file': f'{name}.npy', 'dtype': str(array.dtype), 'shape': list(array.shape)}
+
+    # Versija perjungiama vienu atominiu aprašo pervadinimu
+    tmp_path = f"{manifest_path(model_name)}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path(model_name))
+
+    collect_old_arrays(model_name)
+    print(f"Masyvų formatas išsaugotas: {version_dir}")
+    return True
+
+
+def load_model_arrays(model_name='random_forest', mmap=True):
+    """
+    Įkelia greitą variklį iš masyvų formato (su memory mapping, jei mmap=True)
+    """
+    for attempt in range(LOAD_ATTEMPTS):
+        manifest = _read_manifest(model_name)
+        if manifest['format_version'] != FORMAT_VERSION:
+            raise ValueError(f"Nepalaikoma masyvų formato versija: {manifest['format_version']}")
+        try:
+            arrays = {
+                name: np.load(os.path.join(manifest['directory'], info['file']), mmap_mode='r' if mmap else None,
+                              allow_pickle=False)
+                for name, info in manifest['arrays'].items()
+            }
+            return ENGINE_TYPES[manifest['engine']].from_arrays(arrays, manifest['params'])
+        except FileNotFoundError:
+            # Kol aprašas buvo skaitomas, versija pakeista ir sena pašalinta - bandoma su nauju aprašu
+            if attempt == LOAD_ATTEMPTS - 1:
+                raise
+
+
+def arrays_available(model_name):
+    """
+    Ar masyvų formatas yra ir ne senesnis už modelio failą (rinkinį arba pickle)
+    """
+    from model_bundle import model_source_path
+
+    manifest = manifest_path(model_name)
+    if not os.path.exists(manifest):
+        return False
+    model_path = model_source_path(model_name)
+    return model_path is None or os.path.getmtime(manifest) >= os.path.getmtime(model_path)
+
+
+_COLD_START_SCRIPT = '''
+import json, os, sys, time
+def rss_kb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        return None
+fmt, name = sys.argv[1], sys.argv[2]
+import numpy, sklearn.ensemble, sklearn.tree, sklearn.linear_model, sklearn.preprocessing
+before = rss_kb()
+start = time.perf_counter()
+if fmt == 'pickle':
+    from utils import load_model
+    load_model(name)
+else:
+    from array_store import load_model_arrays
+    load_model_arrays(name)
+elapsed = time.perf_counter() - start
+after = rss_kb()
+print(json.dumps({'seconds': elapsed, 'rss_delta_kb': None if before is None else after - before}))
+'''
+
+
+def benchmark(model_names=('random_forest', 'decision_tree', 'logistic_regression'), repeats=5):
+    """
+    Palygina šalto starto įkėlimo laiką ir atminties (RSS) prieaugį: pickle ir masyvų formatas
+
+    Kiekvienas matavimas atliekamas naujame procese.
+    """
+    print("=" * 60)
+    print("ŠALTO STARTO PALYGINIMAS: pickle ir masyvų formatas")
+    print("=" * 60)
+
+    for model_name in model_names:
+        if not os.path.exists(manifest_path(model_name)):
+            print(f"\n{model_name}: masyvų formatas nerastas, praleidžiama")
+            continue
+        print(f"\n{model_name}")
+        for fmt in ('pickle', 'arrays'):
+            runs = []
+            for _ in range(repeats):
+                output = subprocess.run([sys.executable, '-c', _COLD_START_SCRIPT, fmt, model_name],
+                                        capture_output=True, text=True, check=True).stdout
+                runs.append(json.loads(output.strip().splitlines()[-1]))
+            seconds = sorted(run['seconds'] for run in runs)[len(runs) // 2]
+            rss = runs[-1]['rss_delta_kb']
+            rss_text = f"{rss / 1024:.2f} MB" if rss is not None else "n/a"
+            print(f"  {fmt:<7} įkėlimas (mediana): {seconds * 1000:.2f} ms, RSS prieaugis: {rss_text}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,452 @@
+"""
+Našumo testai (benchmark)
+Matuoja prognozavimą, treniravimą, apklausos normalizavimą ir SQLite operacijas
+su sintetiniais duomenimis, rezultatus išsaugo JSON faile su aplinkos informacija.
+
+Naudojimas:
+    python benchmark.py run
+    python benchmark.py run --sizes 1000 100000 1000000 --output models/benchmarks/po.json
+    python benchmark.py compare models/benchmarks/pries.json models/benchmarks/po.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from utils import SURVEY_COLUMN_MAP, get_feature_columns
+from generate_better_synthetic import generate_synthetic_students
+from model_bundle import BUNDLE_FILE
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+DEFAULT_TRAIN_SIZES = [1000]
+SINGLE_PREDICTIONS = 300
+DB_SINGLE_INSERTS = 500
+REGRESSION_THRESHOLD = 0.10
+# Iki tiek eilučių apdorojama per vieną matavimą; mažesni rinkiniai kartojami
+ROWS_PER_REPEAT = 200000
+MAX_REPEATS = 5
+
+# Originalios apklausos stulpeliai (normalizavimo testui)
+SURVEY_COLUMNS = {internal: survey for survey, internal in SURVEY_COLUMN_MAP.items()}
+
+def synthetic_students(n_rows, seed=42):
+    """
+    Sintetinis studentų rinkinys pagal get_feature_columns() schemą
+
+    Returns:
+        DataFrame su požymiais, ketinu_mesti_studijas ir rizika
+    """
+    df = generate_synthetic_students(n_rows, seed=seed)
+    return df[get_feature_columns() + ['ketinu_mesti_studijas', 'rizika']]
+
+
+def synthetic_survey(n_rows, seed=42):
+    """
+    Sugeneruoja neapdorotą apklausos rinkinį (tekstinės reikšmės: '85%', '7,5', '2-3', tuščios)
+    """
+    rng = np.random.default_rng(seed)
+    students = synthetic_students(n_rows, seed)
+    survey = pd.DataFrame()
+    for column, survey_column in SURVEY_COLUMNS.items():
+        values = students[column].round(1).astype(str).to_numpy(dtype=object)
+        if column == 'lankomumas_proc':
+            values = values + '%'
+        elif column in ('studiju_vidurkis', 'dvyliktos_klases_vidurkis'):
+            values = np.char.replace(values.astype(str), '.', ',').astype(object)
+        elif column in ('savarankisko_mokymosi_val', 'socialiniu_tinklu_val'):
+            ranges = rng.random(n_rows) < 0.1
+            values[ranges] = '2-3'
+        if column != 'ketinu_mesti_studijas':
+            values[rng.random(n_rows) < 0.02] = None
+        survey[survey_column] = values
+    return survey
+
+
+def environment_info():
+    """Aplinkos informacija rezultatų palyginimui"""
+    from importlib import metadata
+
+    versions = {}
+    for package in ('numpy', 'pandas', 'scikit-learn', 'imbalanced-learn', 'joblib'):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'packages': versions,
+        'git_commit': commit,
+    }
+
+
+def repeats_for(n_rows):
+    """Kiek kartų kartoti matavimą (maži rinkiniai kartojami dažniau)"""
+    return max(1, min(MAX_REPEATS, ROWS_PER_REPEAT // max(n_rows, 1)))
+
+
+def median_time(func, repeats):
+    """Kelių paleidimų trukmės mediana sekundėmis"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def metric(value, unit, higher_is_better=False):
+    """Vienos metrikos įrašas"""
+    return {'value': float(value), 'unit': unit, 'higher_is_better': higher_is_better}
+
+
+def bench_predict_single(model_name, rows=SINGLE_PREDICTIONS):
+    """
+    Vienos eilutės prognozės vėlinimas (predict_student_risk):
+    talpykla išvalyta (pirmas kvietimas) ir pakartotinis kvietimas (talpyklos pataikymas)
+    """
+    import predict
+
+    students = synthetic_students(rows, seed=7)[get_feature_columns()].to_dict(orient='records')
+    predict.predict_student_risk(students[0], model_name)  # modelio įkėlimas
+
+    predict.prediction_cache.clear()
+    miss, hit = [], []
+    for student in students:
+        start = time.perf_counter()
+        predict.predict_student_risk(student, model_name)
+        miss.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        predict.predict_student_risk(student, model_name)
+        hit.append(time.perf_counter() - start)
+
+    miss_ms, hit_ms = np.array(miss) * 1000, np.array(hit) * 1000
+    return {
+        'p50_ms': metric(np.percentile(miss_ms, 50), 'ms'),
+        'p99_ms': metric(np.percentile(miss_ms, 99), 'ms'),
+        'cached_p50_ms': metric(np.percentile(hit_ms, 50), 'ms'),
+    }
+
+
+def bench_predict_batch(model_name, n_rows):
+    """Paketinės prognozės pralaidumas (predict_frame)"""
+    from predict import predict_frame
+
+    df = synthetic_students(n_rows, seed=11)[get_feature_columns()]
+    predict_frame(df.head(100), model_name)  # modelio įkėlimas
+
+    elapsed = median_time(lambda: predict_frame(df, model_name), repeats_for(n_rows))
+    return {
+        'seconds': metric(elapsed, 's'),
+        'rows_per_s': metric(n_rows / elapsed, 'eil./s', higher_is_better=True),
+    }
+
+
+@contextlib.contextmanager
+def preserved_models_dir():
+    """Išsaugo models katalogą ir atstato jį po bloko (treniravimas jį perrašo)"""
+    models_dir = os.path.join(SCRIPT_DIR, 'models')
+    backup_dir = tempfile.mkdtemp(prefix='models_backup_')
+    backup = os.path.join(backup_dir, 'models')
+    had_models = os.path.isdir(models_dir)
+    if had_models:
+        shutil.copytree(models_dir, backup)
+    try:
+        yield
+    finally:
+        if had_models:
+            shutil.rmtree(models_dir, ignore_errors=True)
+            shutil.copytree(backup, models_dir)
+        shutil.rmtree(backup_dir, ignore_errors=True)
+
+
+def bench_training(n_rows):
+    """
+    train_all_models trukmė pagal etapus
+
+    Treniravimas vykdomas atskirame procese be grafikų; etapų trukmės imamos iš
+    models/training_profile.json. models katalogas po testo atstatomas.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_file = os.path.join(tmp_dir, 'students.csv')
+        synthetic_students(n_rows, seed=3).to_csv(data_file, index=False)
+
+        with preserved_models_dir():
+            # Ankstesnio treniravimo profilis pašalinamas, kad nepavykęs treniravimas nepateiktų senų trukmių
+            profile_file = os.path.join(SCRIPT_DIR, 'models', 'training_profile.json')
+            if os.path.exists(profile_file):
+                os.remove(profile_file)
+            start = time.perf_counter()
+            process = subprocess.run([sys.executable, 'train_model.py', data_file, '--plots', 'skip'],
+                                     cwd=SCRIPT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            elapsed = time.perf_counter() - start
+            if process.returncode != 0 or not os.path.exists(profile_file):
+                raise RuntimeError(f"Treniravimas nepavyko: {process.stderr[-500:]}")
+            with open(profile_file, encoding='utf-8') as f:
+                profile = json.load(f)
+
+    results = {'total_s': metric(elapsed, 's')}
+    stage_totals = {}
+    for stage in profile['stages']:
+        stage_totals[stage['stage']] = stage_totals.get(stage['stage'], 0.0) + stage['wall_s']
+    for name, seconds in stage_totals.items():
+        results[f'stage[{name}]_s'] = metric(seconds, 's')
+    return results
+
+
+def bench_normalization(n_rows):
+    """Apklausos normalizavimo pralaidumas (normalize_survey_data)"""
+    from normalize_data import normalize_survey_data
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = os.path.join(tmp_dir, 'survey.csv')
+        output_file = os.path.join(tmp_dir, 'students.csv')
+        synthetic_survey(n_rows, seed=5).to_csv(input_file, index=False)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed = median_time(lambda: normalize_survey_data(input_file, output_file), repeats_for(n_rows))
+
+    return {
+        'seconds': metric(elapsed, 's'),
+        'rows_per_s': metric(n_rows / elapsed, 'eil./s', higher_is_better=True),
+    }
+
+
+def bench_cleaning(n_rows):
+    """
+    Skaitinių stulpelių valymas: ankstesnė grandinė (astype(str) + 4 str.replace + to_numeric)
+    ir cleaning.clean_numeric_columns - tekstiniai (apklausos) ir jau skaitiniai stulpeliai
+    """
+    from cleaning import clean_numeric_columns, legacy_clean_numeric_series
+    from utils import rename_survey_columns
+
+    columns = get_feature_columns()
+    frames = {
+        'survey': rename_survey_columns(synthetic_survey(n_rows, seed=11)),
+        'numeric': synthetic_students(n_rows, seed=11),
+    }
+    repeats = repeats_for(n_rows)
+    results = {}
+    for kind, frame in frames.items():
+        legacy = median_time(lambda: {col: legacy_clean_numeric_series(frame[col]) for col in columns}, repeats)
+        current = median_time(lambda: clean_numeric_columns(frame[columns].copy(), columns), repeats)
+        results[f'{kind}_legacy_s'] = metric(legacy, 's')
+        results[f'{kind}_s'] = metric(current, 's')
+        results[f'{kind}_speedup'] = metric(legacy / current, 'x', higher_is_better=True)
+    return results
+
+
+def bench_database(n_rows):
+    """
+    SQLite operacijos laikinoje duomenų bazėje:
+    save_student / save_prediction dažnis, masinis įrašymas ir užklausos su n_rows įrašų
+    """
+    import sqlite3
+    import database
+
+    students = synthetic_students(n_rows, seed=9)
+    columns = get_feature_columns() + ['ketinu_mesti_studijas']
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            database.init_database()
+
+            single = students.head(DB_SINGLE_INSERTS)[columns].to_dict(orient='records')
+            start = time.perf_counter()
+            for student in single:
+                student_id = database.save_student(student)
+                database.save_prediction(student_id, {'prediction': 0, 'confidence': 0.9,
+                                                      'risk_level': 'ŽEMA RIZIKA'})
+            single_elapsed = time.perf_counter() - start
+
+            rows = [tuple(row) + (1,) for row in students[columns].itertuples(index=False, name=None)]
+            start = time.perf_counter()
+            with sqlite3.connect('students.db') as conn:
+                conn.executemany(
+                    f"INSERT INTO students ({', '.join(columns)}, has_real_answer) "
+                    f"VALUES ({', '.join('?' * (len(columns) + 1))})", rows)
+            bulk_elapsed = time.perf_counter() - start
+
+            repeats = repeats_for(n_rows)
+            all_elapsed = median_time(database.get_all_students, repeats)
+            untrained_elapsed = median_time(database.get_untrained_students, repeats)
+            stats_elapsed = median_time(database.get_predictions_stats, MAX_REPEATS)
+        finally:
+            os.chdir(previous_dir)
+
+    return {
+        'save_student_per_s': metric(len(single) / single_elapsed, 'įr./s', higher_is_better=True),
+        'bulk_insert_rows_per_s': metric(n_rows / bulk_elapsed, 'eil./s', higher_is_better=True),
+        'get_all_students_s': metric(all_elapsed, 's'),
+        'get_untrained_students_s': metric(untrained_elapsed, 's'),
+        'get_predictions_stats_s': metric(stats_elapsed, 's'),
+    }
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, train_sizes=DEFAULT_TRAIN_SIZES, model_name='random_forest',
+                   suites=('predict', 'train', 'normalize', 'cleaning', 'database'), output_file=None):
+    """
+    Paleidžia pasirinktus testus ir išsaugo rezultatus JSON faile
+
+    Returns:
+        dict su aplinka, konfigūracija ir rezultatais
+    """
+    report = {
+        'environment': environment_info(),
+        'config': {'sizes': list(sizes), 'train_sizes': list(train_sizes), 'model_name': model_name,
+                   'suites': list(suites)},
+        'results': {},
+    }
+    results = report['results']
+
+    def record(name, func, *args):
+        print(f"  {name}...", end=' ', flush=True)
+        start = time.perf_counter()
+        try:
+            results[name] = func(*args)
+            print(f"{time.perf_counter() - start:.1f} s")
+        except Exception as e:
+            results[name] = {'error': str(e)}
+            print(f"klaida: {e}")
+
+    print("=" * 60)
+    print("NAŠUMO TESTAI")
+    print("=" * 60)
+
+    if 'predict' in suites:
+        model_files = [os.path.join(SCRIPT_DIR, 'models', f'{model_name}_model.pkl'),
+                       os.path.join(SCRIPT_DIR, BUNDLE_FILE)]
+        if any(os.path.exists(path) for path in model_files):
+            record('predict_single', bench_predict_single, model_name)
+            for n_rows in sizes:
+                record(f'predict_batch[n={n_rows}]', bench_predict_batch, model_name, n_rows)
+        else:
+            print(f"  Modelis {model_name} nerastas - prognozavimo testai praleidžiami")
+    if 'train' in suites:
+        for n_rows in train_sizes:
+            record(f'train[n={n_rows}]', bench_training, n_rows)
+    if 'normalize' in suites:
+        for n_rows in sizes:
+            record(f'normalize[n={n_rows}]', bench_normalization, n_rows)
+    if 'cleaning' in suites:
+        for n_rows in sizes:
+            record(f'cleaning[n={n_rows}]', bench_cleaning, n_rows)
+    if 'database' in suites:
+        for n_rows in sizes:
+            record(f'database[n={n_rows}]', bench_database, n_rows)
+
+    if output_file is None:
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_file = os.path.join(SCRIPT_DIR, 'models', 'benchmarks', f'benchmark_{stamp}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nRezultatai išsaugoti: {output_file}")
+    return report
+
+
+def compare_reports(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """
+    Palygina du rezultatų rinkinius
+
+    Returns:
+        sąrašas dict: testas, metrika, reikšmės, pokytis ir ar tai regresija
+    """
+    rows = []
+    for bench, metrics in current['results'].items():
+        base_metrics = baseline['results'].get(bench)
+        if not base_metrics or 'error' in metrics or 'error' in base_metrics:
+            continue
+        for name, current_metric in metrics.items():
+            base_metric = base_metrics.get(name)
+            if base_metric is None or base_metric['value'] == 0:
+                continue
+            change = current_metric['value'] / base_metric['value'] - 1
+            worse = -change if current_metric['higher_is_better'] else change
+            rows.append({
+                'benchmark': bench,
+                'metric': name,
+                'unit': current_metric['unit'],
+                'baseline': base_metric['value'],
+                'current': current_metric['value'],
+                'change': change,
+                'regression': worse > threshold,
+            })
+    return rows
+
+
+def print_comparison(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """Atspausdina palyginimą; grąžina regresijų skaičių"""
+    base_env, env = baseline['environment'], current['environment']
+    print("=" * 60)
+    print(f"PALYGINIMAS: {base_env.get('git_commit')} -> {env.get('git_commit')}")
+    print("=" * 60)
+    for key in ('python', 'platform', 'cpu_count', 'packages'):
+        if base_env.get(key) != env.get(key):
+            print(f"Dėmesio: skiriasi aplinka ({key}): {base_env.get(key)} -> {env.get(key)}")
+
+    rows = compare_reports(baseline, current, threshold)
+    for row in rows:
+        flag = 'REGRESIJA' if row['regression'] else ''
+        print(f"{row['benchmark']:<28} {row['metric']:<40} {row['baseline']:>12.4g} -> "
+              f"{row['current']:>12.4g} {row['unit']:<7} {row['change'] * 100:+7.1f}% {flag}")
+
+    regressions = [row for row in rows if row['regression']]
+    print(f"\nRegresijų (blogiau nei {threshold * 100:.0f}%): {len(regressions)}")
+    return len(regressions)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Našumo testai")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Paleisti testus")
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    run_parser.add_argument('--train-sizes', type=int, nargs='+', default=DEFAULT_TRAIN_SIZES)
+    run_parser.add_argument('--model', default='random_forest')
+    run_parser.add_argument('--suites', nargs='+', default=['predict', 'train', 'normalize', 'cleaning', 'database'],
+                            choices=['predict', 'train', 'normalize', 'cleaning', 'database'])
+    run_parser.add_argument('--output', default=None)
+
+    compare_parser = commands.add_parser('compare', help="Palyginti du rezultatų failus")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        run_benchmarks(args.sizes, args.train_sizes, args.model, args.suites, args.output)
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+    return 1 if print_comparison(baseline, current, args.threshold) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
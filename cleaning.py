@@ -0,0 +1,81 @@
+"""
+Skaitinių stulpelių valymas
+Tekstinės reikšmės ('85%', '7,5', '2-3') verčiamos skaičiais tomis pačiomis
+taisyklėmis kaip anksčiau naudota grandinė:
+
+    pd.to_numeric(s.astype(str).str.replace('%', '').str.replace('-', '')
+                  .str.replace('/', '').str.replace(',', '.'), errors='coerce')
+
+tik greičiau:
+- stulpelis suskaidomas į unikalias reikšmes (pd.factorize), o simboliai
+  pašalinami vienu str.translate praėjimu tik unikalioms reikšmėms;
+- jau skaitiniai (int / float64) stulpeliai tekstu neverčiami: '-' pašalinimas
+  atitinka absoliučią reikšmę (išskyrus labai mažus skaičius, kurių tekstas yra '1e-05');
+- kiti tipai (float32, bool, mišrūs object) verčiami tekstu kaip ir anksčiau.
+Loginės (bool) reikšmės laikomos ne skaičiais ('True' -> NaN), kaip ir anksčiau.
+"""
+import numpy as np
+import pandas as pd
+
+# '%', '-', '/' pašalinami, kablelis keičiamas tašku
+_TRANSLATION = str.maketrans({'%': None, '-': None, '/': None, ',': '.'})
+# Mažesni už šią ribą (ne nuliniai) float skaičiai tekstu rašomi su neigiamu laipsniu ('1e-05')
+_SCIENTIFIC_BELOW = 1e-4
+
+
+def legacy_clean_numeric_series(series):
+    """Ankstesnė grandinė (palyginimui ir našumo testams)"""
+    return pd.to_numeric(
+        series.astype(str).str.replace('%', '').str.replace('-', '').str.replace('/', '').str.replace(',', '.'),
+        errors='coerce'
+    )
+
+
+def _clean_float(values):
+    """float64 greitas kelias: '-' pašalinimas = absoliuti reikšmė"""
+    result = np.abs(values)
+    scientific = (result != 0) & (result < _SCIENTIFIC_BELOW)
+    if scientific.any():
+        # '-1e-05' -> '1e05': ir ženklas, ir laipsnio minusas dingsta
+        result[scientific] = [float(str(value).replace('-', '')) for value in values[scientific]]
+    return result
+
+
+def clean_numeric_series(series):
+    """
+    Išvalo vieną stulpelį
+
+    Returns:
+        skaitinis Series (tas pats indeksas ir pavadinimas)
+    """
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and (dtype.kind == 'i' or (dtype.kind == 'u' and dtype.itemsize < 8)):
+        return pd.Series(np.abs(series.to_numpy().astype(np.int64)), index=series.index, name=series.name)
+    if dtype == np.float64:
+        return pd.Series(_clean_float(series.to_numpy()), index=series.index, name=series.name)
+
+    is_text = isinstance(dtype, pd.StringDtype) or (
+        dtype == object and pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty'))
+    if not is_text:
+        # Kiti tipai pirmiausia verčiami tekstu kaip astype(str) ankstesnėje grandinėje:
+        # float32 str() per Python float duotų 1.100000023841858 vietoj 1.1, o factorize
+        # mišriuose stulpeliuose laiko True == 1 ir False == 0 vienoda reikšme
+        series = series.astype(str)
+    codes, uniques = pd.factorize(series)
+    text = [str(value).translate(_TRANSLATION) for value in np.asarray(uniques, dtype=object)]
+    parsed = pd.to_numeric(pd.Series(text, dtype=object), errors='coerce').to_numpy()
+    if (codes < 0).any():
+        # Trūkstamos reikšmės (-1) paimamos iš pridėto NaN elemento
+        parsed = np.append(parsed.astype(np.float64), np.nan)
+    return pd.Series(parsed[codes], index=series.index, name=series.name)
+
+
+def clean_numeric_columns(df, columns):
+    """
+    Konvertuoja stulpelius į skaičius: pašalinami '%', '-', '/' simboliai,
+    kablelis keičiamas tašku, netinkamos reikšmės tampa NaN (keičia df vietoje)
+    """
+    for col in columns:
+        if col in df.columns:
+            df[col] = clean_numeric_series(df[col])
+    return df
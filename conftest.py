@@ -0,0 +1,68 @@
+"""
+Bendri pytest fiksatoriai: maži modeliai apmokomi laikiname kataloge,
+todėl testai nenaudoja ir nekeičia tikrojo models/ katalogo
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+N_ROWS = 300
+
+
+@pytest.fixture
+def student_frame():
+    """Sintetiniai studentų duomenys (požymių stulpeliai) ir rizikos žymės"""
+    from utils import get_feature_columns
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'lankomumas_proc': rng.uniform(40, 100, N_ROWS),
+        'savarankisko_mokymosi_val': rng.uniform(0, 20, N_ROWS),
+        'streso_lygis': rng.integers(1, 6, N_ROWS).astype(float),
+        'darbo_valandos': rng.uniform(0, 40, N_ROWS),
+        'miego_valandos': rng.uniform(4, 9, N_ROWS),
+        'socialiniu_tinklu_val': rng.uniform(0, 8, N_ROWS),
+        'studiju_vidurkis': rng.uniform(4, 10, N_ROWS),
+        'dvyliktos_klases_vidurkis': rng.uniform(4, 10, N_ROWS),
+        'brandos_egzaminas_1': rng.uniform(0, 100, N_ROWS),
+        'brandos_egzaminas_2': rng.uniform(0, 100, N_ROWS),
+        'brandos_egzaminas_3': rng.uniform(0, 100, N_ROWS),
+        'finansinis_stresas': rng.integers(1, 6, N_ROWS).astype(float),
+    })[get_feature_columns()]
+    y = ((df['lankomumas_proc'] < 65) | (df['streso_lygis'] + df['finansinis_stresas'] >= 8)).astype(int)
+    return df, y.to_numpy()
+
+
+@pytest.fixture
+def trained_models(tmp_path, monkeypatch, student_frame):
+    """
+    Apmoko mažus modelius ir išsaugo juos rinkinyje tmp_path/models/model_bundle.joblib
+
+    Darbo katalogas pakeičiamas į tmp_path, nes modelių keliai santykiniai.
+
+    Returns:
+        dict su X, y, scaler ir models
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.tree import DecisionTreeClassifier
+    from model_bundle import save_bundle
+    from model_registry import registry
+    from predict import prediction_cache
+
+    monkeypatch.chdir(tmp_path)
+    X, y = student_frame
+    scaler = StandardScaler().fit(X)
+    X_scaled = scaler.transform(X)
+    models = {
+        'logistic_regression': LogisticRegression(max_iter=1000).fit(X_scaled, y),
+        'decision_tree': DecisionTreeClassifier(max_depth=5, random_state=0).fit(X_scaled, y),
+        'random_forest': RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0).fit(X_scaled, y),
+    }
+    save_bundle(models, scaler, list(X.columns), X.mean().to_numpy(), best_model='random_forest')
+    registry.invalidate()
+    prediction_cache.clear()
+    yield {'X': X, 'y': y, 'scaler': scaler, 'models': models}
+    registry.invalidate()
+    prediction_cache.clear()
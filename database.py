@@ -5,9 +5,9 @@ import sqlite3
 import pandas as pd
 from datetime import datetime
 
-def init_database():
+def init_database(db_path='students.db'):
     """Sukuria duomenų bazę ir lenteles"""
-    conn = sqlite3.connect('students.db')
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     # Studentų duomenų lentelė
@@ -52,7 +52,28 @@ def init_database():
         FOREIGN KEY (student_id) REFERENCES students (id)
     )
     ''')
-    
+
+    # Pertreniravimo užduočių eilė (retrain_jobs.py)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS retrain_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        status TEXT NOT NULL DEFAULT 'queued',
+        data_hash TEXT NOT NULL,
+        upload_path TEXT NOT NULL,
+        rows INTEGER,
+        log_path TEXT,
+        worker_pid INTEGER,
+        worker_host TEXT,
+        heartbeat_at REAL,
+        error TEXT,
+        result TEXT,
+        submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        started_at TIMESTAMP,
+        finished_at TIMESTAMP
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_retrain_jobs_status ON retrain_jobs (status, data_hash)')
+
     conn.commit()
     conn.close()
 
@@ -122,7 +143,7 @@ def get_all_students():
     
     # Pridedame rizikos stulpelį treniravimui
     if 'ketinu_mesti_studijas' in df.columns:
-        df['rizika'] = df['ketinu_mesti_studijas'].apply(lambda x: 1 if x >= 4 else 0)
+        df['rizika'] = (pd.to_numeric(df['ketinu_mesti_studijas'], errors='coerce') >= 4).astype(int)
     
     return df
 
@@ -133,17 +154,32 @@ def get_untrained_students():
     conn.close()
     
     if 'ketinu_mesti_studijas' in df.columns:
-        df['rizika'] = df['ketinu_mesti_studijas'].apply(lambda x: 1 if x >= 4 else 0)
+        df['rizika'] = (pd.to_numeric(df['ketinu_mesti_studijas'], errors='coerce') >= 4).astype(int)
     
     return df
 
-def mark_students_as_trained():
-    """Pažymi visus studentus kaip pertreniruotus"""
+def mark_students_as_trained(student_ids=None):
+    """
+    Pažymi studentus kaip pertreniruotus
+
+    Args:
+        student_ids: pažymimų studentų id sąrašas; None - visi nepertreniruoti
+
+    Returns:
+        pažymėtų įrašų skaičius
+    """
     conn = sqlite3.connect('students.db')
     cursor = conn.cursor()
-    cursor.execute('UPDATE students SET is_trained = 1 WHERE is_trained = 0')
+    if student_ids is None:
+        cursor.execute('UPDATE students SET is_trained = 1 WHERE is_trained = 0')
+        updated = cursor.rowcount
+    else:
+        cursor.executemany('UPDATE students SET is_trained = 1 WHERE id = ? AND is_trained = 0',
+                           [(int(student_id),) for student_id in student_ids])
+        updated = cursor.rowcount
     conn.commit()
     conn.close()
+    return updated
 
 def get_predictions_stats():
     """Gauna prognozių statistikas"""
@@ -0,0 +1,137 @@
+"""
+Prognozės paaiškinimų taisyklės
+Taisyklės aprašytos lentele ir vertinamos NumPy kaukėmis visam studentų rinkiniui
+"""
+import operator
+import numpy as np
+import pandas as pd
+
+EXAM_COLUMNS = ['brandos_egzaminas_1', 'brandos_egzaminas_2', 'brandos_egzaminas_3']
+EXAM_AVERAGE = 'brandos_egzaminu_vidurkis'
+
+# Paaiškinimų taisyklės: (požymis, sąlygos, tekstas)
+# Visos sąlygos turi būti tenkinamos; trūkstama reikšmė (NaN) sąlygos netenkina.
+# Taisyklės numeris lentelėje yra jos bitas paaiškinimo kode.
+REASON_RULES = [
+    ('lankomumas_proc', [('<', 70)], "❌ Žemas lankomumas ({:.0f}%)"),
+    ('lankomumas_proc', [('>=', 90)], "✅ Aukštas lankomumas ({:.0f}%)"),
+    ('streso_lygis', [('>=', 4)], "❌ Aukštas streso lygis ({:.0f}/5)"),
+    ('streso_lygis', [('<=', 2)], "✅ Žemas streso lygis ({:.0f}/5)"),
+    ('miego_valandos', [('<', 6)], "❌ Per mažai miega ({:.0f}h)"),
+    ('miego_valandos', [('>=', 7)], "✅ Pakankamas miegas ({:.0f}h)"),
+    ('darbo_valandos', [('>', 30)], "❌ Daug dirba ({:.0f}h/savaitę)"),
+    ('darbo_valandos', [('<=', 15)], "✅ Nedaug dirba ({:.0f}h/savaitę)"),
+    ('savarankisko_mokymosi_val', [('<', 5)], "❌ Mažai mokosi savarankiškai ({:.0f}h/savaitę)"),
+    ('savarankisko_mokymosi_val', [('>=', 10)], "✅ Daug mokosi savarankiškai ({:.0f}h/savaitę)"),
+    (EXAM_AVERAGE, [('>', 0), ('<', 60)], "❌ Žemi brandos egzaminų balai ({:.0f})"),
+    (EXAM_AVERAGE, [('>=', 75)], "✅ Geri brandos egzaminų balai ({:.0f})"),
+    ('finansinis_stresas', [('>=', 4)], "❌ Aukštas finansinis stresas ({:.0f}/5)"),
+]
+
+NEUTRAL_REASON = "ℹ️ Visi rodikliai vidutiniški"
+
+# Veikia ir skaičiams, ir NumPy masyvams
+_OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+def _exam_average(values):
+    """Brandos egzaminų vidurkis vienam studentui (trūkstamas egzaminas = 0)"""
+    return sum(values.get(col, 0) for col in EXAM_COLUMNS) / 3
+
+
+def _rule_columns(df):
+    """
+    Grąžina taisyklėms reikalingus stulpelius kaip float masyvus
+    """
+    columns = {}
+    for feature, _, _ in REASON_RULES:
+        if feature in columns:
+            continue
+        if feature == EXAM_AVERAGE:
+            exams = [
+                pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float) if col in df.columns
+                else np.zeros(len(df))
+                for col in EXAM_COLUMNS
+            ]
+            columns[feature] = (exams[0] + exams[1] + exams[2]) / 3
+        elif feature in df.columns:
+            columns[feature] = pd.to_numeric(df[feature], errors='coerce').to_numpy(dtype=float)
+        else:
+            columns[feature] = np.full(len(df), np.nan)
+    return columns
+
+
+def evaluate_reason_codes(df):
+    """
+    Įvertina visas taisykles visam DataFrame
+
+    Returns:
+        int32 masyvas: kiekvienam studentui bitų kaukė, kurioje i-tas bitas
+        reiškia, kad suveikė REASON_RULES[i] taisyklė
+    """
+    columns = _rule_columns(df)
+    codes = np.zeros(len(df), dtype=np.int32)
+    with np.errstate(invalid='ignore'):
+        for bit, (feature, conditions, _) in enumerate(REASON_RULES):
+            values = columns[feature]
+            mask = np.ones(len(df), dtype=bool)
+            for op, threshold in conditions:
+                mask &= _OPERATORS[op](values, threshold)
+            codes |= mask.astype(np.int32) << bit
+    return codes
+
+
+def _scalar_value(value):
+    """Konvertuoja reikšmę į float; netinkama reikšmė tampa NaN"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def evaluate_reason_code(values):
+    """
+    Įvertina taisykles vienam studentui (dict) be DataFrame kūrimo
+
+    Grąžina tą patį kodą kaip evaluate_reason_codes vienos eilutės DataFrame.
+    """
+    code = 0
+    for bit, (feature, conditions, _) in enumerate(REASON_RULES):
+        if feature == EXAM_AVERAGE:
+            value = sum(_scalar_value(values.get(col, 0)) for col in EXAM_COLUMNS) / 3
+        else:
+            value = _scalar_value(values.get(feature, np.nan))
+        if all(_OPERATORS[op](value, threshold) for op, threshold in conditions):
+            code |= 1 << bit
+    return code
+
+
+def decode_reason_codes(code):
+    """Grąžina suveikusių taisyklių numerius iš paaiškinimo kodo"""
+    code = int(code)
+    return [bit for bit in range(len(REASON_RULES)) if code >> bit & 1]
+
+
+def render_reasons(code, values):
+    """
+    Sukuria paaiškinimų tekstus vienam studentui
+
+    Args:
+        code: paaiškinimo kodas iš evaluate_reason_codes
+        values: dict arba Series su studento reikšmėmis (naudojamos tekste)
+    """
+    reasons = []
+    for bit in decode_reason_codes(code):
+        feature, _, template = REASON_RULES[bit]
+        value = _exam_average(values) if feature == EXAM_AVERAGE else values[feature]
+        reasons.append(template.format(value))
+
+    if not reasons:
+        reasons.append(NEUTRAL_REASON)
+
+    return reasons
@@ -0,0 +1,322 @@
+"""
+Greitas prognozavimas be sklearn
+Medžių modeliai išlyginami į ištisinius mazgų masyvus ir vertinami NumPy operacijomis
+"""
+import time
+import numpy as np
+
+
+class CompiledForest:
+    """
+    Sprendimų medis arba Random Forest, išlygintas į mazgų masyvus
+
+    Visų medžių mazgai sujungti į vieną masyvą. Lapų vaikai rodo patys į save,
+    todėl visi medžiai keliaujami kartu, po vieną lygį per iteraciją.
+    """
+    # Didelėms imtims (eilutės x medžiai) sklearn naudoja mažiau atminties
+    use_for_batches = False
+
+    def __init__(self, feature, threshold, left, right, missing_left, leaf_values,
+                 roots, max_depth, classes, mean=None, scale=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.leaf_values = leaf_values
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes = classes
+        self.mean = mean
+        self.scale = scale
+
+    @classmethod
+    def from_sklearn(cls, model, scaler=None):
+        """
+        Sukuria CompiledForest iš DecisionTreeClassifier arba RandomForestClassifier
+
+        Jei perduotas StandardScaler, normalizavimas atliekamas predict_proba viduje.
+        """
+        estimators = model.estimators_ if hasattr(model, 'estimators_') else [model]
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in estimators:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(offset, offset + n_nodes)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            if hasattr(tree, 'missing_go_to_left'):
+                missing.append(tree.missing_go_to_left.astype(bool))
+            else:
+                missing.append(np.zeros(n_nodes, dtype=bool))
+
+            # Kaip ir sklearn: lapo reikšmės normalizuojamos į tikimybes
+            node_values = tree.value[:, 0, :].astype(np.float64)
+            normalizer = node_values.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(node_values / normalizer)
+
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        mean = scale = None
+        if scaler is not None:
+            mean = np.asarray(scaler.mean_, dtype=np.float64)
+            scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            missing_left=np.concatenate(missing),
+            leaf_values=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            classes=np.asarray(model.classes_),
+            mean=mean,
+            scale=scale,
+        )
+
+    def to_arrays(self):
+        """Grąžina (masyvai, parametrai) išsaugojimui"""
+        arrays = {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'missing_left': self.missing_left,
+            'leaf_values': self.leaf_values,
+            'roots': self.roots,
+            'classes': self.classes,
+        }
+        if self.mean is not None:
+            arrays['mean'] = self.mean
+            arrays['scale'] = self.scale
+        return arrays, {'max_depth': self.max_depth}
+
+    @classmethod
+    def from_arrays(cls, arrays, params):
+        """Sukuria CompiledForest iš išsaugotų masyvų (gali būti memmap)"""
+        return cls(
+            feature=arrays['feature'],
+            threshold=arrays['threshold'],
+            left=arrays['left'],
+            right=arrays['right'],
+            missing_left=arrays['missing_left'],
+            leaf_values=arrays['leaf_values'],
+            roots=arrays['roots'],
+            max_depth=params['max_depth'],
+            classes=arrays['classes'],
+            mean=arrays.get('mean'),
+            scale=arrays.get('scale'),
+        )
+
+    def predict_proba(self, X, block_size=4096):
+        """
+        Grąžina klasių tikimybes (n_eilučių, n_klasių)
+
+        X - nenormalizuoti požymiai, jei modelis sukurtas su scaler.
+        Eilutės apdorojamos blokais, kad tarpiniai masyvai (eilutės x medžiai) būtų riboti.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.mean is not None:
+            X = (X - self.mean) / self.scale
+        # sklearn medžiai lygina float32 reikšmes
+        X = X.astype(np.float32)
+
+        if X.shape[0] <= block_size:
+            return self._predict_block(X)
+        return np.concatenate([
+            self._predict_block(X[start:start + block_size])
+            for start in range(0, X.shape[0], block_size)
+        ])
+
+    def _predict_block(self, X):
+        """Keliauja visais medžiais kartu vienam eilučių blokui"""
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            go_left = (x <= self.threshold[node]) | (np.isnan(x) & self.missing_left[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        return self.leaf_values[node].mean(axis=1)
+
+
+class FusedLogistic:
+    """
+    StandardScaler ir logistinė regresija, sujungti į vieną afininę transformaciją
+
+    sigmoid(((x - mean) / scale) @ w + b) = sigmoid(x @ (w / scale) + b - sum(w * mean / scale))
+    """
+    # Viena matricos-vektoriaus sandauga - tinka ir didelėms imtims
+    use_for_batches = True
+
+    def __init__(self, coef, intercept, classes):
+        self.coef = coef
+        self.intercept = float(intercept)
+        self.classes = classes
+
+    @classmethod
+    def from_sklearn(cls, model, scaler=None):
+        """Sukuria FusedLogistic iš dvejetainės LogisticRegression (ir StandardScaler)"""
+        coef = np.asarray(model.coef_[0], dtype=np.float64)
+        intercept = float(model.intercept_[0])
+        if scaler is not None:
+            scale = np.asarray(scaler.scale_, dtype=np.float64)
+            mean = np.asarray(scaler.mean_, dtype=np.float64)
+            intercept -= float(np.sum(coef * mean / scale))
+            coef = coef / scale
+        return cls(coef, intercept, np.asarray(model.classes_))
+
+    def predict_proba(self, X):
+        """Grąžina klasių tikimybes nenormalizuotiems požymiams"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        z = X @ self.coef + self.intercept
+        # Kaip ir sklearn logistinė regresija, trūkstamų reikšmių nepalaikome
+        if np.isnan(z).any():
+            raise ValueError("Požymiuose yra trūkstamų reikšmių (NaN)")
+        # Stabilus sigmoidas
+        p = np.empty_like(z)
+        positive = z >= 0
+        p[positive] = 1.0 / (1.0 + np.exp(-z[positive]))
+        exp_z = np.exp(z[~positive])
+        p[~positive] = exp_z / (1.0 + exp_z)
+        return np.column_stack([1.0 - p, p])
+
+    def to_arrays(self):
+        """Grąžina (masyvai, parametrai) išsaugojimui"""
+        return {'coef': self.coef, 'classes': self.classes}, {'intercept': self.intercept}
+
+    @classmethod
+    def from_arrays(cls, arrays, params):
+        """Sukuria FusedLogistic iš išsaugotų masyvų (gali būti memmap)"""
+        return cls(arrays['coef'], params['intercept'], arrays['classes'])
+
+    def save(self, path, max_diff=None):
+        """Išsaugo sujungtą modelį .npz faile"""
+        np.savez(path, coef=self.coef, intercept=self.intercept, classes=self.classes,
+                 max_diff=np.nan if max_diff is None else max_diff)
+
+    @classmethod
+    def load(cls, path):
+        """Įkelia sujungtą modelį iš .npz failo"""
+        with np.load(path) as data:
+            return cls(data['coef'], data['intercept'], data['classes'])
+
+
+ENGINE_TYPES = {
+    'CompiledForest': CompiledForest,
+    'FusedLogistic': FusedLogistic,
+}
+
+
+def fused_artifact_path(model_name):
+    """Sujungto logistinės regresijos modelio failo kelias"""
+    return f'models/{model_name}_fused.npz'
+
+
+def is_logistic_model(model):
+    """Ar modelis yra dvejetainė logistinė regresija (taip pat SGD su log_loss)"""
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
+    if isinstance(model, SGDClassifier) and model.loss != 'log_loss':
+        return False
+    return isinstance(model, (LogisticRegression, SGDClassifier)) and len(model.classes_) == 2
+
+
+def export_fused_logistic(model, scaler, model_name, X_holdout, tolerance=1e-9):
+    """
+    Išsaugo sujungtą scaler + logistinės regresijos modelį
+
+    Prieš išsaugant patikrina, kad tikimybės sutampa su sklearn grandine
+    atidėtoje imtyje. Grąžina didžiausią skirtumą arba None, jei modelis netinka.
+    """
+    if not is_logistic_model(model):
+        return None
+
+    fused = FusedLogistic.from_sklearn(model, scaler)
+    expected = model.predict_proba(scaler.transform(X_holdout))
+    max_diff = float(np.abs(fused.predict_proba(np.asarray(X_holdout, dtype=float)) - expected).max())
+    if max_diff > tolerance:
+        print(f"Sujungtas modelis {model_name} nesutampa su sklearn (skirtumas {max_diff:.2e}), neišsaugotas")
+        return max_diff
+
+    fused.save(fused_artifact_path(model_name), max_diff=max_diff)
+    print(f"Sujungtas modelis išsaugotas: {fused_artifact_path(model_name)} (skirtumas {max_diff:.2e})")
+    return max_diff
+
+
+def compile_model(model, scaler=None):
+    """
+    Sukuria greitą variklį modeliui, jei jis palaikomas; kitaip grąžina None
+    """
+    if hasattr(model, 'coef_') and is_logistic_model(model):
+        return FusedLogistic.from_sklearn(model, scaler)
+    estimators = getattr(model, 'estimators_', [model])
+    if all(hasattr(estimator, 'tree_') for estimator in estimators) and hasattr(model, 'classes_'):
+        return CompiledForest.from_sklearn(model, scaler)
+    return None
+
+
+def _latency_percentiles(func, repeats):
+    """Grąžina p50 ir p99 vėlinimą milisekundėmis"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def benchmark(model_names=('random_forest', 'decision_tree'), repeats=1000):
+    """
+    Palygina vienos eilutės vėlinimą: sklearn predict_proba ir CompiledForest
+    """
+    import pandas as pd
+    from utils import get_feature_columns, load_model
+
+    feature_columns = get_feature_columns()
+    data = pd.read_csv('data/students_data.csv')[feature_columns].dropna()
+    row = data.iloc[[0]]
+
+    print("=" * 60)
+    print("VIENOS EILUTĖS VĖLINIMAS (ms)")
+    print("=" * 60)
+
+    for model_name in model_names:
+        model, scaler = load_model(model_name)
+        engine = compile_model(model, scaler)
+        if engine is None:
+            print(f"\n{model_name}: modelis nėra medžių modelis, praleidžiama")
+            continue
+
+        expected = model.predict_proba(scaler.transform(data))
+        max_diff = np.abs(engine.predict_proba(data.to_numpy()) - expected).max()
+
+        sk_p50, sk_p99 = _latency_percentiles(
+            lambda: model.predict_proba(scaler.transform(row)), repeats)
+        fast_p50, fast_p99 = _latency_percentiles(
+            lambda: engine.predict_proba(row.to_numpy()), repeats)
+
+        print(f"\n{model_name} ({len(engine.roots)} medž., gylis {engine.max_depth})")
+        print(f"  Didžiausias tikimybių skirtumas: {max_diff:.2e}")
+        print(f"  sklearn:        p50 {sk_p50:.3f}  p99 {sk_p99:.3f}")
+        print(f"  CompiledForest: p50 {fast_p50:.3f}  p99 {fast_p99:.3f}")
+        print(f"  Pagreitėjimas (p50): {sk_p50 / fast_p50:.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,170 @@
+"""
+Išvalytos požymių matricos talpykla
+Raktas - duomenų failo turinio SHA-256 ir valymo konfigūracija (požymiai,
+stulpelių pervadinimai, valymo versija), todėl nepakitęs failas nevalomas iš naujo,
+net jei jis perkeltas ar nukopijuotas kitu pavadinimu.
+
+Įrašai saugomi .npz failais models/cache kataloge; viršijus dydžio ribą
+šalinami seniausiai naudoti įrašai.
+"""
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from utils import (CLEANING_VERSION, SURVEY_COLUMN_MAP, clean_numeric_columns, prepare_features,
+                   rename_survey_columns, risk_labels)
+
+CACHE_DIR = 'models/cache'
+# Didžiausias talpyklos dydis baitais
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def file_digest(path):
+    """Failo turinio SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cleaning_config(feature_columns):
+    """Valymo konfigūracija, įeinanti į talpyklos raktą"""
+    return {
+        'version': CLEANING_VERSION,
+        'feature_columns': list(feature_columns),
+        'rename': SURVEY_COLUMN_MAP,
+        'target': 'ketinu_mesti_studijas>=4',
+        'impute': 'mean',
+    }
+
+
+def cache_key(data_file, feature_columns):
+    """Talpyklos raktas: duomenų failo turinys + valymo konfigūracija"""
+    config = json.dumps(cleaning_config(feature_columns), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{file_digest(data_file)}:{config}".encode('utf-8')).hexdigest()[:32]
+
+
+def _cache_path(key, cache_dir):
+    return os.path.join(cache_dir, f'features_{key}.npz')
+
+
+def build_feature_matrix(df, feature_columns):
+    """
+    Išvalo duomenis ir paruošia požymių matricą bei rizikos žymes
+
+    Returns:
+        (X DataFrame, y Series)
+    """
+    df = rename_survey_columns(df)
+    if 'ketinu_mesti_studijas' in df.columns:
+        df['rizika'] = risk_labels(df['ketinu_mesti_studijas'])
+    clean_numeric_columns(df, feature_columns)
+    return prepare_features(df, feature_columns), df['rizika']
+
+
+def load_features(key, feature_columns, cache_dir=CACHE_DIR):
+    """
+    Įkelia požymių matricą iš talpyklos
+
+    Returns:
+        (X DataFrame, y Series) arba None, jei įrašo nėra ar jis sugadintas
+    """
+    path = _cache_path(key, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            X_values, y_values, columns = data['X'], data['y'], data['columns'].tolist()
+    except (OSError, ValueError, KeyError):
+        os.remove(path)
+        return None
+    if columns != list(feature_columns):
+        return None
+    # Pažymime naudojimą, kad valant būtų šalinami seniausiai naudoti įrašai
+    os.utime(path)
+    return pd.DataFrame(X_values, columns=columns), pd.Series(y_values, name='rizika')
+
+
+def save_features(key, X, y, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """Išsaugo požymių matricą talpykloje ir apriboja talpyklos dydį"""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _cache_path(key, cache_dir)
+    # Rašoma į laikiną failą ir pervadinama, kad kitas procesas neperskaitytų pusės failo
+    tmp_path = f'{path[:-len(".npz")]}.{os.getpid()}.tmp.npz'
+    np.savez(tmp_path, X=np.asarray(X, dtype=np.float64), y=np.asarray(y),
+             columns=np.array(list(X.columns)))
+    os.replace(tmp_path, path)
+    prune_cache(cache_dir, max_bytes)
+    return path
+
+
+def prune_cache(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """
+    Šalina seniausiai naudotus įrašus, kol talpykla telpa į max_bytes
+
+    Returns:
+        pašalintų failų skaičius
+    """
+    if not os.path.isdir(cache_dir):
+        return 0
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.startswith('features_') and name.endswith('.npz') and '.tmp.' not in name:
+            stat = os.stat(os.path.join(cache_dir, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, name in entries:
+        if total <= max_bytes:
+            break
+        os.remove(os.path.join(cache_dir, name))
+        total -= size
+        removed += 1
+    return removed
+
+
+def clear_cache(cache_dir=CACHE_DIR):
+    """Išvalo visą talpyklą"""
+    return prune_cache(cache_dir, max_bytes=0)
+
+
+def cached_feature_matrix(data_file, feature_columns, use_cache=True, cache_dir=CACHE_DIR,
+                          max_bytes=MAX_CACHE_BYTES):
+    """
+    Požymių matrica iš talpyklos arba iš CSV (ir įrašoma į talpyklą)
+
+    Returns:
+        (X DataFrame, y Series, True jei rasta talpykloje)
+    """
+    key = cache_key(data_file, feature_columns) if use_cache else None
+    if key is not None:
+        cached = load_features(key, feature_columns, cache_dir)
+        if cached is not None:
+            return cached[0], cached[1], True
+
+    X, y = build_feature_matrix(pd.read_csv(data_file), feature_columns)
+    if key is not None:
+        save_features(key, X, y, cache_dir, max_bytes)
+    return X, y, False
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Požymių matricos talpyklos valdymas")
+    parser.add_argument('--clear', action='store_true', help="Išvalyti talpyklą")
+    parser.add_argument('--max-mb', type=float, default=MAX_CACHE_BYTES / (1024 * 1024),
+                        help="Apriboti talpyklą iki nurodyto dydžio (MB)")
+    args = parser.parse_args()
+
+    if args.clear:
+        print(f"Pašalinta įrašų: {clear_cache()}")
+    else:
+        print(f"Pašalinta įrašų: {prune_cache(max_bytes=int(args.max_mb * 1024 * 1024))}")
+    if os.path.isdir(CACHE_DIR):
+        files = [os.path.join(CACHE_DIR, name) for name in os.listdir(CACHE_DIR)]
+        print(f"Talpykloje: {len(files)} įrašų, {sum(map(os.path.getsize, files)) / (1024 * 1024):.1f} MB")
@@ -2,70 +2,199 @@
 Geresnių sintetinių duomenų generavimas
 Bazuojasi ant 15 tikrų rizikos studentų iš originalios apklausos
 """
+import argparse
+import os
 import pandas as pd
 import numpy as np
+from utils import clean_numeric_columns, rename_survey_columns, risk_labels
 
-def generate_realistic_from_real_15(real_risk_df, n=40):
+# Požymių skirstiniai: ('uniform', nuo, iki) arba ('choice', reikšmės, tikimybės)
+# Rizikos studentų tipai:
+# 1. Žemo lankomumo tipas
+# 2. Aukšto streso tipas su ok lankomumu
+# 3. Pervargusio darbuotojo tipas su geru lankomumu
+RISK_ARCHETYPES = [
+    {
+        'lankomumas_proc': ('uniform', 20, 55),
+        'savarankisko_mokymosi_val': ('uniform', 0, 8),
+        'streso_lygis': ('choice', [3, 4, 5], [0.3, 0.4, 0.3]),
+        'darbo_valandos': ('uniform', 15, 40),
+        'miego_valandos': ('uniform', 5, 8),
+        'socialiniu_tinklu_val': ('uniform', 4, 10),
+    },
+    {
+        'lankomumas_proc': ('uniform', 60, 85),
+        'savarankisko_mokymosi_val': ('uniform', 2, 10),
+        'streso_lygis': ('choice', [4, 5], [0.3, 0.7]),
+        'darbo_valandos': ('uniform', 10, 30),
+        'miego_valandos': ('uniform', 4, 6),
+        'socialiniu_tinklu_val': ('uniform', 3, 8),
+    },
+    {
+        'lankomumas_proc': ('uniform', 75, 95),
+        'savarankisko_mokymosi_val': ('uniform', 0, 5),
+        'streso_lygis': ('choice', [3, 4, 5], [0.2, 0.4, 0.4]),
+        'darbo_valandos': ('uniform', 35, 55),
+        'miego_valandos': ('uniform', 4, 6),
+        'socialiniu_tinklu_val': ('uniform', 1, 5),
+    },
+]
+RISK_ARCHETYPE_WEIGHTS = [0.30, 0.35, 0.35]
+
+# Bendri rodikliai visiems rizikos tipams
+RISK_COMMON = {
+    'dvyliktos_klases_vidurkis': ('uniform', 5, 7.5),
+    'brandos_egzaminas_1': ('uniform', 20, 55),
+    'brandos_egzaminas_2': ('uniform', 25, 60),
+    'brandos_egzaminas_3': ('uniform', 20, 65),
+    'finansinis_stresas': ('choice', [3, 4, 5], [0.2, 0.4, 0.4]),
+    'studiju_vidurkis': ('uniform', 4.5, 7),
+    'ketinu_mesti_studijas': ('choice', [4, 5], [0.5, 0.5]),
+}
+
+# Nerizikos studentai
+NON_RISK_PROFILE = {
+    'lankomumas_proc': ('uniform', 65, 100),
+    'savarankisko_mokymosi_val': ('uniform', 3, 20),
+    'streso_lygis': ('choice', [1, 2, 3, 4, 5], [0.15, 0.30, 0.35, 0.15, 0.05]),
+    'darbo_valandos': ('uniform', 0, 30),
+    'miego_valandos': ('uniform', 6, 9),
+    'socialiniu_tinklu_val': ('uniform', 1, 6),
+    'dvyliktos_klases_vidurkis': ('uniform', 6.5, 10),
+    'brandos_egzaminas_1': ('uniform', 35, 100),
+    'brandos_egzaminas_2': ('uniform', 40, 100),
+    'brandos_egzaminas_3': ('uniform', 40, 100),
+    'finansinis_stresas': ('choice', [1, 2, 3, 4, 5], [0.20, 0.30, 0.30, 0.15, 0.05]),
+    'studiju_vidurkis': ('uniform', 6, 10),
+    'ketinu_mesti_studijas': ('choice', [1, 2, 3], [0.5, 0.3, 0.2]),
+}
+
+OUTPUT_COLUMNS = list(RISK_ARCHETYPES[0]) + list(RISK_COMMON) + ['rizika']
+
+
+def _sample(rng, spec, n):
+    """Sugeneruoja n reikšmių pagal skirstinio aprašą"""
+    if spec[0] == 'uniform':
+        return rng.uniform(spec[1], spec[2], n)
+    return rng.choice(spec[1], size=n, p=spec[2])
+
+
+def sample_students(rng, n_rows, risk_share=0.2, archetypes=None):
+    """
+    Vektorizuotai sugeneruoja n_rows studentų
+
+    Args:
+        rng: np.random.Generator
+        risk_share: rizikos studentų dalis
+        archetypes: rizikos tipų numeriai (0-2) kiekvienai eilutei; jei nurodyta,
+            visi studentai yra rizikos grupės
+
+    Returns:
+        DataFrame su OUTPUT_COLUMNS stulpeliais
+    """
+    if archetypes is None:
+        is_risk = rng.random(n_rows) < risk_share
+        archetypes = np.where(is_risk, rng.choice(len(RISK_ARCHETYPES), size=n_rows, p=RISK_ARCHETYPE_WEIGHTS), -1)
+    else:
+        archetypes = np.asarray(archetypes)
+        is_risk = np.ones(n_rows, dtype=bool)
+
+    columns = {}
+    for column in OUTPUT_COLUMNS[:-1]:
+        integer = NON_RISK_PROFILE[column][0] == 'choice'
+        columns[column] = np.empty(n_rows, dtype=np.int64 if integer else np.float64)
+
+    groups = [(archetypes == -1, NON_RISK_PROFILE)]
+    groups += [(archetypes == k, {**profile, **RISK_COMMON}) for k, profile in enumerate(RISK_ARCHETYPES)]
+    for mask, profile in groups:
+        count = int(mask.sum())
+        if count == 0:
+            continue
+        for column, spec in profile.items():
+            columns[column][mask] = _sample(rng, spec, count)
+
+    df = pd.DataFrame(columns)
+    df['rizika'] = is_risk.astype(np.int64)
+    return df
+
+
+def iter_synthetic_students(n_rows, seed=42, risk_share=0.2, chunk_size=100000):
+    """
+    Generuoja studentus dalimis (ribotas atminties naudojimas)
+
+    Kiekviena dalis turi savo atsitiktinių skaičių generatorių, gautą iš seed,
+    todėl rezultatas priklauso tik nuo seed ir chunk_size.
+
+    Yields:
+        DataFrame su iki chunk_size eilučių
+    """
+    n_chunks = (n_rows + chunk_size - 1) // chunk_size
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    for index, chunk_seed in enumerate(seeds):
+        rows = min(chunk_size, n_rows - index * chunk_size)
+        yield sample_students(np.random.default_rng(chunk_seed), rows, risk_share)
+
+
+def generate_synthetic_students(n_rows, seed=42, risk_share=0.2, chunk_size=100000):
+    """Sugeneruoja visą sintetinį rinkinį vienu DataFrame"""
+    chunks = list(iter_synthetic_students(n_rows, seed, risk_share, chunk_size))
+    if not chunks:
+        return sample_students(np.random.default_rng(seed), 0, risk_share)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def write_synthetic_dataset(output_file, n_rows, seed=42, risk_share=0.2, chunk_size=100000):
+    """
+    Įrašo sintetinį rinkinį į CSV arba Parquet (pagal failo plėtinį) dalimis
+
+    Parquet formatui reikalingas pyarrow.
+
+    Returns:
+        įrašytų eilučių skaičius
+    """
+    parquet = output_file.lower().endswith('.parquet')
+    if parquet:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet formatui reikalingas pyarrow: pip install pyarrow")
+
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    written = 0
+    writer = None
+    try:
+        for chunk in iter_synthetic_students(n_rows, seed, risk_share, chunk_size):
+            if parquet:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_file, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(output_file, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+            written += len(chunk)
+            print(f"   Įrašyta: {written}/{n_rows}")
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+
+def generate_realistic_from_real_15(real_risk_df, n=40, seed=42):
     """
     Generuoja ĮVAIRIUS rizikos studentų tipus:
-    1. Žemo lankomumo tipas (30%)
-    2. Aukšto streso tipas su ok lankomumu (35%)
-    3. Pervargusio darbuotojo tipas su geru lankomumu (35%)
+    1. Žemo lankomumo tipas
+    2. Aukšto streso tipas su ok lankomumu
+    3. Pervargusio darbuotojo tipas su geru lankomumu
+
+    Tipai kaitaliojami paeiliui (i % 3), kaip ir anksčiau.
     """
-    synthetic = []
-    
     print(f"Generuojama {n} sintetinių studentų (3 skirtingi tipai)...")
-    
-    for i in range(n):
-        np.random.seed(42 + i)
-        
-        new_student = {}
-        
-        # Pasirinkti tipą
-        student_type = i % 3  # 0, 1, arba 2
-        
-        if student_type == 0:
-            # TIPAS 1: Žemo lankomumo studentas (30%)
-            new_student['lankomumas_proc'] = np.random.uniform(20, 55)
-            new_student['savarankisko_mokymosi_val'] = np.random.uniform(0, 8)
-            new_student['streso_lygis'] = np.random.choice([3, 4, 5], p=[0.3, 0.4, 0.3])
-            new_student['darbo_valandos'] = np.random.uniform(15, 40)
-            new_student['miego_valandos'] = np.random.uniform(5, 8)
-            new_student['socialiniu_tinklu_val'] = np.random.uniform(4, 10)
-            
-        elif student_type == 1:
-            # TIPAS 2: Aukšto streso su OK lankomumu (35%)
-            new_student['lankomumas_proc'] = np.random.uniform(60, 85)
-            new_student['savarankisko_mokymosi_val'] = np.random.uniform(2, 10)
-            new_student['streso_lygis'] = np.random.choice([4, 5], p=[0.3, 0.7])
-            new_student['darbo_valandos'] = np.random.uniform(10, 30)
-            new_student['miego_valandos'] = np.random.uniform(4, 6)
-            new_student['socialiniu_tinklu_val'] = np.random.uniform(3, 8)
-            
-        else:
-            # TIPAS 3: Pervargęs darbuotojas su geru lankomumu (35%)
-            new_student['lankomumas_proc'] = np.random.uniform(75, 95)
-            new_student['savarankisko_mokymosi_val'] = np.random.uniform(0, 5)
-            new_student['streso_lygis'] = np.random.choice([3, 4, 5], p=[0.2, 0.4, 0.4])
-            new_student['darbo_valandos'] = np.random.uniform(35, 55)
-            new_student['miego_valandos'] = np.random.uniform(4, 6)
-            new_student['socialiniu_tinklu_val'] = np.random.uniform(1, 5)
-        
-        # Bendri rodikliai visiems tipams
-        new_student['dvyliktos_klases_vidurkis'] = np.random.uniform(5, 7.5)
-        new_student['brandos_egzaminas_1'] = np.random.uniform(20, 55)
-        new_student['brandos_egzaminas_2'] = np.random.uniform(25, 60)
-        new_student['brandos_egzaminas_3'] = np.random.uniform(20, 65)
-        new_student['finansinis_stresas'] = np.random.choice([3, 4, 5], p=[0.2, 0.4, 0.4])
-        new_student['studiju_vidurkis'] = np.random.uniform(4.5, 7)
-        
-        # Ketina mesti (4 arba 5)
-        new_student['ketinu_mesti_studijas'] = np.random.choice([4, 5], p=[0.5, 0.5])
-        new_student['rizika'] = 1
-        
-        synthetic.append(new_student)
-    
-    return pd.DataFrame(synthetic)
+    rng = np.random.default_rng(seed)
+    return sample_students(rng, n, archetypes=np.arange(n) % len(RISK_ARCHETYPES))
 
 
 def main():
@@ -81,21 +210,7 @@ def main():
     
     # 2. Konvertuoti stulpelius
     print("\n2. Konvertuojami stulpeliai...")
-    df = df_original.rename(columns={
-        '18. Lankomumas šiame semestre (%)': 'lankomumas_proc',
-        '20. Savarankiško mokymosi valandos per savaitę': 'savarankisko_mokymosi_val',
-        '23. Patiriu stiprų stresą': 'streso_lygis',
-        '9. Darbo valandos per savaitę': 'darbo_valandos',
-        '21. Miego valandos per parą': 'miego_valandos',
-        '22. Laikas socialiniuose tinkluose per dieną (val.)': 'socialiniu_tinklu_val',
-        '13. Koks yra jūsų bendras visų studijų semestrų vidurkis (1–10)?': 'studiju_vidurkis',
-        '17. 12 klasės metinis vidurkis (1–10)': 'dvyliktos_klases_vidurkis',
-        '14. Brandos egzaminas: Matematika (1–100, 0=nelaikiau)': 'brandos_egzaminas_1',
-        '15. Brandos egzaminas: Lietuvių kalba (1–100, 0=nelaikiau)': 'brandos_egzaminas_2',
-        '16. Brandos egzaminas: Anglų kalba (1–100, 0=nelaikiau)': 'brandos_egzaminas_3',
-        '7. Finansinis stresas (1–5)': 'finansinis_stresas',
-        '24. Ketinu nutraukti studijas': 'ketinu_mesti_studijas'
-    })
+    df = rename_survey_columns(df_original)
     
     # Išvalyti duomenis
     feature_columns = [
@@ -105,12 +220,7 @@ def main():
         'brandos_egzaminas_2', 'brandos_egzaminas_3', 'finansinis_stresas'
     ]
     
-    for col in feature_columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(
-                df[col].astype(str).str.replace('%', '').str.replace('-', '').str.replace('/', '').str.replace(',', '.'),
-                errors='coerce'
-            )
+    clean_numeric_columns(df, feature_columns)
     
     # Pridėti studiju_vidurkis jei yra
     if 'studiju_vidurkis' in df.columns:
@@ -118,7 +228,7 @@ def main():
         feature_columns.append('studiju_vidurkis')
     
     # Sukurti rizikos kintamąjį
-    df['rizika'] = df['ketinu_mesti_studijas'].apply(lambda x: 1 if x >= 4 else 0)
+    df['rizika'] = risk_labels(df['ketinu_mesti_studijas'])
     
     print(f"   Konvertuota {len(feature_columns)} požymių")
     
@@ -164,4 +274,18 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Sintetinių duomenų generavimas")
+    parser.add_argument('--rows', type=int, default=None,
+                        help="Sugeneruoti tiek sintetinių studentų (be originalios apklausos)")
+    parser.add_argument('--output', default='data/synthetic_students.csv', help="CSV arba .parquet failas")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--risk-share', type=float, default=0.2)
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    args = parser.parse_args()
+
+    if args.rows is None:
+        main()
+    else:
+        print(f"Generuojama {args.rows} sintetinių studentų į {args.output}...")
+        write_synthetic_dataset(args.output, args.rows, args.seed, args.risk_share, args.chunk_size)
+        print("BAIGTA!")
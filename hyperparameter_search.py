@@ -0,0 +1,375 @@
+"""
+Hiperparametrų paieška su nuosekliu mažinimu (successive halving)
+Visos trys modelių šeimos (logistinė regresija, sprendimų medis, Random Forest)
+vertinamos cross-validation su tuo pačiu paruošimu kaip train_model.py
+(StandardScaler, SMOTE, 5% noise) tik treniravimo dalyje (70%), testavimo dalis nenaudojama.
+
+- pirmame etape visos konfigūracijos vertinamos mažame duomenų poaibyje,
+  į kitą etapą pereina geriausias 1/eta dalis, paskutiniame - visi treniravimo duomenys;
+- fold'ai vertinami lygiagrečiai (joblib);
+- kiekvieno fold'o rezultatas saugomas talpykloje pagal (duomenų raktas, parametrai,
+  fold'as), todėl pakartotinė paieška su tais pačiais duomenimis beveik nieko nekainuoja;
+  talpykloje laikomi tik MAX_CACHED_DATA_KEYS paskiausiai naudotų duomenų raktų rezultatai.
+
+Rezultatai: models/hyperparameter_leaderboard.csv
+
+Naudojimas:
+    python hyperparameter_search.py
+    python hyperparameter_search.py --mode grid --scoring recall --n-jobs -1
+"""
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+import numpy as np
+import pandas as pd
+from utils import get_feature_columns
+from feature_cache import cache_key, cached_feature_matrix
+
+LEADERBOARD_FILE = 'models/hyperparameter_leaderboard.csv'
+FOLD_CACHE_FILE = 'models/cache/hyperparameter_folds.json'
+# Kelių paskiausiai naudotų duomenų raktų (duomenų failų) fold'ų rezultatai laikomi talpykloje
+MAX_CACHED_DATA_KEYS = 5
+# Pakeitus fold'o vertinimą (paruošimą, metrikas), versiją reikia padidinti
+SEARCH_VERSION = 1
+SCORING_METRICS = ('roc_auc', 'recall', 'f1', 'accuracy')
+
+# Fiksuoti parametrai (kaip train_model.py)
+BASE_PARAMS = {
+    'logistic_regression': {'random_state': 42, 'max_iter': 1000, 'solver': 'saga'},
+    'decision_tree': {'random_state': 42},
+    'random_forest': {'random_state': 42},
+}
+
+# Paieškos erdvės: reikšmių sąrašai (tinklelis) arba ('loguniform', nuo, iki) /
+# ('randint', nuo, iki) atsitiktinei paieškai
+SEARCH_SPACES = {
+    'logistic_regression': {
+        'C': [0.01, 0.03, 0.1, 0.3, 1.0, 3.0],
+        'class_weight': ['balanced', None],
+    },
+    'decision_tree': {
+        'max_depth': [3, 4, 6, 8, None],
+        'min_samples_split': [2, 10],
+        'min_samples_leaf': [1, 5, 10, 20],
+        'class_weight': ['balanced', None],
+    },
+    'random_forest': {
+        'n_estimators': [50, 100, 200],
+        'max_depth': [4, 6, 8, None],
+        'min_samples_split': [2, 10],
+        'min_samples_leaf': [1, 5, 10],
+        'max_features': ['sqrt', 0.5],
+        'class_weight': ['balanced', None],
+    },
+}
+
+
+def build_estimator(family, params):
+    """Sukuria modelį iš šeimos pavadinimo ir parametrų"""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.tree import DecisionTreeClassifier
+    from sklearn.ensemble import RandomForestClassifier
+
+    classes = {
+        'logistic_regression': LogisticRegression,
+        'decision_tree': DecisionTreeClassifier,
+        'random_forest': RandomForestClassifier,
+    }
+    return classes[family](**{**BASE_PARAMS[family], **params})
+
+
+def grid_candidates(spaces):
+    """Visos tinklelio kombinacijos: sąrašas (šeima, parametrai)"""
+    candidates = []
+    for family, space in spaces.items():
+        for name, values in space.items():
+            if not isinstance(values, list):
+                raise ValueError(f"Tinklelio paieškai reikia reikšmių sąrašo: {family}.{name}")
+        names = list(space)
+        for values in itertools.product(*(space[name] for name in names)):
+            candidates.append((family, dict(zip(names, values))))
+    return candidates
+
+
+def _sample_value(rng, spec):
+    if isinstance(spec, list):
+        return spec[rng.integers(len(spec))]
+    kind, low, high = spec
+    if kind == 'loguniform':
+        return float(np.exp(rng.uniform(np.log(low), np.log(high))))
+    if kind == 'randint':
+        return int(rng.integers(low, high + 1))
+    raise ValueError(f"Nežinomas skirstinys: {kind}")
+
+
+def random_candidates(spaces, n_candidates, seed=42):
+    """
+    Atsitiktinės konfigūracijos (po lygiai kiekvienai šeimai, be pasikartojimų)
+    """
+    rng = np.random.default_rng(seed)
+    per_family = max(1, n_candidates // len(spaces))
+    candidates = []
+    for family, space in spaces.items():
+        seen = set()
+        for _ in range(per_family * 20):
+            if len(seen) >= per_family:
+                break
+            params = {name: _sample_value(rng, spec) for name, spec in space.items()}
+            key = json.dumps(params, sort_keys=True, default=str)
+            if key not in seen:
+                seen.add(key)
+                candidates.append((family, params))
+    return candidates
+
+
+def _params_key(family, params):
+    return f"{family}:{json.dumps(params, sort_keys=True, default=str)}"
+
+
+def fold_cache_key(data_key, family, params, budget, fold, cv, seed):
+    """Fold'o rezultato raktas talpykloje"""
+    text = f"{SEARCH_VERSION}|{data_key}|{_params_key(family, params)}|{budget}|{fold}/{cv}|{seed}"
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+
+def load_fold_cache(path=FOLD_CACHE_FILE):
+    """
+    Returns:
+        dict duomenų raktas -> {'used_at': laikas, 'folds': {fold'o raktas: rezultatas}}
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict):
+        return {}
+    return {key: entry for key, entry in cache.items() if isinstance(entry, dict) and 'folds' in entry}
+
+
+def save_fold_cache(cache, data_key, path=FOLD_CACHE_FILE, max_data_keys=None):
+    """
+    Išsaugo talpyklą: data_key pažymimas kaip naudotas, paliekami tik max_data_keys
+    (numatyta MAX_CACHED_DATA_KEYS) paskiausiai naudotų duomenų raktų (keičia cache vietoje)
+    """
+    if max_data_keys is None:
+        max_data_keys = MAX_CACHED_DATA_KEYS
+    cache.setdefault(data_key, {'folds': {}})['used_at'] = time.time()
+    recent = sorted(cache, key=lambda key: cache[key].get('used_at', 0), reverse=True)
+    for key in recent[max_data_keys:]:
+        del cache[key]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, path)
+
+
+def evaluate_fold(family, params, X, y, train_idx, test_idx, seed=42):
+    """
+    Vienas fold'as su train_model.py paruošimu: scaler, SMOTE (80% balansas), 5% noise
+
+    Returns:
+        dict su metrikomis ir treniravimo trukme
+    """
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.metrics import accuracy_score, f1_score, recall_score, roc_auc_score
+    from imblearn.over_sampling import SMOTE
+
+    start = time.perf_counter()
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X[train_idx])
+    X_test = scaler.transform(X[test_idx])
+    y_train, y_test = y[train_idx], y[test_idx]
+
+    # SMOTE tik jei mažumos klasė mažesnė nei 80% daugumos ir turi kaimynų
+    counts = np.bincount(y_train, minlength=2)
+    if counts.min() >= 2 and counts.min() / counts.max() < 0.8:
+        smote = SMOTE(random_state=seed, sampling_strategy=0.8, k_neighbors=min(5, counts.min() - 1))
+        X_train, y_train = smote.fit_resample(X_train, y_train)
+    X_train = X_train + np.random.default_rng(seed).normal(0, 0.05, X_train.shape)
+
+    model = build_estimator(family, params)
+    model.fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+    y_proba = model.predict_proba(X_test)[:, 1]
+    return {
+        'roc_auc': roc_auc_score(y_test, y_proba) if len(np.unique(y_test)) > 1 else float('nan'),
+        'recall': recall_score(y_test, y_pred, zero_division=0),
+        'f1': f1_score(y_test, y_pred, zero_division=0),
+        'accuracy': accuracy_score(y_test, y_pred),
+        'fit_seconds': time.perf_counter() - start,
+    }
+
+
+def _budget_subset(y, budget, seed):
+    """Stratifikuotas poaibis iš budget eilučių (visi indeksai, jei budget >= len(y))"""
+    from sklearn.model_selection import train_test_split
+
+    indices = np.arange(len(y))
+    if budget >= len(y):
+        return indices
+    subset, _ = train_test_split(indices, train_size=budget, stratify=y, random_state=seed)
+    return np.sort(subset)
+
+
+def halving_budgets(n_rows, n_candidates, eta=3, min_resources=60):
+    """
+    Kiekvieno etapo eilučių skaičius: n_rows / eta^k, ne mažiau nei min_resources
+
+    Returns:
+        budgets sąrašas nuo mažiausio iki n_rows
+    """
+    by_candidates = int(math.floor(math.log(max(n_candidates, 1), eta))) + 1
+    by_rows = int(math.floor(math.log(max(n_rows / min_resources, 1), eta))) + 1
+    n_rungs = max(1, min(by_candidates, by_rows))
+    return [int(round(n_rows / eta ** (n_rungs - 1 - rung))) for rung in range(n_rungs)]
+
+
+def successive_halving(candidates, X, y, data_key, scoring='roc_auc', eta=3, cv=5, min_resources=60,
+                       n_jobs=-1, seed=42, cache_path=FOLD_CACHE_FILE):
+    """
+    Nuoseklus mažinimas: kiekviename etape lieka geriausia 1/eta konfigūracijų dalis
+
+    Returns:
+        (leaderboard DataFrame, statistika dict)
+    """
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import StratifiedKFold
+
+    if scoring not in SCORING_METRICS:
+        raise ValueError(f"Nežinoma metrika: {scoring} (galimos: {', '.join(SCORING_METRICS)})")
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y).astype(int)
+    cache = load_fold_cache(cache_path)
+    fold_results_cache = cache.setdefault(data_key, {'folds': {}})['folds']
+    budgets = halving_budgets(len(y), len(candidates), eta, min_resources)
+    stats = {'evaluated_folds': 0, 'cached_folds': 0, 'budgets': budgets}
+    rows = []
+    alive = list(range(len(candidates)))
+
+    for rung, budget in enumerate(budgets):
+        subset = _budget_subset(y, budget, seed)
+        n_folds = int(min(cv, np.bincount(y[subset]).min()))
+        folds = list(StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed).split(subset, y[subset]))
+
+        tasks, task_keys = [], []
+        for index in alive:
+            family, params = candidates[index]
+            for fold, (train_idx, test_idx) in enumerate(folds):
+                key = fold_cache_key(data_key, family, params, budget, fold, n_folds, seed)
+                if key not in fold_results_cache:
+                    tasks.append(delayed(evaluate_fold)(family, params, X, y, subset[train_idx],
+                                                        subset[test_idx], seed))
+                    task_keys.append(key)
+        stats['cached_folds'] += len(alive) * len(folds) - len(tasks)
+        stats['evaluated_folds'] += len(tasks)
+        if tasks:
+            for key, result in zip(task_keys, Parallel(n_jobs=n_jobs)(tasks)):
+                fold_results_cache[key] = result
+            save_fold_cache(cache, data_key, cache_path)
+
+        rung_rows = []
+        for index in alive:
+            family, params = candidates[index]
+            fold_results = [fold_results_cache[fold_cache_key(data_key, family, params, budget, fold, n_folds, seed)]
+                            for fold in range(len(folds))]
+            row = {'rung': rung, 'budget': budget, 'folds': n_folds, 'candidate': index,
+                   'model': family, 'params': json.dumps(params, sort_keys=True, default=str)}
+            for metric in SCORING_METRICS:
+                values = [result[metric] for result in fold_results]
+                row[f'{metric}_mean'] = float(np.nanmean(values)) if not np.all(np.isnan(values)) else float('nan')
+                row[f'{metric}_std'] = float(np.nanstd(values)) if not np.all(np.isnan(values)) else float('nan')
+            row['fit_seconds'] = float(sum(result['fit_seconds'] for result in fold_results))
+            rung_rows.append(row)
+        rows.extend(rung_rows)
+
+        print(f"   Etapas {rung + 1}/{len(budgets)}: {len(alive)} konfigūracijų, {budget} eilučių, "
+              f"{n_folds} fold'ai")
+        if rung < len(budgets) - 1:
+            ranked = sorted(rung_rows, key=lambda row: np.nan_to_num(row[f'{scoring}_mean'], nan=-np.inf),
+                            reverse=True)
+            keep = max(1, math.ceil(len(alive) / eta))
+            alive = [row['candidate'] for row in ranked[:keep]]
+
+    if not stats['evaluated_folds']:
+        # Viskas paimta iš talpyklos - tik pažymimas naudojimas, kad raktas nebūtų išmestas
+        save_fold_cache(cache, data_key, cache_path)
+
+    leaderboard = pd.DataFrame(rows)
+    # Kiekvienai konfigūracijai - paskutinio pasiekto etapo rezultatas
+    leaderboard = leaderboard.sort_values('rung').groupby('candidate').tail(1)
+    leaderboard = leaderboard.sort_values(['rung', f'{scoring}_mean'], ascending=[False, False])
+    leaderboard.insert(0, 'rank', range(1, len(leaderboard) + 1))
+    return leaderboard.drop(columns=['candidate']).reset_index(drop=True), stats
+
+
+def run_search(data_file='data/students_data.csv', mode='random', n_candidates=60, scoring='roc_auc', eta=3,
+               cv=5, min_resources=60, n_jobs=-1, seed=42, output=LEADERBOARD_FILE):
+    """
+    Hiperparametrų paieška visoms modelių šeimoms
+
+    Returns:
+        leaderboard DataFrame
+    """
+    from sklearn.model_selection import train_test_split
+
+    start = time.perf_counter()
+    print("=" * 60)
+    print("HIPERPARAMETRŲ PAIEŠKA (SUCCESSIVE HALVING)")
+    print("=" * 60)
+
+    feature_columns = get_feature_columns()
+    X, y, _ = cached_feature_matrix(data_file, feature_columns)
+    # Tas pats skaidymas kaip train_model.py - testavimo dalis paieškoje nenaudojama
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+    data_key = f"{cache_key(data_file, feature_columns)}:train"
+
+    candidates = (grid_candidates(SEARCH_SPACES) if mode == 'grid'
+                  else random_candidates(SEARCH_SPACES, n_candidates, seed))
+    print(f"\nKonfigūracijų: {len(candidates)} ({mode}), treniravimo eilučių: {len(y_train)}, "
+          f"metrika: {scoring}")
+
+    leaderboard, stats = successive_halving(candidates, X_train, y_train, data_key, scoring, eta, cv,
+                                            min_resources, n_jobs, seed)
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    leaderboard.to_csv(output, index=False)
+
+    print("\nGeriausios konfigūracijos:")
+    columns = ['rank', 'model', 'budget', f'{scoring}_mean', 'recall_mean', 'f1_mean', 'params']
+    print(leaderboard[columns].head(10).to_string(index=False))
+    print("\nGeriausia kiekvienos šeimos konfigūracija:")
+    for family, group in leaderboard.groupby('model', sort=False):
+        best = group.iloc[0]
+        print(f"   {family}: {best['params']} ({scoring} = {best[f'{scoring}_mean']:.4f}, "
+              f"etapas {best['rung'] + 1})")
+
+    seconds = time.perf_counter() - start
+    print(f"\nFold'ų įvertinta: {stats['evaluated_folds']}, paimta iš talpyklos: {stats['cached_folds']}")
+    print(f"Paieška baigta per {seconds:.1f} s, rezultatai: {output}")
+    return leaderboard
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Hiperparametrų paieška (successive halving)")
+    parser.add_argument('data_file', nargs='?', default='data/students_data.csv')
+    parser.add_argument('--mode', choices=['grid', 'random'], default='random')
+    parser.add_argument('--n-candidates', type=int, default=60, help="Atsitiktinės paieškos konfigūracijų skaičius")
+    parser.add_argument('--scoring', choices=SCORING_METRICS, default='roc_auc')
+    parser.add_argument('--eta', type=int, default=3, help="Kiek kartų sumažinamas konfigūracijų skaičius etape")
+    parser.add_argument('--cv', type=int, default=5)
+    parser.add_argument('--min-resources', type=int, default=60, help="Mažiausias etapo eilučių skaičius")
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=LEADERBOARD_FILE)
+    args = parser.parse_args()
+
+    run_search(args.data_file, args.mode, args.n_candidates, args.scoring, args.eta, args.cv,
+               args.min_resources, args.n_jobs, args.seed, args.output)
@@ -0,0 +1,145 @@
+"""
+Programos paleidimo (importavimo) laiko ataskaita
+Kiekvienas įėjimo taškas importuojamas naujame procese su `python -X importtime`,
+parodomos brangiausios bibliotekos ir patikrinamas laiko biudžetas.
+
+Naudojimas:
+    python import_budget.py
+    python import_budget.py predict --repeats 5
+    python import_budget.py --strict    # nepavykęs importuoti įėjimo taškas taip pat klaida
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Įėjimo taškas: (importavimo laiko biudžetas sekundėmis, bibliotekos, kurių importuojant būti neturi)
+ENTRY_POINTS = {
+    'predict': (1.0, ['sklearn', 'matplotlib', 'seaborn', 'imblearn', 'plotly']),
+    'scoring_server': (1.2, ['sklearn', 'matplotlib', 'seaborn', 'imblearn', 'plotly']),
+    'train_model': (1.0, ['sklearn', 'matplotlib', 'seaborn', 'imblearn', 'plotly']),
+    'streamlit_app': (3.0, ['sklearn', 'matplotlib', 'seaborn', 'imblearn', 'plotly']),
+}
+
+
+def parse_importtime(stderr):
+    """
+    Išnagrinėja -X importtime išvestį
+
+    Returns:
+        sąrašas (modulis, savas laikas us, bendras laikas us, gylis)
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue  # antraštės eilutė
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), self_us, cumulative_us, depth))
+    return rows
+
+
+def measure_import(module_name):
+    """
+    Importuoja modulį naujame procese
+
+    Returns:
+        dict su importavimo laiku (s), moduliais ir klaida (jei nepavyko)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module_name}'],
+        cwd=SCRIPT_DIR, capture_output=True, text=True
+    )
+    rows = parse_importtime(result.stderr)
+    if result.returncode != 0:
+        error_lines = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        return {'seconds': None, 'rows': rows, 'error': error_lines[-1] if error_lines else 'nežinoma klaida'}
+
+    seconds = next((cumulative / 1e6 for name, _, cumulative, _ in rows if name == module_name), None)
+    return {'seconds': seconds, 'rows': rows, 'error': None}
+
+
+def package_totals(rows):
+    """Sumuoja savą importavimo laiką pagal viršutinio lygio paketą"""
+    totals = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        totals[name.split('.')[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def check_entry_point(module_name, budget, forbidden, repeats=3, top=8):
+    """
+    Matuoja įėjimo tašką repeats kartų ir patikrina biudžetą
+
+    Returns:
+        dict su mediana, biudžetu ir būsena ('OK', 'VIRŠYTA', 'PRALEISTA')
+    """
+    runs = [measure_import(module_name) for _ in range(repeats)]
+    failed = [run for run in runs if run['error'] is not None]
+    if failed:
+        print(f"\n{module_name}: nepavyko importuoti ({failed[0]['error']}), praleidžiama")
+        return {'module': module_name, 'seconds': None, 'budget': budget, 'status': 'PRALEISTA'}
+
+    runs.sort(key=lambda run: run['seconds'])
+    median = runs[len(runs) // 2]
+    imported = {name.split('.')[0] for name, _, _, _ in median['rows']}
+    unexpected = [name for name in forbidden if name in imported]
+
+    status = 'OK'
+    if median['seconds'] > budget or unexpected:
+        status = 'VIRŠYTA'
+
+    print(f"\n{module_name}: {median['seconds'] * 1000:.0f} ms (biudžetas {budget * 1000:.0f} ms) - {status}")
+    for package, self_us in package_totals(median['rows'])[:top]:
+        print(f"  {package:<28} {self_us / 1000:8.1f} ms")
+    if unexpected:
+        print(f"  Importuotos bibliotekos, kurios turėtų būti įkeliamos vėliau: {', '.join(unexpected)}")
+
+    return {'module': module_name, 'seconds': median['seconds'], 'budget': budget,
+            'unexpected': unexpected, 'status': status}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importavimo laiko ataskaita ir biudžeto patikra")
+    parser.add_argument('modules', nargs='*', default=list(ENTRY_POINTS),
+                        help="Tikrinami įėjimo taškai (numatyta: visi)")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--top', type=int, default=8, help="Kiek brangiausių paketų rodyti")
+    parser.add_argument('--strict', action='store_true',
+                        help="Nepavykusius importuoti (nepatikrintus) įėjimo taškus laikyti klaida")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("IMPORTAVIMO LAIKO ATASKAITA")
+    print("=" * 60)
+
+    results = []
+    for module_name in args.modules:
+        budget, forbidden = ENTRY_POINTS.get(module_name, (1.0, []))
+        results.append(check_entry_point(module_name, budget, forbidden, args.repeats, args.top))
+
+    over_budget = [r['module'] for r in results if r['status'] == 'VIRŠYTA']
+    skipped = [r['module'] for r in results if r['status'] == 'PRALEISTA']
+    print("\n" + "=" * 60)
+    if over_budget:
+        print(f"Biudžetas viršytas: {', '.join(over_budget)}")
+    if skipped:
+        print(f"Nepatikrinta (nepavyko importuoti): {', '.join(skipped)}")
+    if over_budget or (skipped and args.strict):
+        return 1
+    if skipped:
+        print("Patikrinti įėjimo taškai telpa į biudžetą")
+    else:
+        print("Visi įėjimo taškai telpa į biudžetą")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Inkrementinis modelių atnaujinimas naujais duomenų bazės įrašais
+Naudojami tik nepertreniruoti įrašai su tikru atsakymu (is_trained = 0, has_real_answer = 1),
+todėl atnaujinimo trukmė priklauso nuo naujų, o ne nuo visų duomenų kiekio.
+
+- scaler statistika atnaujinama su StandardScaler.partial_fit;
+- esami modeliai perskaičiuojami naujai scaler skalei (medžių slenksčiai ir
+  tiesinio modelio koeficientai), todėl jų prognozės nepasikeičia;
+- Random Forest papildomas naujais medžiais (warm_start), ištreniruotais naujais įrašais;
+- naudojama logistinė regresija atnaujinama keliomis SGD epochomis (logistinė
+  nuostolių funkcija), pradedant nuo jos koeficientų; rezultatas įrašomas atgal
+  į tą patį logistic_regression modelį, kurį naudoja prognozės.
+"""
+import copy
+import os
+import time
+import numpy as np
+from utils import clean_numeric_columns, get_feature_columns, load_model, risk_labels, save_model
+from database import get_untrained_students, mark_students_as_trained
+from model_registry import registry
+from fast_inference import export_fused_logistic, fused_artifact_path
+from array_store import save_model_arrays
+
+
+def update_scaler(scaler, X):
+    """
+    Grąžina scaler kopiją, atnaujintą naujais duomenimis (partial_fit)
+    """
+    new_scaler = copy.deepcopy(scaler)
+    new_scaler.partial_fit(X)
+    return new_scaler
+
+
+def _scale_params(scaler):
+    """StandardScaler vidurkis ir mastelis (jei centravimas/mastelis išjungti - 0 ir 1)"""
+    n_features = scaler.n_features_in_
+    mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+    return np.asarray(mean, dtype=float), np.asarray(scale, dtype=float)
+
+
+def remap_tree_thresholds(tree_model, old_scaler, new_scaler):
+    """
+    Perskaičiuoja medžio (ar miško) slenksčius iš senos scaler skalės į naują
+
+    x_sena <= t  <=>  x_nauja <= (t * s_seno + m_seno - m_naujo) / s_naujo
+    """
+    old_mean, old_scale = _scale_params(old_scaler)
+    new_mean, new_scale = _scale_params(new_scaler)
+    estimators = getattr(tree_model, 'estimators_', [tree_model])
+    for estimator in estimators:
+        tree = estimator.tree_
+        internal = tree.children_left != -1
+        features = tree.feature[internal]
+        thresholds = tree.threshold
+        raw = thresholds[internal] * old_scale[features] + old_mean[features]
+        thresholds[internal] = (raw - new_mean[features]) / new_scale[features]
+
+
+def remap_linear_model(linear_model, old_scaler, new_scaler):
+    """
+    Perskaičiuoja tiesinio modelio koeficientus naujai scaler skalei
+
+    w' = w * s_naujo / s_seno,  b' = b + sum(w * (m_naujo - m_seno) / s_seno)
+    """
+    old_mean, old_scale = _scale_params(old_scaler)
+    new_mean, new_scale = _scale_params(new_scaler)
+    coef = linear_model.coef_
+    linear_model.intercept_ = linear_model.intercept_ + (coef * (new_mean - old_mean) / old_scale).sum(axis=1)
+    linear_model.coef_ = coef * new_scale / old_scale
+
+
+def _balanced_sample_weight(y, classes):
+    """Svoriai, atitinkantys class_weight='balanced' šiam paketui"""
+    labels, counts = np.unique(y, return_counts=True)
+    class_weights = dict(zip(labels, len(y) / (len(classes) * counts)))
+    return np.array([class_weights[label] for label in y])
+
+
+def _save_updated(model, scaler, model_name, X_check):
+    """Išsaugo atnaujintą modelį kartu su masyvų ir sujungtu formatais"""
+    save_model(model, scaler, model_name)
+    save_model_arrays(model, scaler, model_name)
+    max_diff = export_fused_logistic(model, scaler, model_name, X_check)
+    if max_diff is None and os.path.exists(fused_artifact_path(model_name)):
+        os.remove(fused_artifact_path(model_name))
+
+
+def update_random_forest(X_new, y_new, new_trees=10, model_name='random_forest'):
+    """
+    Papildo Random Forest naujais medžiais, ištreniruotais tik naujais įrašais
+
+    Returns:
+        dict su atnaujinimo informacija arba None, jei atnaujinti negalima
+    """
+    model, scaler = load_model(model_name)
+    # Įkelti modeliai gali būti bendri (model_bundle talpykla), todėl keičiama kopija
+    model = copy.deepcopy(model)
+    if not hasattr(model, 'estimators_') or not hasattr(model, 'warm_start'):
+        print(f"   {model_name}: modelis nėra Random Forest, praleidžiama")
+        return None
+    if len(np.unique(y_new)) < len(model.classes_):
+        print(f"   {model_name}: naujuose įrašuose yra tik viena klasė, medžiai nepridedami")
+        return None
+
+    new_scaler = update_scaler(scaler, X_new)
+    remap_tree_thresholds(model, scaler, new_scaler)
+
+    # Nauji medžiai mato tik naujus įrašus, todėl 'balanced' svoriai skaičiuojami šiam paketui
+    class_weight = model.class_weight
+    trees_before = len(model.estimators_)
+    model.set_params(warm_start=True, n_estimators=trees_before + new_trees, class_weight=None)
+    model.fit(new_scaler.transform(X_new), y_new,
+              sample_weight=_balanced_sample_weight(y_new, model.classes_) if class_weight == 'balanced' else None)
+    model.set_params(warm_start=False, class_weight=class_weight)
+
+    _save_updated(model, new_scaler, model_name, X_new)
+    return {'model': model_name, 'trees_before': trees_before, 'trees_after': len(model.estimators_)}
+
+
+def update_logistic_regression(X_new, y_new, epochs=5, model_name='logistic_regression'):
+    """
+    Atnaujina naudojamą logistinę regresiją SGD epochomis naujais įrašais
+
+    LogisticRegression neturi partial_fit, todėl SGD (logistinė nuostolių funkcija)
+    pradedamas nuo esamų (naujai skalei perskaičiuotų) koeficientų, o rezultatas
+    įrašomas atgal į tą patį modelį.
+
+    Returns:
+        dict su atnaujinimo informacija arba None, jei atnaujinti negalima
+    """
+    from sklearn.linear_model import SGDClassifier
+
+    model, scaler = load_model(model_name)
+    model = copy.deepcopy(model)
+    if not hasattr(model, 'coef_') or not hasattr(model, 'intercept_'):
+        print(f"   {model_name}: modelis nėra tiesinis, praleidžiama")
+        return None
+    if len(np.unique(y_new)) < len(model.classes_):
+        print(f"   {model_name}: naujuose įrašuose yra tik viena klasė, modelis neatnaujinamas")
+        return None
+
+    new_scaler = update_scaler(scaler, X_new)
+    remap_linear_model(model, scaler, new_scaler)
+
+    # SGD nepalaiko class_weight='balanced' su pradiniais koeficientais, todėl klasės subalansuojamos svoriais
+    sample_weight = _balanced_sample_weight(y_new, model.classes_)
+    sgd = SGDClassifier(loss='log_loss', alpha=1e-4, learning_rate='constant', eta0=0.01,
+                        max_iter=epochs, tol=None, random_state=42)
+    sgd.fit(new_scaler.transform(X_new), y_new, coef_init=model.coef_, intercept_init=model.intercept_,
+            sample_weight=sample_weight)
+    model.coef_ = sgd.coef_.copy()
+    model.intercept_ = sgd.intercept_.copy()
+
+    _save_updated(model, new_scaler, model_name, X_new)
+    return {'model': model_name, 'epochs': epochs}
+
+
+def incremental_update(new_trees=10, sgd_epochs=5, min_rows=1):
+    """
+    Atnaujina modelius nepertreniruotais duomenų bazės įrašais
+
+    Pažymimi tik tie įrašai, kurie buvo panaudoti bent vienam modeliui atnaujinti.
+
+    Returns:
+        dict su naudotų įrašų skaičiumi, atnaujintais modeliais ir trukme
+    """
+    start = time.perf_counter()
+    print("=" * 60)
+    print("INKREMENTINIS MODELIŲ ATNAUJINIMAS")
+    print("=" * 60)
+
+    df = get_untrained_students()
+    print(f"\n1. Nepertreniruotų įrašų: {len(df)}")
+
+    feature_columns = get_feature_columns()
+    df = df.dropna(subset=['ketinu_mesti_studijas'])
+    if len(df) < min_rows:
+        print(f"   Per mažai naujų įrašų (reikia bent {min_rows}), atnaujinimas praleidžiamas")
+        return {'rows_used': 0, 'updated': [], 'seconds': time.perf_counter() - start}
+
+    X_new = clean_numeric_columns(df[feature_columns].copy(), feature_columns)
+    y_new = risk_labels(df['ketinu_mesti_studijas']).to_numpy()
+
+    # Trūkstamos reikšmės pildomos treniravimo vidurkiais (iš modelių rinkinio)
+    X_new = registry.get('random_forest').impute(X_new)
+    print(f"   Naudojama įrašų: {len(X_new)} (rizikos grupė: {int(y_new.sum())})")
+
+    updated = []
+    print("\n2. Random Forest papildomas naujais medžiais...")
+    rf_info = update_random_forest(X_new, y_new, new_trees=new_trees)
+    if rf_info is not None:
+        print(f"   Medžių: {rf_info['trees_before']} -> {rf_info['trees_after']}")
+        updated.append(rf_info)
+
+    print("\n3. Logistinė regresija atnaujinama SGD epochomis...")
+    lr_info = update_logistic_regression(X_new, y_new, epochs=sgd_epochs)
+    if lr_info is not None:
+        print(f"   Atnaujinta ({lr_info['epochs']} epochos)")
+        updated.append(lr_info)
+
+    marked = 0
+    if updated:
+        registry.invalidate([info['model'] for info in updated])
+        print("\n4. Įrašai pažymimi kaip pertreniruoti...")
+        marked = mark_students_as_trained(df['id'].tolist())
+        print(f"   Pažymėta: {marked}")
+    else:
+        print("\nNė vienas modelis neatnaujintas, įrašai lieka nepažymėti")
+
+    seconds = time.perf_counter() - start
+    print(f"\nAtnaujinimas baigtas per {seconds:.2f} s")
+    return {'rows_used': len(X_new), 'marked': marked, 'updated': updated, 'seconds': seconds}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inkrementinis modelių atnaujinimas")
+    parser.add_argument('--new-trees', type=int, default=10, help="Kiek medžių pridėti Random Forest")
+    parser.add_argument('--sgd-epochs', type=int, default=5)
+    parser.add_argument('--min-rows', type=int, default=1)
+    args = parser.parse_args()
+
+    incremental_update(args.new_trees, args.sgd_epochs, args.min_rows)
@@ -0,0 +1,262 @@
+"""
+Prognozavimo metrikos
+Skaitikliai ir fiksuotų intervalų vėlinimo histogramos su eksportu
+Prometheus tekstiniu formatu ir JSON
+"""
+import bisect
+import math
+import threading
+
+# Vėlinimo intervalų ribos sekundėmis (0.1 ms - 10 s)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames, labels, extra=None):
+    """Žymės Prometheus formatu: {model="rf",stage="inference"}"""
+    pairs = list(zip(labelnames, labels))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    """Skaičius Prometheus formatu"""
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Didėjantis skaitiklis su žymėmis"""
+    kind = 'counter'
+
+    def __init__(self, name, description, labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        """Padidina skaitiklį (žymių reikšmės nurodomos labelnames tvarka)"""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        """Dabartinė reikšmė"""
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def samples(self):
+        """Visų žymių reikšmės: sąrašas (žymės, reikšmė)"""
+        with self._lock:
+            return sorted(self._values.items())
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def prometheus_lines(self):
+        lines = []
+        for labels, value in self.samples():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+    def snapshot(self):
+        return [{'labels': dict(zip(self.labelnames, labels)), 'value': value}
+                for labels, value in self.samples()]
+
+
+class Histogram:
+    """
+    Histograma su fiksuotomis intervalų ribomis
+
+    Kiekvienam žymių rinkiniui saugomi intervalų skaičiai, suma ir kiekis,
+    todėl observe() kaina nepriklauso nuo stebėjimų skaičiaus.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, description, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        """Įrašo vieną stebėjimą"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        """Sąrašas (žymės, kaupiamieji intervalų skaičiai, suma, kiekis)"""
+        with self._lock:
+            items = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        samples = []
+        for labels, counts, total, count in sorted(items):
+            cumulative, running = [], 0
+            for bucket_count in counts:
+                running += bucket_count
+                cumulative.append(running)
+            samples.append((labels, cumulative, total, count))
+        return samples
+
+    def quantile(self, q, *labels):
+        """
+        Kvantilio įvertis iš intervalų (tiesinė interpoliacija intervalo viduje,
+        kaip Prometheus histogram_quantile)
+
+        Returns:
+            reikšmė sekundėmis arba None, jei stebėjimų nėra
+        """
+        for sample_labels, cumulative, _, count in self.samples():
+            if sample_labels == labels:
+                return self._quantile(q, cumulative, count)
+        return None
+
+    def _quantile(self, q, cumulative, count):
+        if count == 0:
+            return None
+        rank = q * count
+        for index, running in enumerate(cumulative):
+            if running >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                previous = cumulative[index - 1] if index > 0 else 0
+                in_bucket = running - previous
+                if in_bucket == 0:
+                    return self.buckets[index]
+                return lower + (self.buckets[index] - lower) * (rank - previous) / in_bucket
+        return self.buckets[-1]
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def prometheus_lines(self):
+        lines = []
+        bounds = list(self.buckets) + [math.inf]
+        for labels, cumulative, total, count in self.samples():
+            for bound, running in zip(bounds, cumulative):
+                label_text = _format_labels(self.labelnames, labels, ('le', _format_value(bound)))
+                lines.append(f"{self.name}_bucket{label_text} {running}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+    def snapshot(self):
+        snapshot = []
+        for labels, cumulative, total, count in self.samples():
+            snapshot.append({
+                'labels': dict(zip(self.labelnames, labels)),
+                'count': count,
+                'sum': total,
+                'buckets': {_format_value(bound): running
+                            for bound, running in zip(list(self.buckets) + [math.inf], cumulative)},
+                'p50': self._quantile(0.50, cumulative, count),
+                'p99': self._quantile(0.99, cumulative, count),
+            })
+        return snapshot
+
+
+class MetricsRegistry:
+    """Metrikų rinkinys su eksportu"""
+    def __init__(self, prefix='student_risk_'):
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metrika jau užregistruota: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, description, labelnames=()):
+        return self._register(Counter(self.prefix + name, description, labelnames))
+
+    def histogram(self, name, description, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(self.prefix + name, description, labelnames, buckets))
+
+    def reset(self):
+        """Išvalo visas reikšmes (metrikos lieka užregistruotos)"""
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+    def to_prometheus(self):
+        """Visos metrikos Prometheus tekstiniu formatu"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.prometheus_lines())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """Visos metrikos kaip JSON tinkamas dict"""
+        snapshot = {'counters': {}, 'histograms': {}}
+        for metric in list(self._metrics.values()):
+            group = 'counters' if metric.kind == 'counter' else 'histograms'
+            snapshot[group][metric.name] = metric.snapshot()
+        return snapshot
+
+
+registry = MetricsRegistry()
+
+# Prognozavimo kelio metrikos
+PREDICTIONS = registry.counter(
+    'predictions_total', 'Atliktų prognozių skaičius pagal modelį ir rizikos lygį', ['model', 'risk_level'])
+PREDICTION_ERRORS = registry.counter(
+    'prediction_errors_total', 'Neprognozuotų įrašų skaičius (trūksta arba netinkamos reikšmės)', ['model'])
+CACHE_LOOKUPS = registry.counter(
+    'prediction_cache_lookups_total', 'Prognozių talpyklos užklausos (hit/miss)', ['model', 'result'])
+STAGE_LATENCY = registry.histogram(
+    'prediction_stage_seconds', 'Prognozavimo etapų trukmė sekundėmis', ['model', 'stage'])
+BATCH_ROWS = registry.histogram(
+    'prediction_batch_rows', 'Eilučių skaičius viename predict_frame kvietime', ['model'],
+    buckets=(1, 10, 100, 1000, 10000, 100000, 1000000))
+
+# Stebimi prognozavimo etapai
+PREDICTION_STAGES = ['model_load', 'prepare', 'inference', 'explain', 'total', 'batch_inference']
+
+
+def latency_summary(model_name='random_forest', stages=PREDICTION_STAGES):
+    """
+    p50 / p99 vėlinimas milisekundėmis kiekvienam etapui (pvz. Streamlit skydeliui)
+
+    Returns:
+        sąrašas dict su etapu, stebėjimų skaičiumi, p50_ms ir p99_ms
+    """
+    rows = []
+    for labels, cumulative, _, count in STAGE_LATENCY.samples():
+        if labels[0] != model_name or labels[1] not in stages:
+            continue
+        p50 = STAGE_LATENCY._quantile(0.50, cumulative, count)
+        p99 = STAGE_LATENCY._quantile(0.99, cumulative, count)
+        rows.append({
+            'stage': labels[1],
+            'count': count,
+            'p50_ms': p50 * 1000 if p50 is not None else None,
+            'p99_ms': p99 * 1000 if p99 is not None else None,
+        })
+    order = {stage: i for i, stage in enumerate(stages)}
+    return sorted(rows, key=lambda row: order[row['stage']])
@@ -0,0 +1,205 @@
+"""
+Modelių rinkinys viename faile (models/model_bundle.joblib)
+Vietoj atskirų modelio ir scaler pickle failų kiekvienam modeliui saugomas vienas
+versijuotas failas: scaler (vieną kartą), visi modeliai, požymių tvarka, treniravimo
+vidurkiai trūkstamoms reikšmėms ir rizikos slenksčiai.
+
+Failo pradžioje įrašytas mažas aprašas (manifest, kartu su treniravimo vidurkiais),
+po jo - modeliai, todėl aprašą galima perskaityti neįkeliant modelių. Visi modeliai įkeliami vienu failo atidarymu
+ir naudoja tą patį scaler objektą.
+
+Jei modelio pickle failas naujesnis už rinkinį (pvz. po incremental_training.py),
+naudojamas pickle failas.
+
+Naudojimas:
+    python model_bundle.py              # aprašas
+"""
+import os
+import time
+import numpy as np
+from utils import HIGH_RISK_THRESHOLD, RISK_THRESHOLD
+
+BUNDLE_FILE = 'models/model_bundle.joblib'
+BUNDLE_FORMAT = 'student-risk-bundle'
+BUNDLE_FORMAT_VERSION = 1
+
+# (kelias, mtime_ns, dydis) -> įkeltas aprašas / visas rinkinys
+_manifest_cache = {}
+_bundle_cache = {}
+
+
+def _pickle_path(model_name):
+    return f'models/{model_name}_model.pkl'
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return path, st.st_mtime_ns, st.st_size
+
+
+def _check_manifest(manifest, path):
+    if manifest.get('format') != BUNDLE_FORMAT:
+        raise ValueError(f"{path} nėra modelių rinkinio failas")
+    if manifest.get('format_version') != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Nepalaikoma modelių rinkinio versija: {manifest.get('format_version')}")
+    return manifest
+
+
+def save_bundle(models, scaler, feature_columns, means, best_model=None, metadata=None, path=BUNDLE_FILE):
+    """
+    Išsaugo visus modelius su bendru paruošimu viename faile
+
+    Ankstesni šių modelių pickle failai (modelis + scaler) pašalinami.
+
+    Args:
+        models: dict failo pavadinimas ('random_forest') -> modelis
+        means: treniravimo vidurkiai trūkstamoms reikšmėms (požymių tvarka)
+        best_model: geriausio modelio pavadinimas (įrašomas į aprašą)
+        metadata: papildoma informacija aprašui (duomenų failas, eilučių skaičius...)
+
+    Returns:
+        aprašas (dict)
+    """
+    import joblib
+    import sklearn
+
+    means = np.asarray(means, dtype=np.float64)
+    if len(means) != len(feature_columns) or scaler.n_features_in_ != len(feature_columns):
+        raise ValueError("Vidurkių, scaler ir požymių skaičius nesutampa")
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'sklearn_version': sklearn.__version__,
+        'models': {name: type(model).__name__ for name, model in models.items()},
+        'best_model': best_model,
+        'feature_columns': list(feature_columns),
+        'means': means.tolist(),
+        'risk_threshold': RISK_THRESHOLD,
+        'high_risk_threshold': HIGH_RISK_THRESHOLD,
+        'metadata': metadata or {},
+    }
+    payload = {'scaler': scaler, 'models': dict(models)}
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        joblib.dump(manifest, f)
+        joblib.dump(payload, f)
+    os.replace(tmp_path, path)
+
+    for name in models:
+        for old_path in (_pickle_path(name), f'models/{name}_scaler.pkl'):
+            if os.path.exists(old_path):
+                os.remove(old_path)
+    print(f"Modelių rinkinys išsaugotas: {path} ({', '.join(models)})")
+    return manifest
+
+
+def read_manifest(path=BUNDLE_FILE):
+    """
+    Perskaito tik rinkinio aprašą (modeliai neįkeliami)
+
+    Returns:
+        aprašas arba None, jei rinkinio nėra
+    """
+    import joblib
+
+    if not os.path.exists(path):
+        return None
+    key = _stat_key(path)
+    if key not in _manifest_cache:
+        with open(path, 'rb') as f:
+            manifest = _check_manifest(joblib.load(f), path)
+        _manifest_cache.clear()
+        _manifest_cache[key] = manifest
+    return _manifest_cache[key]
+
+
+def load_bundle(path=BUNDLE_FILE):
+    """
+    Įkelia visą rinkinį vienu failo atidarymu (pakartotinai - iš atminties, kol failas nepakito)
+
+    Returns:
+        dict su manifest, scaler, means ir models
+    """
+    import joblib
+
+    key = _stat_key(path)
+    if key not in _bundle_cache:
+        with open(path, 'rb') as f:
+            manifest = _check_manifest(joblib.load(f), path)
+            payload = joblib.load(f)
+        _bundle_cache.clear()
+        _bundle_cache[key] = {'manifest': manifest, 'means': np.asarray(manifest['means'], dtype=np.float64),
+                              **payload}
+        _manifest_cache.clear()
+        _manifest_cache[key] = manifest
+    return _bundle_cache[key]
+
+
+def bundle_has_model(model_name, path=BUNDLE_FILE):
+    manifest = read_manifest(path)
+    return manifest is not None and model_name in manifest['models']
+
+
+def _pickle_is_newer(model_name, path):
+    pickle_path = _pickle_path(model_name)
+    return os.path.exists(pickle_path) and os.path.getmtime(pickle_path) > os.path.getmtime(path)
+
+
+def model_source_path(model_name, path=BUNDLE_FILE):
+    """
+    Failas, iš kurio įkeliamas modelis: rinkinys arba naujesnis modelio pickle failas
+
+    Returns:
+        kelias arba None, jei modelio nėra
+    """
+    if bundle_has_model(model_name, path) and not _pickle_is_newer(model_name, path):
+        return path
+    pickle_path = _pickle_path(model_name)
+    return pickle_path if os.path.exists(pickle_path) else None
+
+
+def model_available(model_name):
+    return model_source_path(model_name) is not None
+
+
+def load_training_means(path=BUNDLE_FILE):
+    """
+    Treniravimo vidurkiai trūkstamoms reikšmėms užpildyti (požymių tvarka)
+
+    Returns:
+        numpy masyvas arba None, jei rinkinio nėra
+    """
+    manifest = read_manifest(path)
+    if manifest is None:
+        return None
+    return np.asarray(manifest['means'], dtype=np.float64)
+
+
+def load_bundle_model(model_name, path=BUNDLE_FILE):
+    """
+    Įkelia modelį iš rinkinio (vienas failo atidarymas, aprašas atskirai neskaitomas)
+
+    Returns:
+        (modelis, scaler) - scaler objektas bendras visiems modeliams; None, jei rinkinio
+        nėra, jame nėra šio modelio arba modelio pickle failas naujesnis.
+        Objektai laikomi talpykloje, todėl prieš keičiant juos reikia nukopijuoti.
+    """
+    if not os.path.exists(path) or _pickle_is_newer(model_name, path):
+        return None
+    bundle = load_bundle(path)
+    if model_name not in bundle['models']:
+        return None
+    return bundle['models'][model_name], bundle['scaler']
+
+
+if __name__ == "__main__":
+    manifest = read_manifest()
+    if manifest is None:
+        print(f"Rinkinys nerastas: {BUNDLE_FILE}")
+    else:
+        print(f"Rinkinys: {BUNDLE_FILE} ({os.path.getsize(BUNDLE_FILE) / 1024:.0f} KB)")
+        for key, value in manifest.items():
+            print(f"  {key}: {value}")
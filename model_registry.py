@@ -0,0 +1,220 @@
+"""
+Modelių registras
+Laiko įkeltus modelius atmintyje, kad prognozė nebūtų įkeliama iš disko kiekvieną kartą
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from utils import load_model
+from fast_inference import compile_model, fused_artifact_path, FusedLogistic
+from array_store import arrays_available, load_model_arrays, manifest_path
+from model_bundle import BUNDLE_FILE, load_training_means, model_source_path
+
+MODEL_NAMES = ['logistic_regression', 'decision_tree', 'random_forest']
+
+
+def model_artifact_paths(model_name):
+    """
+    Grąžina modelio failų kelius: modelių rinkinys arba modelis ir scaler
+    """
+    source = model_source_path(model_name)
+    if source is not None and not source.endswith('_model.pkl'):
+        return [source]
+    return [f'models/{model_name}_model.pkl', f'models/{model_name}_scaler.pkl']
+
+
+def _file_hash(path):
+    """Apskaičiuoja failo turinio SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def artifact_version(model_name, check='mtime'):
+    """
+    Grąžina modelio failų versiją
+
+    check='mtime' - failų keitimo laikas ir dydis (pigu)
+    check='hash' - failų turinio SHA-256 (patikimiau, bet skaito visą failą)
+    """
+    paths = [path for path in model_artifact_paths(model_name) + [manifest_path(model_name)]
+             if os.path.exists(path)]
+    if not paths:
+        raise FileNotFoundError(f"Modelis nerastas: {model_name}")
+    if check == 'hash':
+        return tuple(_file_hash(path) for path in paths)
+    return tuple((st.st_mtime_ns, st.st_size) for st in map(os.stat, paths))
+
+
+def _load_engine(model_name, model, scaler):
+    """
+    Grąžina greitą variklį: eksportuotą sujungtą modelį, jei jis naujesnis už
+    modelio failą, kitaip sukompiliuotą iš įkelto modelio
+    """
+    fused_path = fused_artifact_path(model_name)
+    model_path = model_artifact_paths(model_name)[0]
+    if os.path.exists(fused_path) and os.path.getmtime(fused_path) >= os.path.getmtime(model_path):
+        return FusedLogistic.load(fused_path)
+    return compile_model(model, scaler)
+
+
+def _training_means(model_name, scaler, engine):
+    """
+    Trūkstamų reikšmių vidurkiai, atitinkantys modelio scaler
+
+    Rinkinio vidurkiai naudojami tik modeliui iš rinkinio: atnaujintas modelis
+    (naujesnis pickle, pvz. po incremental_training.py) turi savo scaler su pakitusiu vidurkiu.
+    """
+    if model_source_path(model_name) == BUNDLE_FILE:
+        return load_training_means()
+    if scaler is None and getattr(engine, 'mean', None) is not None:
+        return np.asarray(engine.mean, dtype=np.float64)
+    if scaler is None:
+        import joblib
+
+        scaler_path = f'models/{model_name}_scaler.pkl'
+        if not os.path.exists(scaler_path):
+            return None
+        scaler = joblib.load(scaler_path)
+    return np.asarray(scaler.mean_, dtype=np.float64)
+
+
+class LoadedModel:
+    """
+    Įkeltas modelis kartu su scaler, treniravimo vidurkiais ir versija
+    """
+    def __init__(self, name, model, scaler, version, engine=None, means=None):
+        self.name = name
+        self.model = model
+        self.scaler = scaler
+        self.version = version
+        self.means = means
+        self._engine = engine
+        self._engine_compiled = engine is not None
+
+    @property
+    def engine(self):
+        """Greitas prognozavimo variklis (sukuriamas pirmą kartą prireikus) arba None"""
+        if not self._engine_compiled:
+            self._engine = _load_engine(self.name, self.model, self.scaler)
+            self._engine_compiled = True
+        return self._engine
+
+    def impute(self, X):
+        """
+        Užpildo trūkstamas DataFrame reikšmes treniravimo vidurkiais (jei jie žinomi)
+        """
+        if self.means is None:
+            return X
+        return X.fillna(pd.Series(self.means, index=X.columns))
+
+    def predict_proba(self, X, fast=False):
+        """
+        Normalizuoja požymius ir grąžina klasių tikimybes visai matricai
+        
+        fast=True naudoja greitą variklį (mažas vėlinimas vienai eilutei), jei modelis jį palaiko.
+        Sujungta logistinė regresija naudojama visada, nes ji greitesnė ir didelėms imtims.
+        """
+        engine = self.engine
+        if engine is not None and (fast or engine.use_for_batches or self.model is None):
+            return engine.predict_proba(np.asarray(X, dtype=float))
+        return self.model.predict_proba(self.scaler.transform(X))
+
+
+class ModelRegistry:
+    """
+    Procesui bendras modelių registras su LRU išmetimu
+
+    Modelis įkeliamas tik pirmą kartą arba pasikeitus jo failams.
+    Kai įkelta daugiau nei max_models modelių, išmetamas seniausiai naudotas.
+
+    artifact_format='auto' - naudojamas masyvų formatas (memory mapping), jei jis
+    ne senesnis už pickle; 'pickle' - visada joblib pickle.
+    """
+    def __init__(self, max_models=3, check='mtime', artifact_format='auto'):
+        self.max_models = max_models
+        self.check = check
+        self.artifact_format = artifact_format
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.loads = 0
+
+    def get(self, model_name='random_forest'):
+        """
+        Grąžina LoadedModel; įkelia iš disko tik jei reikia
+        """
+        version = artifact_version(model_name, self.check)
+        with self._lock:
+            entry = self._entries.get(model_name)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(model_name)
+                self.hits += 1
+                return entry
+
+            if self.artifact_format == 'auto' and arrays_available(model_name):
+                engine = load_model_arrays(model_name)
+                entry = LoadedModel(model_name, None, None, version, engine=engine,
+                                    means=_training_means(model_name, None, engine))
+            else:
+                model, scaler = load_model(model_name)
+                entry = LoadedModel(model_name, model, scaler, version, means=_training_means(model_name, scaler, None))
+            self._entries[model_name] = entry
+            self._entries.move_to_end(model_name)
+            self.loads += 1
+
+            while len(self._entries) > self.max_models:
+                self._entries.popitem(last=False)
+
+            return entry
+
+    def warm(self, model_names=None):
+        """
+        Iš anksto įkelia modelius (pvz. po treniravimo)
+        """
+        if model_names is None:
+            model_names = MODEL_NAMES
+        elif isinstance(model_names, str):
+            model_names = [model_names]
+        return [self.get(name) for name in model_names]
+
+    def invalidate(self, model_names=None):
+        """
+        Pašalina modelius iš registro; be argumentų išvalo viską
+        """
+        with self._lock:
+            if model_names is None:
+                self._entries.clear()
+                return
+            if isinstance(model_names, str):
+                model_names = [model_names]
+            for name in model_names:
+                self._entries.pop(name, None)
+
+    def loaded_models(self):
+        """Grąžina šiuo metu įkeltų modelių pavadinimus (nuo seniausio)"""
+        with self._lock:
+            return list(self._entries.keys())
+
+
+registry = ModelRegistry()
+
+
+def get_model(model_name='random_forest'):
+    """Grąžina modelį iš bendro registro"""
+    return registry.get(model_name)
+
+
+def warm(model_names=None):
+    """Iš anksto įkelia modelius į bendrą registrą"""
+    return registry.warm(model_names)
+
+
+def invalidate(model_names=None):
+    """Pašalina modelius iš bendro registro"""
+    registry.invalidate(model_names)
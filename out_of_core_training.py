@@ -0,0 +1,373 @@
+"""
+Treniravimas dalimis (duomenims, netelpantiems į atmintį)
+Duomenų failas skaitomas po chunk_size eilučių, todėl atmintyje vienu metu laikoma
+tik viena dalis ir riboto dydžio imtis medžių modeliams:
+
+- 1 praėjimas: StandardScaler statistika (partial_fit), klasių dažniai ir
+  stratifikuotos rezervuarinės imtys (atskira kiekvienai klasei);
+- Sprendimų medis ir Random Forest treniruojami su rezervuarine imtimi
+  (klasės subalansuotos, todėl SMOTE nereikia);
+- logistinė regresija treniruojama SGD (partial_fit) per kelis praėjimus (epochas);
+- testavimo eilutės atrenkamos pagal eilutės turinio maišos reikšmę (vienodos eilutės
+  visada patenka į tą pačią pusę) ir vertinamos atskiru praėjimu (ROC-AUC iš histogramų).
+
+Atmintį riboja chunk_size ir sample_rows (arba memory_budget_mb, iš kurio jie apskaičiuojami).
+
+Naudojimas:
+    python out_of_core_training.py didelis.csv
+    python out_of_core_training.py didelis.csv --memory-mb 256 --epochs 3
+"""
+import os
+import numpy as np
+import pandas as pd
+from utils import SURVEY_COLUMN_MAP, clean_numeric_columns, get_feature_columns, rename_survey_columns, risk_labels
+from model_registry import registry
+from fast_inference import export_fused_logistic, fused_artifact_path
+from array_store import save_model_arrays
+from model_bundle import save_bundle
+from profiling import StageProfiler
+from training_plots import save_confusion_matrices
+
+DEFAULT_CHUNK_SIZE = 50000
+DEFAULT_SAMPLE_ROWS = 200000
+# Apytikris atminties kiekis vienai eilutei (baitais): skaitoma dalis (pandas + valymas)
+# ir rezervuarinės imties eilutė (kartu su medžių treniravimo kopijomis)
+CHUNK_ROW_BYTES = 2000
+SAMPLE_ROW_BYTES = 600
+AUC_BINS = 1000
+LOGISTIC_C = 0.1
+COMPARISON_FILE = 'models/out_of_core_comparison.csv'
+PROFILE_FILE = 'models/out_of_core_profile.json'
+
+
+def budget_sizes(memory_budget_mb, sample_share=0.5):
+    """
+    Dalies dydis ir imties dydis pagal atminties ribą
+
+    Returns:
+        (chunk_size, sample_rows)
+    """
+    budget = memory_budget_mb * 1024 * 1024
+    chunk_size = max(1000, int(budget * (1 - sample_share) / CHUNK_ROW_BYTES))
+    sample_rows = max(1000, int(budget * sample_share / SAMPLE_ROW_BYTES))
+    return chunk_size, sample_rows
+
+
+def _needed_columns(feature_columns):
+    """Stulpeliai, kuriuos reikia skaityti (ir apklausos pavadinimais)"""
+    needed = set(feature_columns) | {'ketinu_mesti_studijas', 'rizika'}
+    return needed | {survey for survey, name in SURVEY_COLUMN_MAP.items() if name in needed}
+
+
+def holdout_mask(X, y, holdout, seed=42):
+    """
+    Testavimo eilučių kaukė pagal eilutės turinį (nepriklauso nuo eilučių tvarkos ir dalių ribų)
+    """
+    rows = pd.DataFrame(X).assign(_y=y)
+    hashes = pd.util.hash_pandas_object(rows, index=False, hash_key=f'{seed:016d}'[-16:]).to_numpy()
+    return (hashes % 10000) < int(holdout * 10000)
+
+
+def iter_chunks(data_file, feature_columns, chunk_size=DEFAULT_CHUNK_SIZE, holdout=0.2, seed=42):
+    """
+    Skaito ir išvalo duomenis dalimis
+
+    Yields:
+        (X float masyvas su NaN, y masyvas, testavimo eilučių kaukė)
+    """
+    needed = _needed_columns(feature_columns)
+    for chunk in pd.read_csv(data_file, chunksize=chunk_size, usecols=lambda column: column in needed):
+        chunk = rename_survey_columns(chunk)
+        if 'ketinu_mesti_studijas' in chunk.columns:
+            chunk['rizika'] = risk_labels(chunk['ketinu_mesti_studijas'])
+        missing = [column for column in feature_columns if column not in chunk.columns]
+        if missing:
+            raise KeyError(f"Trūksta stulpelių: {', '.join(missing)}")
+        clean_numeric_columns(chunk, feature_columns)
+        X = chunk[feature_columns].to_numpy(dtype=np.float64)
+        y = chunk['rizika'].to_numpy(dtype=np.int64)
+        yield X, y, holdout_mask(X, y, holdout, seed)
+
+
+class ReservoirSample:
+    """
+    Rezervuarinė imtis (algoritmas R): kiekviena srauto eilutė į imtį patenka
+    su vienoda tikimybe, o imties dydis neviršija capacity
+    """
+    def __init__(self, capacity, n_features, rng):
+        self.capacity = capacity
+        self.rng = rng
+        self.data = np.empty((capacity, n_features))
+        self.size = 0
+        self.seen = 0
+
+    def add(self, rows):
+        fill = min(self.capacity - self.size, len(rows))
+        if fill:
+            self.data[self.size:self.size + fill] = rows[:fill]
+            self.size += fill
+        rest = rows[fill:]
+        if len(rest):
+            # Eilutė i (skaičiuojant nuo 0) pakeičia atsitiktinį imties elementą su tikimybe capacity / (i + 1);
+            # pasikartojančiose pozicijose lieka paskutinė eilutė, kaip ir nuosekliai
+            positions = self.seen + fill + np.arange(len(rest))
+            slots = self.rng.integers(0, positions + 1)
+            keep = slots < self.capacity
+            self.data[slots[keep]] = rest[keep]
+        self.seen += len(rows)
+
+    def values(self):
+        return self.data[:self.size]
+
+
+def finalize_scaler(scaler, n_rows):
+    """
+    Pritaiko scaler statistiką duomenims, kuriuose trūkstamos reikšmės užpildytos vidurkiu
+
+    partial_fit praleidžia NaN, o užpildytos reikšmės (lygios vidurkiui) nekeičia vidurkio,
+    tik sumažina dispersiją: var' = var * n_reikšmių / n_eilučių.
+    """
+    seen = np.broadcast_to(np.asarray(scaler.n_samples_seen_, dtype=np.float64), scaler.var_.shape)
+    scaler.var_ = scaler.var_ * seen / n_rows
+    scale = np.sqrt(scaler.var_)
+    scale[scale == 0] = 1.0
+    scaler.scale_ = scale
+    scaler.n_samples_seen_ = np.int64(n_rows)
+    return scaler
+
+
+class StreamMetrics:
+    """Metrikos, kaupiamos dalimis: klaidų matrica (slenkstis 0.5) ir tikimybių histogramos ROC-AUC"""
+    def __init__(self, bins=AUC_BINS):
+        self.bins = bins
+        self.cm = np.zeros((2, 2), dtype=np.int64)
+        self.histograms = np.zeros((2, bins), dtype=np.int64)
+
+    def update(self, y, proba):
+        predicted = (proba > 0.5).astype(np.int64)
+        np.add.at(self.cm, (y, predicted), 1)
+        bin_index = np.minimum((proba * self.bins).astype(np.int64), self.bins - 1)
+        for label in (0, 1):
+            self.histograms[label] += np.bincount(bin_index[y == label], minlength=self.bins)
+
+    def roc_auc(self):
+        """ROC-AUC iš histogramų (tame pačiame intervale esančios poros skaičiuojamos kaip pusė)"""
+        negatives, positives = self.histograms
+        if negatives.sum() == 0 or positives.sum() == 0:
+            return float('nan')
+        negatives_below = np.cumsum(negatives) - negatives
+        pairs = (positives * (negatives_below + 0.5 * negatives)).sum()
+        return float(pairs / (positives.sum() * negatives.sum()))
+
+    def result(self):
+        (tn, fp), (fn, tp) = self.cm
+        total = self.cm.sum()
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        return {
+            'accuracy': float((tp + tn) / total) if total else float('nan'),
+            'recall': float(recall),
+            'f1': float(f1),
+            'roc_auc': self.roc_auc(),
+            'rows': int(total),
+        }
+
+
+def _balanced_weights(class_counts):
+    """class_weight='balanced' svoriai pagal visų treniravimo eilučių klasių dažnius"""
+    return class_counts.sum() / (len(class_counts) * np.maximum(class_counts, 1))
+
+
+def train_out_of_core(data_file='data/students_data.csv', chunk_size=DEFAULT_CHUNK_SIZE,
+                      sample_rows=DEFAULT_SAMPLE_ROWS, memory_budget_mb=None, holdout=0.2, epochs=3,
+                      seed=42, n_jobs=1, profile_memory=False, save=True):
+    """
+    Trenruoja visus tris modelius dalimis skaitomais duomenimis
+
+    Args:
+        chunk_size: kiek eilučių skaitoma vienu metu
+        sample_rows: rezervuarinės imties dydis medžių modeliams (pusė kiekvienai klasei)
+        memory_budget_mb: jei nurodyta, chunk_size ir sample_rows apskaičiuojami iš šios ribos
+        holdout: testavimo eilučių dalis
+        epochs: SGD praėjimų per treniravimo duomenis skaičius
+        save: išsaugoti modelius (kaip train_model.py) ir rezultatus
+
+    Returns:
+        dict modelio pavadinimas -> metrikos, 'stage_timings' ir 'config'
+    """
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.tree import DecisionTreeClassifier
+    from sklearn.ensemble import RandomForestClassifier
+
+    if memory_budget_mb is not None:
+        chunk_size, sample_rows = budget_sizes(memory_budget_mb)
+    config = {'chunk_size': chunk_size, 'sample_rows': sample_rows, 'holdout': holdout, 'epochs': epochs,
+              'seed': seed}
+    feature_columns = get_feature_columns()
+    n_features = len(feature_columns)
+    classes = np.array([0, 1])
+    rng = np.random.default_rng(seed)
+    profiler = StageProfiler(trace_memory=profile_memory)
+
+    print("=" * 60)
+    print("TRENIRAVIMAS DALIMIS")
+    print("=" * 60)
+    print(f"Dalies dydis: {chunk_size} eil., imtis medžiams: {sample_rows} eil., testavimui: {holdout:.0%}")
+
+    # 1 praėjimas: scaler statistika, klasių dažniai ir imtys
+    profiler.begin('scan')
+    print("\n1. Skaičiuojama statistika ir renkamos imtys...")
+    scaler = StandardScaler()
+    class_counts = np.zeros(len(classes), dtype=np.int64)
+    reservoirs = [ReservoirSample(sample_rows // len(classes), n_features, rng) for _ in classes]
+    holdout_rows = 0
+    for X, y, test_mask in iter_chunks(data_file, feature_columns, chunk_size, holdout, seed):
+        holdout_rows += int(test_mask.sum())
+        X, y = X[~test_mask], y[~test_mask]
+        if len(y) == 0:
+            continue
+        scaler.partial_fit(X)
+        class_counts += np.bincount(y, minlength=len(classes))
+        for label, reservoir in zip(classes, reservoirs):
+            reservoir.add(X[y == label])
+
+    train_rows = int(class_counts.sum())
+    if train_rows == 0 or (class_counts == 0).any():
+        raise ValueError("Treniravimo duomenyse turi būti abi klasės")
+    finalize_scaler(scaler, train_rows)
+    means = scaler.mean_
+    print(f"   Treniravimo eilučių: {train_rows} (rizikos grupė: {class_counts[1]} "
+          f"({class_counts[1] / train_rows * 100:.1f}%)), testavimo: {holdout_rows}")
+
+    def prepare(X):
+        """Trūkstamos reikšmės - treniravimo vidurkiai, tada normalizavimas"""
+        X = np.where(np.isnan(X), means, X)
+        return scaler.transform(X)
+
+    # Medžių modeliai: subalansuota imtis
+    sample_X = np.concatenate([reservoir.values() for reservoir in reservoirs])
+    sample_y = np.concatenate([np.full(reservoir.size, label) for label, reservoir in zip(classes, reservoirs)])
+    del reservoirs
+    sample_X_raw = np.where(np.isnan(sample_X), means, sample_X)
+    sample_X = scaler.transform(sample_X_raw)
+    print(f"   Imtis medžiams: {len(sample_y)} eil. (rizikos grupė: {int(sample_y.sum())})")
+
+    models = {
+        # alpha = 1 / (C * n) atitinka LogisticRegression(C=0.1) reguliarizavimą (train_model.py)
+        'Logistic Regression': SGDClassifier(loss='log_loss', alpha=1 / (LOGISTIC_C * train_rows), random_state=seed),
+        'Decision Tree': DecisionTreeClassifier(
+            random_state=42, max_depth=6, min_samples_split=10, min_samples_leaf=5, class_weight='balanced'
+        ),
+        'Random Forest': RandomForestClassifier(
+            n_estimators=100, random_state=42, max_depth=6, min_samples_split=10, min_samples_leaf=5,
+            max_features='sqrt', class_weight='balanced', n_jobs=n_jobs
+        ),
+    }
+    print("\n2. Treniruojami medžių modeliai su imtimi...")
+    for model_name in ('Decision Tree', 'Random Forest'):
+        profiler.begin(f'fit[{model_name}]')
+        models[model_name].fit(sample_X, sample_y)
+        print(f"   {model_name}: ištreniruota")
+    del sample_X, sample_y
+
+    # SGD: kiekviena epocha - vienas praėjimas per treniravimo eilutes
+    print(f"\n3. Treniruojama logistinė regresija (SGD, {epochs} epochos)...")
+    sgd = models['Logistic Regression']
+    class_weights = _balanced_weights(class_counts)
+    for epoch in range(epochs):
+        profiler.begin(f'sgd_epoch[{epoch + 1}]')
+        for X, y, test_mask in iter_chunks(data_file, feature_columns, chunk_size, holdout, seed):
+            X, y = X[~test_mask], y[~test_mask]
+            if len(y) == 0:
+                continue
+            order = rng.permutation(len(y))
+            sgd.partial_fit(prepare(X[order]), y[order], classes=classes, sample_weight=class_weights[y[order]])
+        print(f"   Epocha {epoch + 1}/{epochs} baigta")
+
+    # Vertinimas testavimo eilučių srautu
+    profiler.begin('evaluate')
+    print("\n4. Vertinama su testavimo eilutėmis...")
+    stream_metrics = {model_name: StreamMetrics() for model_name in models}
+    for X, y, test_mask in iter_chunks(data_file, feature_columns, chunk_size, holdout, seed):
+        if not test_mask.any():
+            continue
+        X_test = prepare(X[test_mask])
+        for model_name, model in models.items():
+            stream_metrics[model_name].update(y[test_mask], model.predict_proba(X_test)[:, 1])
+
+    results = {}
+    for model_name, metrics in stream_metrics.items():
+        results[model_name] = metrics.result()
+        print(f"\n{model_name}:")
+        print(f"  Accuracy:  {results[model_name]['accuracy']:.4f}")
+        print(f"  Recall:    {results[model_name]['recall']:.4f}")
+        print(f"  F1 Score:  {results[model_name]['f1']:.4f}")
+        print(f"  ROC-AUC:   {results[model_name]['roc_auc']:.4f}")
+
+    if save:
+        profiler.begin('save')
+        print("\n5. Išsaugomi modeliai...")
+        X_check = pd.DataFrame(sample_X_raw[:1000], columns=feature_columns)
+        saved_models = {model_name.lower().replace(' ', '_'): model for model_name, model in models.items()}
+        best_model_name = max(models, key=lambda model_name: results[model_name]['recall'])
+        save_bundle(saved_models, scaler, feature_columns, means,
+                    best_model=best_model_name.lower().replace(' ', '_'),
+                    metadata={'data_file': data_file, 'rows': train_rows, 'trainer': 'out_of_core_training'})
+        for model_file, model in saved_models.items():
+            save_model_arrays(model, scaler, model_file)
+            max_diff = export_fused_logistic(model, scaler, model_file, X_check)
+            if max_diff is None and os.path.exists(fused_artifact_path(model_file)):
+                os.remove(fused_artifact_path(model_file))
+        registry.invalidate(list(saved_models))
+
+        pd.DataFrame({
+            'feature': feature_columns,
+            'importance': models['Random Forest'].feature_importances_
+        }).sort_values('importance', ascending=False).to_csv('models/feature_importance.csv', index=False)
+        save_confusion_matrices({model_name: metrics.cm for model_name, metrics in stream_metrics.items()})
+        pd.DataFrame({
+            'Modelis': list(results),
+            'Accuracy': [results[m]['accuracy'] for m in results],
+            'Recall': [results[m]['recall'] for m in results],
+            'F1 Score': [results[m]['f1'] for m in results],
+            'ROC-AUC': [results[m]['roc_auc'] for m in results],
+        }).to_csv(COMPARISON_FILE, index=False)
+    profiler.finish()
+
+    print("\n" + "=" * 60)
+    print("ETAPŲ TRUKMĖ")
+    print("=" * 60)
+    profiler.print_report()
+    if save:
+        profiler.save(PROFILE_FILE, data_file=data_file, train_rows=train_rows, holdout_rows=holdout_rows, **config)
+    results['stage_timings'] = profiler.summary()
+    results['config'] = config
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Modelių treniravimas dalimis (dideliems duomenų failams)")
+    parser.add_argument('data_file', nargs='?', default='data/students_data.csv')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--sample-rows', type=int, default=DEFAULT_SAMPLE_ROWS,
+                        help="Rezervuarinės imties dydis medžių modeliams")
+    parser.add_argument('--memory-mb', type=float, default=None,
+                        help="Atminties riba (MB): chunk-size ir sample-rows apskaičiuojami automatiškai")
+    parser.add_argument('--holdout', type=float, default=0.2, help="Testavimo eilučių dalis")
+    parser.add_argument('--epochs', type=int, default=3, help="SGD praėjimų skaičius")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--n-jobs', type=int, default=1)
+    parser.add_argument('--profile-memory', action='store_true', help="Matuoti etapų atmintį su tracemalloc")
+    args = parser.parse_args()
+
+    try:
+        train_out_of_core(args.data_file, args.chunk_size, args.sample_rows, args.memory_mb, args.holdout,
+                          args.epochs, args.seed, args.n_jobs, args.profile_memory)
+    except FileNotFoundError:
+        print(f"\nKlaida: Nerastas failas {args.data_file}")
+        sys.exit(1)
@@ -1,9 +1,21 @@
 """
 Prognozavimo funkcijos
 """
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-from utils import load_model, interpret_prediction, get_feature_columns
+from utils import interpret_prediction, interpret_risk_levels, get_feature_columns, RISK_THRESHOLD
+from model_registry import get_model, warm
+from explanations import evaluate_reason_code, evaluate_reason_codes, render_reasons
+from prediction_cache import PredictionCache, quantize_features
+from metrics import PREDICTIONS, PREDICTION_ERRORS, CACHE_LOOKUPS, STAGE_LATENCY, BATCH_ROWS
+
+# Vienodiems požymių vektoriams (Streamlit įvestys diskrečios) modelis nevykdomas iš naujo
+prediction_cache = PredictionCache(maxsize=4096)
 
 def predict_student_risk(student_data, model_name='random_forest'):
     """
@@ -16,36 +28,56 @@ def predict_student_risk(student_data, model_name='random_forest'):
     Returns:
         dict su prognozės rezultatais
     """
-    # Įkeliame modelį
-    model, scaler = load_model(model_name)
+    # Etapų trukmės registruojamos metrics modulyje
+    started = time.perf_counter()
     
-    # Paruošiame duomenis
-    if isinstance(student_data, dict):
-        df = pd.DataFrame([student_data])
-    else:
-        df = student_data.copy()
+    # Įkeliame modelį (iš registro, diskas skaitomas tik pasikeitus failams)
+    loaded = get_model(model_name)
+    stage_start = time.perf_counter()
+    STAGE_LATENCY.observe(stage_start - started, model_name, 'model_load')
     
     # Užtikriname, kad visi požymiai yra
     feature_columns = get_feature_columns()
     
-    # Patikriname ar visi stulpeliai yra
-    missing_cols = [col for col in feature_columns if col not in df.columns]
-    if missing_cols:
-        raise ValueError(f"Trūksta stulpelių: {missing_cols}")
-    
-    X = df[feature_columns]
-    
-    # Užpildome trūkstamas reikšmes (jei yra)
-    X = X.fillna(X.mean())
-    
-    # Normalizuojame
-    X_scaled = scaler.transform(X)
-    
-    # Prognozuojame
-    probability = model.predict_proba(X_scaled)[0]
+    # Tikriname talpyklą (raktas: modelis, jo versija ir požymių reikšmės)
+    cache_key = None
+    if isinstance(student_data, dict) and all(col in student_data for col in feature_columns):
+        features = quantize_features(student_data[col] for col in feature_columns)
+        if features is not None:
+            cache_key = (model_name, loaded.version, features)
+    probability = prediction_cache.get(cache_key) if cache_key is not None else None
+    CACHE_LOOKUPS.inc(model_name, 'hit' if probability is not None else 'miss')
+    
+    if probability is None:
+        # Paruošiame duomenis
+        if isinstance(student_data, dict):
+            df = pd.DataFrame([student_data])
+        else:
+            df = student_data.copy()
+        
+        # Patikriname ar visi stulpeliai yra
+        missing_cols = [col for col in feature_columns if col not in df.columns]
+        if missing_cols:
+            PREDICTION_ERRORS.inc(model_name)
+            raise ValueError(f"Trūksta stulpelių: {missing_cols}")
+        
+        X = df[feature_columns]
+        
+        # Užpildome trūkstamas reikšmes treniravimo vidurkiais (jei yra)
+        X = loaded.impute(X)
+        now = time.perf_counter()
+        STAGE_LATENCY.observe(now - stage_start, model_name, 'prepare')
+        stage_start = now
+        
+        # Normalizuojame ir prognozuojame (greitas variklis medžių modeliams)
+        probability = loaded.predict_proba(X, fast=True)[0]
+        now = time.perf_counter()
+        STAGE_LATENCY.observe(now - stage_start, model_name, 'inference')
+        
+        if cache_key is not None:
+            prediction_cache.put(cache_key, probability)
     
     # Sumažintas slenkstis rizikos grupei (30%) - modelis jautresnis rizikai
-    RISK_THRESHOLD = 0.30
     prediction = 1 if probability[1] >= RISK_THRESHOLD else 0
     
     # Interpretuojame rezultatą (perduodame rizikos tikimybę)
@@ -56,135 +88,180 @@ def predict_student_risk(student_data, model_name='random_forest'):
     result['probability_risk'] = probability[1]
     
     # Pridedame paaiškinimą KODĖL
-    result['reasons'] = explain_prediction(student_data, model, feature_columns)
+    stage_start = time.perf_counter()
+    result['reasons'] = explain_prediction(student_data)
+    finished = time.perf_counter()
+    STAGE_LATENCY.observe(finished - stage_start, model_name, 'explain')
+    STAGE_LATENCY.observe(finished - started, model_name, 'total')
+    PREDICTIONS.inc(model_name, result['risk_level'])
     
     return result
 
-def predict_academic_performance(student_data):
+# Akademinės sėkmės prognozės numatytosios reikšmės, jei požymio nėra
+PERFORMANCE_DEFAULTS = {
+    'studiju_vidurkis': 7,
+    'savarankisko_mokymosi_val': 10,
+    'lankomumas_proc': 85,
+    'streso_lygis': 3,
+    'miego_valandos': 7,
+    'darbo_valandos': 20
+}
+
+def predict_academic_performance_frame(df):
     """
-    Prognozuoja akademinę sėkmę (pažymių prognozė)
+    Prognozuoja akademinę sėkmę (pažymių prognozė) visam DataFrame
+    
+    Returns:
+        DataFrame su stulpeliais current_avg, predicted_avg, diff, trend, color
     """
-    # Skaičiuojame akademinį indeksą
-    current_avg = student_data.get('studiju_vidurkis', 7)
-    study_hours = student_data.get('savarankisko_mokymosi_val', 10)
-    attendance = student_data.get('lankomumas_proc', 85)
-    stress = student_data.get('streso_lygis', 3)
-    sleep = student_data.get('miego_valandos', 7)
-    work_hours = student_data.get('darbo_valandos', 20)
+    def column(name):
+        if name in df.columns:
+            return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float)
+        return np.full(len(df), float(PERFORMANCE_DEFAULTS[name]))
     
-    # Prognozuojame vidurkį
-    predicted_avg = current_avg
+    current_avg = column('studiju_vidurkis')
+    study_hours = column('savarankisko_mokymosi_val')
+    attendance = column('lankomumas_proc')
+    stress = column('streso_lygis')
+    sleep = column('miego_valandos')
+    work_hours = column('darbo_valandos')
+    
+    # Prognozuojame vidurkį (ta pati pridėjimo tvarka kaip ir anksčiau)
+    predicted_avg = current_avg.copy()
     
     # Teigiami faktoriai
-    if study_hours >= 10:
-        predicted_avg += 0.5
-    elif study_hours >= 7:
-        predicted_avg += 0.2
-    
-    if attendance >= 90:
-        predicted_avg += 0.3
-    elif attendance >= 80:
-        predicted_avg += 0.1
-    elif attendance < 70:
-        predicted_avg -= 0.4
-    
-    if sleep >= 7:
-        predicted_avg += 0.2
-    elif sleep < 6:
-        predicted_avg -= 0.3
+    predicted_avg += np.select([study_hours >= 10, study_hours >= 7], [0.5, 0.2], 0.0)
+    predicted_avg += np.select([attendance >= 90, attendance >= 80, attendance < 70], [0.3, 0.1, -0.4], 0.0)
+    predicted_avg += np.select([sleep >= 7, sleep < 6], [0.2, -0.3], 0.0)
     
     # Neigiami faktoriai
-    if stress >= 4:
-        predicted_avg -= 0.4
-    elif stress >= 3:
-        predicted_avg -= 0.2
-    
-    if work_hours > 30:
-        predicted_avg -= 0.5
-    elif work_hours > 20:
-        predicted_avg -= 0.2
+    predicted_avg += np.select([stress >= 4, stress >= 3], [-0.4, -0.2], 0.0)
+    predicted_avg += np.select([work_hours > 30, work_hours > 20], [-0.5, -0.2], 0.0)
     
     # Ribojame 1-10
-    predicted_avg = max(1, min(10, predicted_avg))
+    predicted_avg = np.clip(predicted_avg, 1, 10)
     
     # Nustatome tendenciją
     diff = predicted_avg - current_avg
-    if diff > 0.3:
-        trend = "📈 GERĖS"
+    improving = diff > 0.3
+    declining = diff < -0.3
+    
+    return pd.DataFrame({
+        'current_avg': current_avg,
+        'predicted_avg': predicted_avg,
+        'diff': diff,
+        'trend': np.select([improving, declining], ["📈 GERĖS", "📉 BLOGĖS"], "➡️ STABILŪS"),
+        'color': np.select([improving, declining], ["success", "error"], "info")
+    }, index=df.index)
+
+def predict_academic_performance(student_data):
+    """
+    Prognozuoja akademinę sėkmę (pažymių prognozė)
+    """
+    row = predict_academic_performance_frame(pd.DataFrame([student_data])).iloc[0]
+    diff = row['diff']
+    
+    if row['color'] == "success":
         trend_msg = f"Pažymiai turėtų pagerėti ~{diff:.1f} balo"
-        color = "success"
-    elif diff < -0.3:
-        trend = "📉 BLOGĖS"
+    elif row['color'] == "error":
         trend_msg = f"Pažymiai gali pablogėti ~{abs(diff):.1f} balo"
-        color = "error"
     else:
-        trend = "➡️ STABILŪS"
         trend_msg = "Pažymiai išliks panašūs"
-        color = "info"
     
     return {
-        'current_avg': current_avg,
-        'predicted_avg': predicted_avg,
-        'trend': trend,
+        'current_avg': student_data.get('studiju_vidurkis', PERFORMANCE_DEFAULTS['studiju_vidurkis']),
+        'predicted_avg': row['predicted_avg'],
+        'trend': row['trend'],
         'trend_msg': trend_msg,
-        'color': color,
+        'color': row['color'],
         'diff': diff
     }
 
-def explain_prediction(student_data, model, feature_columns):
+def explain_prediction(student_data, model=None, feature_columns=None):
     """
     Paaiškina kodėl studentas rizikos/nerizikos grupėje
-    """
-    reasons = []
-    
-    # Gauname feature importance
-    if hasattr(model, 'feature_importances_'):
-        importance = dict(zip(feature_columns, model.feature_importances_))
-        top_features = sorted(importance.items(), key=lambda x: x[1], reverse=True)[:5]
-    
-    # Analizuojame kiekvieną požymį
-    if student_data.get('lankomumas_proc', 100) < 70:
-        reasons.append(f"❌ Žemas lankomumas ({student_data['lankomumas_proc']:.0f}%)")
-    elif student_data.get('lankomumas_proc', 0) >= 90:
-        reasons.append(f"✅ Aukštas lankomumas ({student_data['lankomumas_proc']:.0f}%)")
-    
-    if student_data.get('streso_lygis', 1) >= 4:
-        reasons.append(f"❌ Aukštas streso lygis ({student_data['streso_lygis']}/5)")
-    elif student_data.get('streso_lygis', 5) <= 2:
-        reasons.append(f"✅ Žemas streso lygis ({student_data['streso_lygis']}/5)")
     
-    if student_data.get('miego_valandos', 8) < 6:
-        reasons.append(f"❌ Per mažai miega ({student_data['miego_valandos']:.0f}h)")
-    elif student_data.get('miego_valandos', 0) >= 7:
-        reasons.append(f"✅ Pakankamas miegas ({student_data['miego_valandos']:.0f}h)")
-    
-    if student_data.get('darbo_valandos', 0) > 30:
-        reasons.append(f"❌ Daug dirba ({student_data['darbo_valandos']:.0f}h/savaitę)")
-    elif student_data.get('darbo_valandos', 40) <= 15:
-        reasons.append(f"✅ Nedaug dirba ({student_data['darbo_valandos']:.0f}h/savaitę)")
-    
-    if student_data.get('savarankisko_mokymosi_val', 20) < 5:
-        reasons.append(f"❌ Mažai mokosi savarankiškai ({student_data['savarankisko_mokymosi_val']:.0f}h/savaitę)")
-    elif student_data.get('savarankisko_mokymosi_val', 0) >= 10:
-        reasons.append(f"✅ Daug mokosi savarankiškai ({student_data['savarankisko_mokymosi_val']:.0f}h/savaitę)")
-    
-    avg_exam = (student_data.get('brandos_egzaminas_1', 0) + 
-                student_data.get('brandos_egzaminas_2', 0) + 
-                student_data.get('brandos_egzaminas_3', 0)) / 3
-    if avg_exam > 0 and avg_exam < 60:
-        reasons.append(f"❌ Žemi brandos egzaminų balai ({avg_exam:.0f})")
-    elif avg_exam >= 75:
-        reasons.append(f"✅ Geri brandos egzaminų balai ({avg_exam:.0f})")
+    Taisyklės aprašytos explanations.REASON_RULES lentelėje.
+    """
+    return render_reasons(evaluate_reason_code(student_data), student_data)
+
+def predict_frame(df, model_name='random_forest', chunk_size=50000, with_reasons=False,
+                  return_features=False):
+    """
+    Vektorizuotai prognozuoja visiems DataFrame studentams
     
-    if student_data.get('finansinis_stresas', 1) >= 4:
-        reasons.append(f"❌ Aukštas finansinis stresas ({student_data['finansinis_stresas']}/5)")
+    Stulpeliai tikrinami vieną kartą, matrica normalizuojama ir predict_proba
+    kviečiamas po vieną kartą kiekvienam chunk_size eilučių blokui.
+    Eilutės su netinkamomis reikšmėmis pažymimos 'ERROR'. Eilutėse su trūkstamomis
+    reikšmėmis jos užpildomos treniravimo vidurkiais; jei vidurkiai nežinomi ir modelis
+    trūkstamų reikšmių nepalaiko, eilutės taip pat pažymimos 'ERROR'.
+    Jei with_reasons=True, pridedamas stulpelis reason_codes (žr. explanations.render_reasons).
     
-    if not reasons:
-        reasons.append("ℹ️ Visi rodikliai vidutiniški")
+    Returns:
+        DataFrame su stulpeliais index, prediction, risk_level, confidence, probability_risk;
+        jei return_features=True - (rezultatai, skaitiniai požymiai), pvz. paaiškinimų tekstams
+    """
+    feature_columns = get_feature_columns()
+    missing_cols = [col for col in feature_columns if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Trūksta stulpelių: {missing_cols}")
     
-    return reasons
+    raw = df[feature_columns]
+    X = raw.apply(pd.to_numeric, errors='coerce')
+    values = X.to_numpy(dtype=float)
+    is_nan = np.isnan(values)
+    # Netinkama reikšmė: buvo pateikta, bet nėra skaičius, arba begalybė
+    invalid = (is_nan & raw.notna().to_numpy()) | np.isinf(values)
+    valid = ~invalid.any(axis=1)
+    has_missing = is_nan.any(axis=1) & valid
+    
+    probability_risk = np.zeros(len(df))
+    complete_idx = np.flatnonzero(valid & ~has_missing)
+    missing_idx = np.flatnonzero(has_missing)
+    if len(complete_idx) > 0 or len(missing_idx) > 0:
+        loaded = get_model(model_name)
+        started = time.perf_counter()
+        for start in range(0, len(complete_idx), chunk_size):
+            rows = complete_idx[start:start + chunk_size]
+            probability_risk[rows] = loaded.predict_proba(X.iloc[rows])[:, 1]
+        for start in range(0, len(missing_idx), chunk_size):
+            rows = missing_idx[start:start + chunk_size]
+            try:
+                probability_risk[rows] = loaded.predict_proba(loaded.impute(X.iloc[rows]))[:, 1]
+            except ValueError:
+                # Modelis nepalaiko trūkstamų reikšmių
+                valid[rows] = False
+        STAGE_LATENCY.observe(time.perf_counter() - started, model_name, 'batch_inference')
+    
+    prediction = pd.array(np.where(probability_risk >= RISK_THRESHOLD, 1, 0), dtype='Int64')
+    prediction[~valid] = pd.NA
+    risk_level = interpret_risk_levels(probability_risk)
+    risk_level[~valid] = 'ERROR'
+    
+    BATCH_ROWS.observe(len(df), model_name)
+    for level, count in zip(*np.unique(risk_level, return_counts=True)):
+        if level == 'ERROR':
+            PREDICTION_ERRORS.inc(model_name, amount=int(count))
+        else:
+            PREDICTIONS.inc(model_name, str(level), amount=int(count))
+    
+    results_df = pd.DataFrame({
+        'index': df.index,
+        'prediction': prediction,
+        'risk_level': risk_level,
+        'confidence': probability_risk * 100,
+        'probability_risk': probability_risk
+    })
+    
+    if with_reasons:
+        results_df['reason_codes'] = evaluate_reason_codes(X)
+    
+    if return_features:
+        return results_df, X
+    return results_df
 
-def predict_batch(data_file, model_name='random_forest', output_file='predictions.csv'):
+def predict_batch(data_file, model_name='random_forest', output_file='predictions.csv', chunk_size=50000,
+                  with_reasons=False):
     """
     Prognozuoja keliems studentams iš CSV failo
     """
@@ -193,29 +270,15 @@ def predict_batch(data_file, model_name='random_forest', output_file='prediction
     
     print(f"Prognozuojama {len(df)} studentams...")
     
-    predictions = []
-    for idx, row in df.iterrows():
-        try:
-            result = predict_student_risk(row.to_dict(), model_name)
-            predictions.append({
-                'index': idx,
-                'prediction': result['prediction'],
-                'risk_level': result['risk_level'],
-                'confidence': result['confidence'],
-                'probability_risk': result['probability_risk']
-            })
-        except Exception as e:
-            print(f"Klaida eilutėje {idx}: {e}")
-            predictions.append({
-                'index': idx,
-                'prediction': None,
-                'risk_level': 'ERROR',
-                'confidence': 0,
-                'probability_risk': 0
-            })
+    results_df = predict_frame(df, model_name, chunk_size=chunk_size, with_reasons=with_reasons)
+    
+    bad_rows = results_df.loc[results_df['risk_level'] == 'ERROR', 'index']
+    if len(bad_rows) > 0:
+        shown = ', '.join(str(idx) for idx in bad_rows[:10])
+        more = f" ir dar {len(bad_rows) - 10}" if len(bad_rows) > 10 else ""
+        print(f"Klaida eilutėse (trūksta arba netinkamos reikšmės): {shown}{more}")
     
     # Išsaugome rezultatus
-    results_df = pd.DataFrame(predictions)
     results_df.to_csv(output_file, index=False)
     
     print(f"\nPrognozės išsaugotos: {output_file}")
@@ -224,6 +287,176 @@ def predict_batch(data_file, model_name='random_forest', output_file='prediction
     
     return results_df
 
+def _read_checkpoint(checkpoint_file, output_file, data_file, model_name):
+    """Nuskaito srautinio prognozavimo būseną, jei ji atitinka tą patį įvesties failą"""
+    if not os.path.exists(checkpoint_file) or not os.path.exists(output_file):
+        return None
+    with open(checkpoint_file, encoding='utf-8') as f:
+        state = json.load(f)
+    if state.get('data_file') != os.path.abspath(data_file) or state.get('model_name') != model_name:
+        return None
+    return state
+
+def _write_checkpoint(checkpoint_file, state):
+    """Atomiškai įrašo srautinio prognozavimo būseną"""
+    tmp_file = checkpoint_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_file, checkpoint_file)
+
+def predict_batch_stream(data_file, model_name='random_forest', output_file='predictions.csv',
+                         chunk_size=100000, resume=False, with_reasons=False):
+    """
+    Prognozuoja dideliam CSV failui dalimis (ribota atmintis)
+    
+    Įvestis skaitoma po chunk_size eilučių, kiekviena dalis prognozuojama ir iškart
+    pridedama prie output_file. Po kiekvienos dalies įrašoma būsena į
+    output_file + '.progress.json', todėl su resume=True galima tęsti nuo
+    paskutinės pilnai įrašytos dalies.
+    
+    Returns:
+        dict su apdorotų eilučių, rizikos ir klaidų skaičiais
+    """
+    checkpoint_file = output_file + '.progress.json'
+    state = _read_checkpoint(checkpoint_file, output_file, data_file, model_name) if resume else None
+    
+    if state is not None:
+        print(f"Tęsiama nuo eilutės {state['rows_done']} ({state['chunks_done']} dalys jau atliktos)")
+        # Pašaliname neužbaigtos dalies eilutes, jei jos spėjo būti įrašytos
+        with open(output_file, 'r+b') as f:
+            f.truncate(state['output_bytes'])
+    else:
+        state = {
+            'data_file': os.path.abspath(data_file),
+            'model_name': model_name,
+            'rows_done': 0,
+            'chunks_done': 0,
+            'output_bytes': 0,
+            'risk': 0,
+            'no_risk': 0,
+            'errors': 0
+        }
+        open(output_file, 'w').close()
+    
+    print(f"Srautinis prognozavimas iš {data_file} (po {chunk_size} eilučių)...")
+    skiprows = range(1, state['rows_done'] + 1) if state['rows_done'] else None
+    reader = pd.read_csv(data_file, chunksize=chunk_size, skiprows=skiprows)
+    
+    for chunk in reader:
+        chunk.index = pd.RangeIndex(state['rows_done'], state['rows_done'] + len(chunk))
+        results_df = predict_frame(chunk, model_name, chunk_size=chunk_size, with_reasons=with_reasons)
+        
+        with open(output_file, 'a', encoding='utf-8', newline='') as f:
+            results_df.to_csv(f, index=False, header=state['output_bytes'] == 0)
+            f.flush()
+            os.fsync(f.fileno())
+            state['output_bytes'] = f.tell()
+        
+        state['rows_done'] += len(chunk)
+        state['chunks_done'] += 1
+        state['risk'] += int((results_df['prediction'] == 1).sum())
+        state['no_risk'] += int((results_df['prediction'] == 0).sum())
+        state['errors'] += int((results_df['risk_level'] == 'ERROR').sum())
+        _write_checkpoint(checkpoint_file, state)
+        print(f"   Apdorota eilučių: {state['rows_done']}")
+    
+    if os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+    
+    print(f"\nPrognozės išsaugotos: {output_file}")
+    print(f"Rizikos grupė: {state['risk']} studentų")
+    print(f"Nerizikos grupė: {state['no_risk']} studentų")
+    if state['errors']:
+        print(f"Klaidingų eilučių: {state['errors']}")
+    
+    return {
+        'rows': state['rows_done'],
+        'risk': state['risk'],
+        'no_risk': state['no_risk'],
+        'errors': state['errors']
+    }
+
+_worker_model_name = None
+_worker_with_reasons = False
+
+def _init_scoring_worker(model_name, with_reasons=False):
+    """Proceso inicializacija: modelis įkeliamas vieną kartą kiekvienam darbininkui"""
+    global _worker_model_name, _worker_with_reasons
+    _worker_model_name = model_name
+    _worker_with_reasons = with_reasons
+    warm(model_name)
+
+def _score_shard(shard):
+    """Prognozuoja vieną duomenų dalį darbininko procese"""
+    start = time.perf_counter()
+    results_df = predict_frame(shard, _worker_model_name, chunk_size=max(len(shard), 1),
+                               with_reasons=_worker_with_reasons)
+    return os.getpid(), time.perf_counter() - start, results_df
+
+def predict_batch_parallel(data_file, model_name='random_forest', output_file='predictions.csv',
+                           n_workers=None, shard_size=50000, with_reasons=False):
+    """
+    Prognozuoja CSV failą lygiagrečiai keliuose procesuose
+    
+    Įvestis skaidoma į shard_size eilučių dalis, kurios prognozuojamos procesų
+    telkinyje (kiekvienas procesas modelį įkelia vieną kartą). Rezultatai
+    įrašomi originalia tvarka; vienu metu apdorojama ne daugiau kaip
+    2 * n_workers dalių, todėl atmintis išlieka ribota.
+    
+    Returns:
+        dict su bendra statistika ir kiekvieno darbininko laikais
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    print(f"Lygiagretus prognozavimas iš {data_file} ({n_workers} procesai, po {shard_size} eilučių)...")
+    
+    start = time.perf_counter()
+    workers = {}
+    totals = {'rows': 0, 'risk': 0, 'no_risk': 0, 'errors': 0}
+    pending = deque()
+    header = True
+    
+    def write_next(out):
+        nonlocal header
+        pid, elapsed, results_df = pending.popleft().result()
+        results_df.to_csv(out, index=False, header=header)
+        header = False
+        stats = workers.setdefault(pid, {'shards': 0, 'rows': 0, 'seconds': 0.0})
+        stats['shards'] += 1
+        stats['rows'] += len(results_df)
+        stats['seconds'] += elapsed
+        totals['rows'] += len(results_df)
+        totals['risk'] += int((results_df['prediction'] == 1).sum())
+        totals['no_risk'] += int((results_df['prediction'] == 0).sum())
+        totals['errors'] += int((results_df['risk_level'] == 'ERROR').sum())
+    
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_scoring_worker,
+                             initargs=(model_name, with_reasons)) as executor, \
+            open(output_file, 'w', encoding='utf-8', newline='') as out:
+        offset = 0
+        for shard in pd.read_csv(data_file, chunksize=shard_size):
+            shard.index = pd.RangeIndex(offset, offset + len(shard))
+            offset += len(shard)
+            pending.append(executor.submit(_score_shard, shard))
+            if len(pending) >= 2 * n_workers:
+                write_next(out)
+        while pending:
+            write_next(out)
+    
+    wall_time = time.perf_counter() - start
+    
+    print(f"\nPrognozės išsaugotos: {output_file}")
+    print(f"Rizikos grupė: {totals['risk']} studentų")
+    print(f"Nerizikos grupė: {totals['no_risk']} studentų")
+    if totals['errors']:
+        print(f"Klaidingų eilučių: {totals['errors']}")
+    print(f"Laikas: {wall_time:.2f} s ({totals['rows'] / wall_time:.0f} eilučių/s)")
+    print("Darbininkų laikai:")
+    for pid, stats in sorted(workers.items()):
+        print(f"   PID {pid}: {stats['shards']} dalys, {stats['rows']} eilučių, "
+              f"{stats['seconds']:.2f} s ({stats['rows'] / max(stats['seconds'], 1e-9):.0f} eilučių/s)")
+    
+    return {**totals, 'seconds': wall_time, 'workers': workers}
+
 if __name__ == "__main__":
     # Pavyzdys kaip naudoti
     print("Prognozavimo modulis paruoštas.")
@@ -0,0 +1,81 @@
+"""
+Prognozių talpykla
+Vienodiems požymių vektoriams modelis nevykdomas pakartotinai
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+def quantize_features(values, decimals=6):
+    """
+    Grąžina apvalintų požymių reikšmių tuple raktui arba None, jei reikšmė netinkama
+
+    Apvalinama, kad pvz. 7.499999999 ir 7.5 (slankiojo kablelio paklaida) sutaptų.
+    """
+    key = []
+    for value in values:
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        if math.isnan(value):
+            return None
+        key.append(round(value, decimals))
+    return tuple(key)
+
+
+class PredictionCache:
+    """
+    Ribota LRU talpykla su nebūtinu galiojimo laiku (TTL)
+
+    Raktas - (modelio pavadinimas, modelio versija, požymių reikšmės), todėl
+    pertreniravus modelį senos reikšmės nebenaudojamos.
+    """
+    def __init__(self, maxsize=4096, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Grąžina išsaugotą reikšmę arba None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Išsaugo reikšmę; viršijus dydį išmetamas seniausiai naudotas įrašas"""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Išvalo talpyklą (statistika lieka)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Grąžina pataikymų statistiką"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / total if total else 0.0
+            }
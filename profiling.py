@@ -0,0 +1,142 @@
+"""
+Etapų profiliavimas
+Kiekvienam etapui matuojamas sienos laikas, procesoriaus laikas ir atmintis:
+- max_rss_mb - viso proceso RSS pikas iki etapo pabaigos (tik didėja);
+- rss_growth_mb - kiek etapas padidino proceso RSS piką;
+- peak_traced_mb - etapo Python atminties pikas (tik su tracemalloc).
+"""
+import contextlib
+import json
+import os
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _max_rss_mb():
+    """Didžiausias proceso RSS nuo paleidimo (MB) arba None, jei nepalaikoma"""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux grąžina KB, macOS - baitais
+    return max_rss / (1024 * 1024) if os.uname().sysname == 'Darwin' else max_rss / 1024
+
+
+class StageProfiler:
+    """
+    Renka etapų trukmes ir atminties naudojimą
+
+    Naudojimas:
+        profiler = StageProfiler(trace_memory=True)
+        profiler.begin('load')          # ankstesnis etapas baigiamas automatiškai
+        ...
+        with profiler.stage('fit'):
+            ...
+        profiler.end()
+    """
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = []
+        self._current = None
+        self._started_tracing = False
+
+    def begin(self, name):
+        """Pradeda naują etapą (jei vyksta kitas etapas, jis baigiamas)"""
+        self.end()
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+        self._current = (name, time.perf_counter(), time.process_time(), _max_rss_mb())
+
+    def end(self):
+        """Baigia vykstantį etapą ir įrašo jo matavimus"""
+        if self._current is None:
+            return
+        name, wall_start, cpu_start, rss_start = self._current
+        max_rss = _max_rss_mb()
+        stage = {
+            'stage': name,
+            'wall_s': time.perf_counter() - wall_start,
+            'cpu_s': time.process_time() - cpu_start,
+            'max_rss_mb': max_rss,
+            'rss_growth_mb': max_rss - rss_start if max_rss is not None else None,
+        }
+        if self.trace_memory and tracemalloc.is_tracing():
+            stage['peak_traced_mb'] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        self.stages.append(stage)
+        self._current = None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Etapas kaip with blokas"""
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end()
+
+    def finish(self):
+        """Baigia paskutinį etapą ir sustabdo tracemalloc, jei jį paleido šis profiliuotojas"""
+        self.end()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def summary(self):
+        """
+        Returns:
+            dict etapas -> matavimai (pasikartojantys etapai sumuojami, atmintis - didžiausia)
+        """
+        summary = {}
+        for stage in self.stages:
+            total = summary.setdefault(stage['stage'], {'wall_s': 0.0, 'cpu_s': 0.0, 'calls': 0})
+            total['wall_s'] += stage['wall_s']
+            total['cpu_s'] += stage['cpu_s']
+            total['calls'] += 1
+            for key in ('max_rss_mb', 'rss_growth_mb', 'peak_traced_mb'):
+                if stage.get(key) is not None:
+                    total[key] = max(total.get(key, 0.0), stage[key])
+        return summary
+
+    def save(self, path, **metadata):
+        """Išsaugo etapų matavimus JSON faile"""
+        report = {
+            **metadata,
+            'trace_memory': self.trace_memory,
+            'total_wall_s': sum(stage['wall_s'] for stage in self.stages),
+            'total_cpu_s': sum(stage['cpu_s'] for stage in self.stages),
+            'stages': self.stages,
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+    def print_report(self):
+        """
+        Atspausdina etapų lentelę
+
+        "Etapo atmintis" - etapo tracemalloc pikas, be tracemalloc - kiek etapas
+        padidino proceso RSS piką (+); "Proceso pikas" - viso proceso RSS pikas.
+        """
+        total_wall = sum(stage['wall_s'] for stage in self.stages) or 1.0
+        print(f"{'Etapas':<40} {'Laikas, s':>10} {'CPU, s':>8} {'Dalis':>7} "
+              f"{'Etapo atmintis, MB':>19} {'Proceso pikas, MB':>18}")
+        for stage in self.stages:
+            if stage.get('peak_traced_mb') is not None:
+                stage_memory = f"{stage['peak_traced_mb']:.1f}"
+            elif stage['rss_growth_mb'] is not None:
+                stage_memory = f"+{stage['rss_growth_mb']:.1f}"
+            else:
+                stage_memory = "-"
+            process_peak = f"{stage['max_rss_mb']:.1f}" if stage['max_rss_mb'] is not None else "-"
+            print(f"{stage['stage']:<40} {stage['wall_s']:>10.3f} {stage['cpu_s']:>8.3f} "
+                  f"{stage['wall_s'] / total_wall * 100:>6.1f}% {stage_memory:>19} {process_peak:>18}")
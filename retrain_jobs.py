@@ -0,0 +1,411 @@
+"""
+Pertreniravimo užduočių eilė
+Užduotys saugomos SQLite lentelėje retrain_jobs (queued -> running -> done / failed),
+jas vykdo vienas foninis darbuotojas: train_model.py paleidžiamas atskirame procese,
+jo išvestis rašoma į žurnalo failą, kurį vartotojo sąsaja gali skaityti bet kada.
+
+- vienodi įkėlimai (tas pats turinys) sujungiami į vieną užduotį;
+- visos laukiančios užduotys įvykdomos vienu treniravimu;
+- vienu metu vykdoma tik viena užduotis (tikrinama duomenų bazėje, todėl
+  ir tarp kelių procesų);
+- vykdomos užduoties darbuotojas kas HEARTBEAT_SECONDS atnaujina heartbeat_at;
+  užduotis, kurios heartbeat senesnis nei LEASE_SECONDS, laikoma nutrūkusia, nebent
+  ją paėmęs procesas šiame kompiuteryje dar veikia;
+- darbuotojas, kurio užduotis buvo perimta, sustabdo savo treniravimą, todėl
+  du treniravimai tais pačiais failais nesutampa;
+- visi keliai skaičiuojami nuo programos katalogo, ne nuo darbinio katalogo.
+
+Naudojimas:
+    python retrain_jobs.py worker          # darbuotojas (kol nesustabdomas)
+    python retrain_jobs.py worker --once   # įvykdo laukiančias užduotis ir baigia
+    python retrain_jobs.py submit nauji.csv
+    python retrain_jobs.py status
+"""
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import pandas as pd
+from database import init_database
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(SCRIPT_DIR, 'students.db')
+JOBS_DIR = os.path.join(SCRIPT_DIR, 'models', 'retrain_jobs')
+TRAINING_DATA_FILE = os.path.join(SCRIPT_DIR, 'data', 'students_data.csv')
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+ACTIVE_STATUSES = ('queued', 'running')
+POLL_SECONDS = 2.0
+HEARTBEAT_SECONDS = 10.0
+# Po tiek sekundžių be heartbeat vykdoma užduotis laikoma nutrūkusia
+LEASE_SECONDS = 120.0
+
+_worker_thread = None
+_worker_lock = threading.Lock()
+# Šiame procese dabar vykdomų užduočių id
+_running_job_ids = set()
+_table_ready = False
+
+
+def _connect():
+    """Prisijungimas prie duomenų bazės (lentelė sukuriama pirmą kartą)"""
+    global _table_ready
+    if not _table_ready:
+        init_database(DB_PATH)
+        _table_ready = True
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _job_dict(row):
+    job = dict(row)
+    job['result'] = json.loads(job['result']) if job.get('result') else None
+    return job
+
+
+def submit_retrain_job(upload_df):
+    """
+    Įtraukia pertreniravimo užduotį į eilę
+
+    Jei toks pat įkėlimas jau laukia ar vykdomas, nauja užduotis nekuriama.
+
+    Args:
+        upload_df: nauji išvalyti įrašai (požymiai + ketinu_mesti_studijas)
+
+    Returns:
+        dict su job_id ir coalesced (True - prijungta prie esamos užduoties)
+    """
+    content = upload_df.to_csv(index=False).encode('utf-8')
+    data_hash = hashlib.sha256(content).hexdigest()
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    upload_path = os.path.join(JOBS_DIR, f'upload_{data_hash[:16]}.csv')
+    if not os.path.exists(upload_path):
+        tmp_path = f'{upload_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, upload_path)
+
+    conn = _connect()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        row = conn.execute(
+            'SELECT id FROM retrain_jobs WHERE data_hash = ? AND status IN (?, ?) ORDER BY id LIMIT 1',
+            (data_hash, *ACTIVE_STATUSES)
+        ).fetchone()
+        if row is not None:
+            conn.execute('COMMIT')
+            return {'job_id': row['id'], 'coalesced': True}
+        cursor = conn.execute(
+            'INSERT INTO retrain_jobs (status, data_hash, upload_path, rows) VALUES (?, ?, ?, ?)',
+            ('queued', data_hash, upload_path, len(upload_df))
+        )
+        conn.execute('COMMIT')
+        return {'job_id': cursor.lastrowid, 'coalesced': False}
+    finally:
+        conn.close()
+
+
+def get_job(job_id):
+    """Returns: užduoties dict arba None"""
+    conn = _connect()
+    try:
+        row = conn.execute('SELECT * FROM retrain_jobs WHERE id = ?', (job_id,)).fetchone()
+    finally:
+        conn.close()
+    return _job_dict(row) if row is not None else None
+
+
+def list_jobs(limit=20):
+    """Paskutinės užduotys (naujausios pirmos)"""
+    conn = _connect()
+    try:
+        rows = conn.execute('SELECT * FROM retrain_jobs ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+    finally:
+        conn.close()
+    return [_job_dict(row) for row in rows]
+
+
+def job_log_tail(job, max_chars=3000):
+    """Paskutiniai užduoties žurnalo simboliai (tuščia eilutė, jei žurnalo dar nėra)"""
+    log_path = job.get('log_path') if job else None
+    if not log_path or not os.path.exists(log_path):
+        return ''
+    with open(log_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - max_chars * 4))
+        return f.read().decode('utf-8', errors='replace')[-max_chars:]
+
+
+def _process_alive(pid):
+    """Ar šio kompiuterio procesas dar veikia (Windows ir POSIX)"""
+    if os.name == 'nt':
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            # ERROR_ACCESS_DENIED - procesas yra, bet priklauso kitam naudotojui
+            return kernel32.GetLastError() == 5
+        try:
+            exit_code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+            return exit_code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _worker_alive(job):
+    """Ar užduotį paėmęs procesas dar ją vykdo (kitame kompiuteryje - nežinoma, False)"""
+    if job['worker_host'] != socket.gethostname() or job['worker_pid'] is None:
+        return False
+    if job['worker_pid'] == os.getpid():
+        return job['id'] in _running_job_ids
+    return _process_alive(job['worker_pid'])
+
+
+def fail_stale_jobs(conn, now=None):
+    """
+    Vykdomas užduotis, kurių heartbeat pasibaigęs (darbuotojas nutrūko), pažymi kaip nepavykusias
+
+    Užduotis nepažymima, jei ją paėmęs procesas šiame kompiuteryje dar veikia
+    (pvz. heartbeat praleisti, nes duomenų bazė buvo užimta).
+    """
+    deadline = (time.time() if now is None else now) - LEASE_SECONDS
+    rows = conn.execute(
+        'SELECT id, worker_pid, worker_host FROM retrain_jobs '
+        'WHERE status = ? AND (heartbeat_at IS NULL OR heartbeat_at < ?)',
+        ('running', deadline)
+    ).fetchall()
+    stale = [(row['id'],) for row in rows if not _worker_alive(row)]
+    conn.executemany(
+        'UPDATE retrain_jobs SET status = ?, error = ?, finished_at = CURRENT_TIMESTAMP '
+        'WHERE id = ? AND status = ?',
+        [('failed', 'Darbuotojo procesas nutrūko', job_id, 'running') for job_id, in stale]
+    )
+    return len(stale)
+
+
+def _heartbeat(jobs):
+    """
+    Atnaujina vykdomų užduočių heartbeat (tik jei užduotis vis dar šio proceso)
+
+    Returns:
+        atnaujintų užduočių skaičius (0 - užduotys perimtos kito darbuotojo)
+    """
+    conn = _connect()
+    try:
+        updated = 0
+        for job in jobs:
+            updated += conn.execute(
+                'UPDATE retrain_jobs SET heartbeat_at = ? '
+                'WHERE id = ? AND status = ? AND worker_pid = ? AND worker_host = ?',
+                (time.time(), job['id'], 'running', os.getpid(), socket.gethostname())
+            ).rowcount
+        return updated
+    finally:
+        conn.close()
+
+
+def claim_jobs():
+    """
+    Paima visas laukiančias užduotis vykdymui
+
+    Returns:
+        sąrašas užduočių (tuščias, jei laukiančių nėra arba kita užduotis jau vykdoma)
+    """
+    conn = _connect()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        fail_stale_jobs(conn)
+        running = conn.execute('SELECT COUNT(*) FROM retrain_jobs WHERE status = ?', ('running',)).fetchone()[0]
+        jobs = [] if running else conn.execute(
+            'SELECT * FROM retrain_jobs WHERE status = ? ORDER BY id', ('queued',)).fetchall()
+        if jobs:
+            log_path = os.path.join(JOBS_DIR, f"job_{jobs[0]['id']}.log")
+            conn.executemany(
+                'UPDATE retrain_jobs SET status = ?, worker_pid = ?, worker_host = ?, log_path = ?, '
+                'heartbeat_at = ?, started_at = CURRENT_TIMESTAMP WHERE id = ?',
+                [('running', os.getpid(), socket.gethostname(), log_path, time.time(), job['id'])
+                 for job in jobs]
+            )
+        conn.execute('COMMIT')
+    finally:
+        conn.close()
+    return [get_job(job['id']) for job in jobs]
+
+
+def _finish_jobs(jobs, status, error=None, result=None):
+    conn = _connect()
+    try:
+        conn.executemany(
+            'UPDATE retrain_jobs SET status = ?, error = ?, result = ?, finished_at = CURRENT_TIMESTAMP '
+            'WHERE id = ?',
+            [(status, error, json.dumps(result) if result is not None else None, job['id']) for job in jobs]
+        )
+    finally:
+        conn.close()
+
+
+def run_jobs(jobs):
+    """
+    Įvykdo užduotis vienu treniravimu: esami duomenys + visi įkėlimai
+
+    Pavykus sujungti duomenys įrašomi į TRAINING_DATA_FILE (data/students_data.csv).
+
+    Returns:
+        'done' arba 'failed'
+    """
+    start = time.perf_counter()
+    log_path = jobs[0]['log_path']
+    batch_file = os.path.join(JOBS_DIR, f"batch_{jobs[0]['id']}.csv")
+    _running_job_ids.update(job['id'] for job in jobs)
+    try:
+        frames = [pd.read_csv(TRAINING_DATA_FILE)] if os.path.exists(TRAINING_DATA_FILE) else []
+        frames += [pd.read_csv(job['upload_path']) for job in jobs]
+        combined_df = pd.concat(frames, ignore_index=True).drop_duplicates()
+        combined_df.to_csv(batch_file, index=False)
+
+        with open(log_path, 'w', encoding='utf-8') as log_file:
+            log_file.write(f"Užduotys: {', '.join(str(job['id']) for job in jobs)}; "
+                           f"treniravimo įrašų: {len(combined_df)}\n")
+            log_file.flush()
+            process = subprocess.Popen(
+                [sys.executable, 'train_model.py', os.path.abspath(batch_file), '--plots', 'skip'],
+                cwd=SCRIPT_DIR, stdout=log_file, stderr=subprocess.STDOUT,
+                env={**os.environ, 'PYTHONUNBUFFERED': '1'}
+            )
+            while True:
+                try:
+                    process.wait(timeout=HEARTBEAT_SECONDS)
+                    break
+                except subprocess.TimeoutExpired:
+                    try:
+                        owned = _heartbeat(jobs)
+                    except sqlite3.Error:
+                        # Praleistas heartbeat nepavojingas: kol procesas veikia, užduotis neperimama
+                        continue
+                    if not owned:
+                        process.kill()
+                        process.wait()
+                        raise RuntimeError("Užduotis perimta kito darbuotojo, treniravimas sustabdytas")
+        if process.returncode != 0:
+            raise RuntimeError(f"train_model.py baigėsi su kodu {process.returncode}")
+
+        os.makedirs(os.path.dirname(TRAINING_DATA_FILE), exist_ok=True)
+        os.replace(batch_file, TRAINING_DATA_FILE)
+        result = {'total_rows': len(combined_df), 'jobs': [job['id'] for job in jobs],
+                  'seconds': round(time.perf_counter() - start, 2)}
+        _finish_jobs(jobs, 'done', result=result)
+        for job in jobs:
+            if os.path.exists(job['upload_path']):
+                os.remove(job['upload_path'])
+        return 'done'
+    except Exception as e:
+        _finish_jobs(jobs, 'failed', error=str(e))
+        return 'failed'
+    finally:
+        _running_job_ids.difference_update(job['id'] for job in jobs)
+        if os.path.exists(batch_file):
+            os.remove(batch_file)
+
+
+def run_pending_jobs():
+    """
+    Įvykdo laukiančias užduotis (jei kita užduotis nevykdoma)
+
+    Returns:
+        įvykdytų užduočių skaičius
+    """
+    jobs = claim_jobs()
+    if jobs:
+        run_jobs(jobs)
+    return len(jobs)
+
+
+def worker_loop(poll_seconds=POLL_SECONDS, once=False, stop_event=None):
+    """
+    Darbuotojo ciklas: periodiškai tikrina eilę ir vykdo užduotis
+
+    Klaida (pvz. užrakinta duomenų bazė) ciklo nesustabdo: ji atspausdinama,
+    paimtos užduotys pažymimos kaip nepavykusios ir eilė tikrinama toliau.
+    """
+    while stop_event is None or not stop_event.is_set():
+        jobs = []
+        try:
+            jobs = claim_jobs()
+            if jobs:
+                run_jobs(jobs)
+            processed = len(jobs)
+        except Exception as e:
+            import traceback
+
+            print(f"Pertreniravimo darbuotojo klaida: {e}")
+            traceback.print_exc()
+            if jobs:
+                try:
+                    _finish_jobs(jobs, 'failed', error=str(e))
+                except Exception:
+                    # Nepavykus pažymėti, užduotys bus pažymėtos pasibaigus heartbeat (fail_stale_jobs)
+                    pass
+            processed = 0
+        if once and not processed:
+            return
+        if not processed:
+            time.sleep(poll_seconds)
+
+
+def ensure_worker():
+    """
+    Paleidžia foninį darbuotoją šiame procese (jei dar nepaleistas)
+
+    Returns:
+        threading.Thread
+    """
+    global _worker_thread
+    with _worker_lock:
+        if _worker_thread is None or not _worker_thread.is_alive():
+            _worker_thread = threading.Thread(target=worker_loop, name='retrain-worker', daemon=True)
+            _worker_thread.start()
+    return _worker_thread
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pertreniravimo užduočių eilė")
+    commands = parser.add_subparsers(dest='command', required=True)
+    worker_parser = commands.add_parser('worker', help="Paleisti darbuotoją")
+    worker_parser.add_argument('--once', action='store_true', help="Įvykdyti laukiančias užduotis ir baigti")
+    worker_parser.add_argument('--poll', type=float, default=POLL_SECONDS)
+    submit_parser = commands.add_parser('submit', help="Įtraukti CSV failą į eilę")
+    submit_parser.add_argument('csv_file')
+    commands.add_parser('status', help="Paskutinės užduotys")
+    args = parser.parse_args(argv)
+
+    if args.command == 'worker':
+        worker_loop(args.poll, once=args.once)
+    elif args.command == 'submit':
+        submission = submit_retrain_job(pd.read_csv(args.csv_file))
+        state = "prijungta prie esamos užduoties" if submission['coalesced'] else "įtraukta į eilę"
+        print(f"Užduotis {submission['job_id']}: {state}")
+    else:
+        for job in list_jobs():
+            print(f"{job['id']:>5} {job['status']:<8} įrašų: {job['rows']:<6} "
+                  f"pateikta: {job['submitted_at']} baigta: {job['finished_at'] or '-'} {job['error'] or ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
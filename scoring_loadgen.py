@@ -0,0 +1,99 @@
+"""
+Apkrovos generatorius prognozavimo serveriui
+Matuoja pralaidumą ir vėlinimo procentilius (p50, p95, p99)
+
+Naudojimas:
+    python scoring_server.py
+    python scoring_loadgen.py --concurrency 32 --requests 5000
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+import numpy as np
+import pandas as pd
+from utils import get_feature_columns
+
+
+def load_payloads(data_file='data/students_data.csv'):
+    """Paruošia užklausų turinį iš duomenų failo"""
+    df = pd.read_csv(data_file)[get_feature_columns()].dropna()
+    return [json.dumps(row).encode('utf-8') for row in df.to_dict(orient='records')]
+
+
+def run_load(host='127.0.0.1', port=8000, concurrency=16, total_requests=2000,
+             path='/predict', data_file='data/students_data.csv'):
+    """
+    Siunčia užklausas iš concurrency gijų (kiekviena su keep-alive jungtimi)
+
+    Returns:
+        dict su pralaidumu, vėlinimo procentiliais ir klaidų skaičiumi
+    """
+    payloads = load_payloads(data_file)
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    per_client = total_requests // concurrency
+
+    def client(client_id):
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        local = []
+        local_errors = 0
+        for i in range(per_client):
+            body = payloads[(client_id * per_client + i) % len(payloads)]
+            start = time.perf_counter()
+            try:
+                conn.request('POST', path, body=body, headers={'Content-Type': 'application/json'})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    local_errors += 1
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                continue
+            local.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_time = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'seconds': wall_time,
+        'throughput_rps': len(latencies) / wall_time if wall_time else 0.0,
+        'p50_ms': float(np.percentile(latencies_ms, 50)) if len(latencies_ms) else None,
+        'p95_ms': float(np.percentile(latencies_ms, 95)) if len(latencies_ms) else None,
+        'p99_ms': float(np.percentile(latencies_ms, 99)) if len(latencies_ms) else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prognozavimo serverio apkrovos testas")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    stats = run_load(args.host, args.port, args.concurrency, args.requests)
+    print("=" * 60)
+    print("APKROVOS TESTO REZULTATAI")
+    print("=" * 60)
+    print(f"Užklausų: {stats['requests']} (klaidų: {stats['errors']})")
+    print(f"Laikas: {stats['seconds']:.2f} s")
+    print(f"Pralaidumas: {stats['throughput_rps']:.0f} užklausų/s")
+    if stats['p50_ms'] is not None:
+        print(f"Vėlinimas: p50 {stats['p50_ms']:.2f} ms, p95 {stats['p95_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms")
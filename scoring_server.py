@@ -0,0 +1,297 @@
+"""
+Vietinis HTTP/JSON prognozavimo serveris
+Vienu metu gautos pavienės užklausos sujungiamos į mažus paketus (micro-batching),
+todėl modelis vykdomas vieną kartą per paketą
+
+Galiniai taškai:
+    GET  /health          - serverio ir modelio būsena
+    POST /predict         - vienas studentas (JSON objektas)
+    POST /predict/batch   - keli studentai ({"students": [...]} arba JSON masyvas)
+    GET  /metrics         - metrikos Prometheus formatu (?format=json - JSON)
+"""
+import argparse
+import asyncio
+import json
+import time
+import pandas as pd
+from predict import predict_frame
+from explanations import render_reasons
+from model_registry import warm
+from metrics import registry as metrics_registry
+from utils import get_feature_columns, interpret_prediction
+
+MAX_BODY_BYTES = 50 * 1024 * 1024
+
+REQUEST_LATENCY = metrics_registry.histogram(
+    'http_request_seconds', 'HTTP užklausų apdorojimo trukmė sekundėmis', ['path', 'status'])
+MICRO_BATCH_SIZE = metrics_registry.histogram(
+    'micro_batch_size', 'Užklausų skaičius viename micro-batch pakete', [],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+
+
+def score_students(students, model_name='random_forest'):
+    """
+    Prognozuoja studentų sąrašą vienu predict_frame kvietimu
+
+    Returns:
+        sąrašas dict, kurių formatas atitinka predict_student_risk rezultatą
+    """
+    df = pd.DataFrame(students)
+    results_df, X = predict_frame(df, model_name, with_reasons=True, return_features=True)
+
+    results = []
+    # Paaiškinimų tekstams - skaitinės reikšmės ("95" -> 95.0), ne pradinis JSON
+    for values, row in zip(X.to_dict('records'), results_df.itertuples(index=False)):
+        if row.risk_level == 'ERROR':
+            results.append({'risk_level': 'ERROR', 'error': 'Trūksta arba netinkamos reikšmės'})
+            continue
+        probability_risk = float(row.probability_risk)
+        prediction = int(row.prediction)
+        result = interpret_prediction(prediction, probability_risk, risk_probability=probability_risk)
+        result['probability_no_risk'] = 1.0 - probability_risk
+        result['probability_risk'] = probability_risk
+        result['reasons'] = render_reasons(row.reason_codes, values)
+        results.append(result)
+    return results
+
+
+class MicroBatcher:
+    """
+    Renka pavienes užklausas į paketus
+
+    Paketas vykdomas, kai surenkama max_batch_size užklausų arba praeina
+    max_wait_ms nuo pirmos paketo užklausos.
+    """
+    def __init__(self, model_name='random_forest', max_batch_size=64, max_wait_ms=5.0):
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.requests = 0
+
+    async def submit(self, student):
+        """Įdeda studentą į eilę ir laukia jo prognozės"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((student, future))
+        return await future
+
+    async def _collect(self):
+        """Surenka vieną paketą iš eilės"""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        """Paketų vykdymo ciklas"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            students = [student for student, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, score_students, students, self.model_name)
+            except Exception:
+                # Vienas blogas įrašas neturi sugadinti viso paketo: kiekvienas studentas atskirai
+                await self._run_each(batch)
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+            MICRO_BATCH_SIZE.observe(len(batch))
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+    async def _run_each(self, batch):
+        """Prognozuoja paketo studentus po vieną; klaida grąžinama tik jos užklausai"""
+        loop = asyncio.get_running_loop()
+        for student, future in batch:
+            try:
+                result = (await loop.run_in_executor(None, score_students, [student], self.model_name))[0]
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            if not future.done():
+                future.set_result(result)
+        self.batches += 1
+        self.requests += len(batch)
+        MICRO_BATCH_SIZE.observe(len(batch))
+
+
+class ScoringServer:
+    """
+    Minimalus HTTP/1.1 serveris ant asyncio (palaiko keep-alive)
+    """
+    def __init__(self, model_name='random_forest', max_batch_size=64, max_wait_ms=5.0):
+        self.model_name = model_name
+        self.batcher = MicroBatcher(model_name, max_batch_size, max_wait_ms)
+        self.feature_columns = get_feature_columns()
+        self.started_at = time.time()
+
+    async def handle_health(self, body, query=''):
+        """GET /health"""
+        loaded = warm(self.model_name)[0]
+        return 200, {
+            'status': 'ok',
+            'model': self.model_name,
+            'model_type': type(loaded.model if loaded.model is not None else loaded.engine).__name__,
+            'uptime_s': round(time.time() - self.started_at, 1),
+            'requests_batched': self.batcher.requests,
+            'batches': self.batcher.batches,
+            'avg_batch_size': self.batcher.requests / self.batcher.batches if self.batcher.batches else 0.0
+        }
+
+    async def handle_predict(self, body, query=''):
+        """POST /predict - vienas studentas, sujungiamas į paketą su kitais"""
+        student = json.loads(body)
+        if not isinstance(student, dict):
+            return 400, {'error': 'Tikimasi JSON objekto'}
+        missing_cols = [col for col in self.feature_columns if col not in student]
+        if missing_cols:
+            return 400, {'error': f"Trūksta stulpelių: {missing_cols}"}
+        return 200, await self.batcher.submit(student)
+
+    async def handle_predict_batch(self, body, query=''):
+        """POST /predict/batch - visas sąrašas prognozuojamas vienu kvietimu"""
+        payload = json.loads(body)
+        students = payload.get('students') if isinstance(payload, dict) else payload
+        if not isinstance(students, list) or not all(isinstance(s, dict) for s in students):
+            return 400, {'error': 'Tikimasi {"students": [...]} arba JSON masyvo'}
+        if not students:
+            return 200, {'results': []}
+        missing_cols = sorted({col for s in students for col in self.feature_columns if col not in s})
+        if missing_cols:
+            return 400, {'error': f"Trūksta stulpelių: {missing_cols}"}
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, score_students, students, self.model_name)
+        return 200, {'results': results}
+
+    async def handle_metrics(self, body, query=''):
+        """GET /metrics - Prometheus tekstas arba JSON (?format=json)"""
+        if 'format=json' in query:
+            return 200, metrics_registry.snapshot()
+        return 200, metrics_registry.to_prometheus()
+
+    def route(self, method, path):
+        """Grąžina užklausos apdorojimo funkciją"""
+        routes = {
+            ('GET', '/health'): self.handle_health,
+            ('POST', '/predict'): self.handle_predict,
+            ('POST', '/predict/batch'): self.handle_predict_batch,
+            ('GET', '/metrics'): self.handle_metrics,
+        }
+        return routes.get((method, path.split('?')[0]))
+
+    async def handle_connection(self, reader, writer):
+        """Apdoroja vieną TCP jungtį (gali būti kelios užklausos)"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'Bloga užklausa'}, keep_alive=False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0) or 0)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': 'Per didelė užklausa'}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+
+                started = time.perf_counter()
+                route_path, _, query = path.partition('?')
+                handler = self.route(method, path)
+                if handler is None:
+                    status, payload = 404, {'error': 'Nerastas adresas'}
+                else:
+                    try:
+                        status, payload = await handler(body, query)
+                    except json.JSONDecodeError:
+                        status, payload = 400, {'error': 'Netinkamas JSON'}
+                    except Exception as e:
+                        status, payload = 500, {'error': str(e)}
+
+                await self._respond(writer, status, payload, keep_alive)
+                REQUEST_LATENCY.observe(time.perf_counter() - started,
+                                        route_path if handler is not None else 'other', str(status))
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive=True):
+        """Išsiunčia JSON atsakymą (tekstas siunčiamas kaip text/plain)"""
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large',
+                   500: 'Internal Server Error'}
+        if isinstance(payload, str):
+            body = payload.encode('utf-8')
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            body = json.dumps(payload, ensure_ascii=False, default=float).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        head = (
+            f"HTTP/1.1 {status} {reasons.get(status, 'OK')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def serve(self, host='127.0.0.1', port=8000):
+        """Paleidžia serverį (modelis įkeliamas iš anksto)"""
+        warm(self.model_name)
+        batcher_task = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Prognozavimo serveris veikia: http://{host}:{port} (modelis: {self.model_name})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher_task.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vietinis prognozavimo serveris")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--model', default='random_forest')
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    server = ScoringServer(args.model, args.max_batch_size, args.max_wait_ms)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nServeris sustabdytas")
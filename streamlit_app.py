@@ -1,17 +1,22 @@
 """
 Streamlit UI aplikacija studentų rizikos prognozei
 """
-import contextlib
 import io
-import os
-import tempfile
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
 from predict import predict_student_risk, predict_academic_performance
-from utils import load_model, get_feature_columns
+from utils import clean_numeric_columns, get_feature_columns
+from metrics import latency_summary, PREDICTIONS
+from training_plots import ensure_confusion_matrix_plot
+from retrain_jobs import ACTIVE_STATUSES, ensure_worker, get_job, job_log_tail, submit_retrain_job
 from database import init_database, save_student, save_prediction, get_all_students, get_predictions_stats, get_untrained_students, mark_students_as_trained
-import joblib
+
+
+def plotly_graph_objects():
+    """plotly įkeliamas tik tada, kai piešiamas grafikas"""
+    import plotly.graph_objects as go
+    return go
+
 
 st.set_page_config(page_title="Studentų Rizikos Prognozė", layout="wide")
 
@@ -48,8 +53,8 @@ if 'step' not in st.session_state:
     st.session_state.step = 1
 if 'confirm_predict' not in st.session_state:
     st.session_state.confirm_predict = False
-if 'retrain_notice' not in st.session_state:
-    st.session_state.retrain_notice = None
+if 'retrain_job_id' not in st.session_state:
+    st.session_state.retrain_job_id = None
 
 # Sekvenciniai įvesties laukai
 lankomumas = st.sidebar.slider("1. Lankomumas (%)", 0, 100, 85, 5, key="lankomumas")
@@ -261,6 +266,7 @@ if proceed:
         
         with col2:
             # Tikimybių grafikas
+            go = plotly_graph_objects()
             fig = go.Figure(go.Bar(
                 x=[result['probability_no_risk']*100, result['probability_risk']*100],
                 y=['Nerizikos grupė', 'Rizikos grupė'],
@@ -279,6 +285,57 @@ if proceed:
     except Exception as e:
         st.error(f"❌ Klaida: {e}")
 
+def retrain_job_status(job_id):
+    """
+    Pertreniravimo užduoties būsena ir žurnalo pabaiga
+
+    Returns:
+        užduoties būsena arba None, jei užduoties nėra
+    """
+    job = get_job(job_id)
+    if job is None:
+        st.warning(f"Užduotis {job_id} nerasta")
+        return None
+    if job["status"] == "queued":
+        # Pvz. po serverio perkrovimo eilėje likusios užduotys vėl pradedamos vykdyti
+        ensure_worker()
+        st.info(f"⏳ Užduotis {job_id} laukia eilėje (įrašų: {job['rows']})")
+    elif job["status"] == "running":
+        st.info(f"🔄 Modelis treniruojamas fone (užduotis {job_id}, pradėta {job['started_at']})")
+    elif job["status"] == "done":
+        st.success("✅ Modelis sėkmingai pertreniruotas!")
+        if job["result"]:
+            st.info(f"Iš viso treniravimo duomenų: {job['result']['total_rows']}")
+    else:
+        st.error(f"❌ Pertreniruoti nepavyko: {job['error']}")
+    log_tail = job_log_tail(job)
+    if log_tail:
+        st.code(log_tail)
+    if job["status"] in ACTIVE_STATUSES and not hasattr(st, "fragment"):
+        st.button("🔄 Atnaujinti būseną", key="refresh_retrain_job")
+    return job["status"]
+
+
+def live_retrain_job_status(job_id):
+    """Vykdomos užduoties būsena; užduočiai pasibaigus vieną kartą perkraunamas visas puslapis"""
+    if retrain_job_status(job_id) not in ACTIVE_STATUSES:
+        st.rerun()
+
+
+# Naujesnėse Streamlit versijose vykdomos užduoties būsena atnaujinama automatiškai,
+# neperkraunant viso puslapio; pasibaigusi užduotis nebeatnaujinama
+if hasattr(st, "fragment"):
+    live_retrain_job_status = st.fragment(run_every=2)(live_retrain_job_status)
+
+
+def show_retrain_job(job_id):
+    """Rodo užduoties būseną: kol ji vykdoma - su automatiniu atnaujinimu"""
+    job = get_job(job_id)
+    if hasattr(st, "fragment") and job is not None and job["status"] in ACTIVE_STATUSES:
+        live_retrain_job_status(job_id)
+    else:
+        retrain_job_status(job_id)
+
 # Modelio analizė
 with st.expander("📈 Modelio analizė"):
     col_left, col_right = st.columns(2)
@@ -288,6 +345,7 @@ with st.expander("📈 Modelio analizė"):
         try:
             importance_df = pd.read_csv('models/feature_importance.csv')
             
+            go = plotly_graph_objects()
             fig2 = go.Figure(go.Bar(
                 x=importance_df['importance'],
                 y=importance_df['feature'],
@@ -306,10 +364,35 @@ with st.expander("📈 Modelio analizė"):
     with col_right:
         st.subheader("Confusion Matrix")
         try:
-            st.image('models/confusion_matrix_random_forest.png', use_container_width=True)
+            cm_path = ensure_confusion_matrix_plot('Random Forest')
+            if cm_path is None:
+                raise FileNotFoundError('models/confusion_matrices.json')
+            st.image(cm_path, use_container_width=True)
         except:
             st.info("Confusion matrix nepasiekiamas. Paleiskite train_model.py")
 
+# Prognozavimo vėlinimas (šio proceso metrikos)
+with st.expander("⏱️ Prognozavimo vėlinimas"):
+    latency_rows = latency_summary('random_forest')
+    if latency_rows:
+        total_row = next((row for row in latency_rows if row['stage'] == 'total'), None)
+        if total_row is not None:
+            col_p50, col_p99, col_count = st.columns(3)
+            with col_p50:
+                st.metric("p50", f"{total_row['p50_ms']:.2f} ms")
+            with col_p99:
+                st.metric("p99", f"{total_row['p99_ms']:.2f} ms")
+            with col_count:
+                st.metric("Prognozių", total_row['count'])
+        st.dataframe(pd.DataFrame(latency_rows).rename(columns={
+            'stage': 'Etapas', 'count': 'Kiekis', 'p50_ms': 'p50, ms', 'p99_ms': 'p99, ms'
+        }), hide_index=True)
+        risk_counts = {labels[1]: value for labels, value in PREDICTIONS.samples() if labels[0] == 'random_forest'}
+        if risk_counts:
+            st.write("Rizikos lygių pasiskirstymas:", risk_counts)
+    else:
+        st.info("Šiame seanse prognozių dar nebuvo")
+
 # Duomenų peržiūros skyrius
 with st.expander("📈 Duomenų bazės peržiūra"):
     if st.button("Rodyti visus įrašus"):
@@ -326,18 +409,10 @@ with st.expander("➕ Įkelti naujus duomenis ir pertreniruoti modelį"):
     Reikalingas stulpelis **ketinu_mesti_studijas** (1–5), nes iš jo sukuriamas tikslas (**rizika**: 1 jei 4–5, kitaip 0).
     """)
 
-    if st.session_state.retrain_notice:
-        notice = st.session_state.retrain_notice
-        if notice.get("type") == "success":
-            st.success(notice.get("message", "✅ Modelis sėkmingai pertreniruotas!"))
-            total_rows = notice.get("total_rows")
-            if total_rows is not None:
-                st.info(f"Iš viso treniravimo duomenų: {total_rows}")
-            log_tail = notice.get("log_tail")
-            if log_tail:
-                st.code(log_tail)
+    if st.session_state.retrain_job_id is not None:
+        show_retrain_job(st.session_state.retrain_job_id)
         if st.button("🗙 Paslėpti pranešimą", key="hide_retrain_notice"):
-            st.session_state.retrain_notice = None
+            st.session_state.retrain_job_id = None
             st.rerun()
 
     openpyxl_available = True
@@ -401,17 +476,7 @@ with st.expander("➕ Įkelti naujus duomenis ir pertreniruoti modelį"):
             if missing_cols:
                 st.error("❌ Trūksta stulpelių: " + ", ".join(missing_cols))
             else:
-                cleaned_df = normalized_uploaded_df.copy()
-                for col in template_columns:
-                    cleaned_df[col] = pd.to_numeric(
-                        cleaned_df[col]
-                        .astype(str)
-                        .str.replace("%", "")
-                        .str.replace("-", "")
-                        .str.replace("/", "")
-                        .str.replace(",", "."),
-                        errors="coerce",
-                    )
+                cleaned_df = clean_numeric_columns(normalized_uploaded_df.copy(), template_columns)
 
                 cleaned_df = cleaned_df.dropna(subset=["ketinu_mesti_studijas"])
 
@@ -421,46 +486,11 @@ with st.expander("➕ Įkelti naujus duomenis ir pertreniruoti modelį"):
                     st.info(f"Tinkamų treniravimui eilučių: {len(cleaned_df)}")
 
                     if st.button("🚀 Pertreniruoti modelį su įkeltais duomenimis", type="primary"):
-                        with st.spinner("Treniruojamas modelis..."):
-                            tmp_file_path = None
-                            try:
-                                os.makedirs("models", exist_ok=True)
-                                os.makedirs("data", exist_ok=True)
-
-                                if os.path.exists("data/students_data.csv"):
-                                    existing_df = pd.read_csv("data/students_data.csv")
-                                    combined_df = pd.concat([existing_df, cleaned_df], ignore_index=True)
-                                else:
-                                    combined_df = cleaned_df.copy()
-
-                                combined_df = combined_df.drop_duplicates()
-
-                                with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False, encoding="utf-8") as tmp:
-                                    tmp_file_path = tmp.name
-                                    combined_df.to_csv(tmp_file_path, index=False)
-
-                                from train_model import train_all_models
-
-                                logs_buffer = io.StringIO()
-                                with contextlib.redirect_stdout(logs_buffer):
-                                    train_all_models(tmp_file_path)
-
-                                combined_df.to_csv("data/students_data.csv", index=False)
-                                st.session_state.retrain_notice = {
-                                    "type": "success",
-                                    "message": "✅ Modelis sėkmingai pertreniruotas!",
-                                    "total_rows": len(combined_df),
-                                    "log_tail": logs_buffer.getvalue()[-3000:],
-                                }
-                                st.rerun()
-                            except Exception as e:
-                                st.error(f"❌ Pertreniruoti nepavyko: {e}")
-                            finally:
-                                try:
-                                    if tmp_file_path and os.path.exists(tmp_file_path):
-                                        os.remove(tmp_file_path)
-                                except Exception:
-                                    pass
+                        # Treniravimas vyksta fone - užduotis tik įtraukiama į eilę
+                        submission = submit_retrain_job(cleaned_df)
+                        ensure_worker()
+                        st.session_state.retrain_job_id = submission["job_id"]
+                        st.rerun()
 
 # Modelio pertreniravimas (UŽKOMENTUOTA)
 # with st.expander("🔄 Modelio pertreniravimas"):
@@ -0,0 +1,100 @@
+"""
+Masyvų formatas: memory mapping, versijos perjungimas aprašu ir senų versijų šalinimas
+"""
+import os
+import threading
+
+import numpy as np
+
+import array_store
+from array_store import (arrays_available, arrays_dir, load_model_arrays, manifest_path, save_model_arrays)
+from fast_inference import compile_model
+from utils import save_model
+
+
+def _versions(model_name):
+    return array_store._version_dirs(model_name)
+
+
+def test_round_trip_with_memory_mapping(trained_models):
+    X, scaler = trained_models['X'].to_numpy(), trained_models['scaler']
+    for name, model in trained_models['models'].items():
+        assert save_model_arrays(model, scaler, name)
+        engine = load_model_arrays(name)
+        np.testing.assert_array_equal(engine.predict_proba(X), compile_model(model, scaler).predict_proba(X))
+
+    forest = load_model_arrays('random_forest')
+    assert isinstance(forest.threshold, np.memmap)
+    assert not isinstance(load_model_arrays('random_forest', mmap=False).threshold, np.memmap)
+
+
+def test_manifest_switch_keeps_previous_version_readable(trained_models):
+    X, scaler, models = trained_models['X'].to_numpy(), trained_models['scaler'], trained_models['models']
+    save_model_arrays(models['random_forest'], scaler, 'random_forest')
+    old_engine = load_model_arrays('random_forest')
+    old_directory = array_store._read_manifest('random_forest')['directory']
+
+    # Tas pats pavadinimas, kitas modelis - aprašas perjungiamas į naują katalogą
+    save_model_arrays(models['decision_tree'], scaler, 'random_forest')
+
+    assert array_store._read_manifest('random_forest')['directory'] != old_directory
+    assert os.path.isdir(old_directory)
+    np.testing.assert_array_equal(old_engine.predict_proba(X),
+                                  compile_model(models['random_forest'], scaler).predict_proba(X))
+    np.testing.assert_array_equal(load_model_arrays('random_forest').predict_proba(X),
+                                  compile_model(models['decision_tree'], scaler).predict_proba(X))
+
+    save_model_arrays(models['random_forest'], scaler, 'random_forest')
+    assert not os.path.exists(old_directory)
+    assert len(_versions('random_forest')) == 1 + array_store.KEEP_OLD_VERSIONS
+    assert not any(name.endswith('.tmp') for name in os.listdir('models'))
+
+
+def test_unsupported_model_removes_active_version(trained_models):
+    from sklearn.neighbors import KNeighborsClassifier
+
+    X, y, scaler = trained_models['X'], trained_models['y'], trained_models['scaler']
+    save_model_arrays(trained_models['models']['decision_tree'], scaler, 'decision_tree')
+    os.makedirs(arrays_dir('decision_tree'))  # senojo formato katalogas
+
+    knn = KNeighborsClassifier().fit(scaler.transform(X), y)
+    assert not save_model_arrays(knn, scaler, 'decision_tree')
+
+    assert not os.path.exists(manifest_path('decision_tree'))
+    assert not os.path.exists(arrays_dir('decision_tree'))
+    assert not arrays_available('decision_tree')
+
+
+def test_newer_model_file_makes_arrays_stale(trained_models):
+    scaler, model = trained_models['scaler'], trained_models['models']['decision_tree']
+    save_model_arrays(model, scaler, 'decision_tree')
+    assert arrays_available('decision_tree')
+
+    save_model(model, scaler, 'decision_tree')
+    stat = os.stat(manifest_path('decision_tree'))
+    os.utime('models/decision_tree_model.pkl', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert not arrays_available('decision_tree')
+
+
+def test_reader_survives_concurrent_saves(trained_models):
+    scaler, models = trained_models['scaler'], trained_models['models']
+    save_model_arrays(models['decision_tree'], scaler, 'decision_tree')
+    errors = []
+    done = threading.Event()
+
+    def reader():
+        while not done.is_set():
+            try:
+                load_model_arrays('decision_tree').predict_proba(trained_models['X'].to_numpy()[:5])
+            except Exception as e:
+                errors.append(e)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    try:
+        for _ in range(15):
+            save_model_arrays(models['decision_tree'], scaler, 'decision_tree')
+    finally:
+        done.set()
+        thread.join()
+    assert errors == []
@@ -0,0 +1,58 @@
+"""
+cleaning.clean_numeric_series turi sutapti su ankstesne grandine (legacy_clean_numeric_series)
+
+Paleidimas:
+    python -m pytest -q test_cleaning.py
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from cleaning import clean_numeric_columns, clean_numeric_series, legacy_clean_numeric_series
+
+CASES = {
+    'int64': pd.Series([1, -2, 0, 300]),
+    'int8': pd.Series([1, -2, 0, 100], dtype='int8'),
+    'uint8': pd.Series([1, 2, 255], dtype='uint8'),
+    'uint64': pd.Series([1, 2, 2 ** 63], dtype='uint64'),
+    'float64': pd.Series([1.5, -2.25, 0.0, np.nan, 85.0]),
+    'float64_small': pd.Series([1e-05, -1e-05, 0.00012, -3.5e-07, 1e-4]),
+    'float64_large': pd.Series([1e16, -1.5e20, 123456789.0]),
+    'float64_inf': pd.Series([np.inf, -np.inf, 1.0]),
+    'float32': pd.Series([1.1, -2.5, np.nan, 0.1, 1e-05], dtype='float32'),
+    'float16': pd.Series([1.1, -2.5, np.nan], dtype='float16'),
+    'nullable_int': pd.Series([1, -2, None], dtype='Int64'),
+    'nullable_float': pd.Series([1.1, -2.5, None], dtype='Float64'),
+    'bool': pd.Series([True, False, True]),
+    'percent': pd.Series(['85%', '90 %', '100%']),
+    'comma': pd.Series(['7,5', '8,25', '9']),
+    'range': pd.Series(['2-3', '10-12', '-5']),
+    'slash': pd.Series(['1/2', '3/4']),
+    'garbage': pd.Series(['abc', '', ' ', 'nan', 'None']),
+    'strings_with_missing': pd.Series(['85%', None, '7,5', np.nan]),
+    'all_missing': pd.Series([None, None], dtype=object),
+    'empty': pd.Series([], dtype=object),
+    'mixed_object': pd.Series([1, '2,5', 3.5, None, True, False, '85%'], dtype=object),
+    'object_numbers': pd.Series([1, 2.5, -3], dtype=object),
+    'object_bools': pd.Series([True, 1, False, 0], dtype=object),
+    'category': pd.Series(['85%', '7,5', '85%'], dtype='category'),
+}
+
+
+@pytest.mark.parametrize('name', list(CASES))
+def test_matches_legacy_chain(name):
+    series = CASES[name].rename(name)
+    series.index = series.index * 3 + 1
+    pd.testing.assert_series_equal(clean_numeric_series(series), legacy_clean_numeric_series(series))
+
+
+def test_float32_keeps_text_value():
+    result = clean_numeric_series(pd.Series([1.1], dtype='float32'))
+    assert result.iloc[0] == 1.1
+
+
+def test_clean_numeric_columns_skips_missing_columns():
+    df = pd.DataFrame({'a': ['85%', '7,5'], 'b': ['x', 'y']})
+    clean_numeric_columns(df, ['a', 'nera'])
+    assert df['a'].tolist() == [85.0, 7.5]
+    assert df['b'].tolist() == ['x', 'y']
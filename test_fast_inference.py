@@ -0,0 +1,75 @@
+"""
+Greiti varikliai turi sutapti su sklearn grandine (scaler + predict_proba)
+"""
+import numpy as np
+import pytest
+
+from fast_inference import (CompiledForest, FusedLogistic, compile_model, export_fused_logistic,
+                            fused_artifact_path)
+
+
+@pytest.mark.parametrize('model_name', ['decision_tree', 'random_forest'])
+def test_compiled_forest_matches_sklearn(trained_models, model_name):
+    X, scaler = trained_models['X'], trained_models['scaler']
+    model = trained_models['models'][model_name]
+    engine = compile_model(model, scaler)
+
+    assert isinstance(engine, CompiledForest)
+    expected = model.predict_proba(scaler.transform(X))
+    np.testing.assert_allclose(engine.predict_proba(X.to_numpy()), expected, atol=1e-12)
+    np.testing.assert_allclose(engine.predict_proba(X.to_numpy()[0]), expected[:1], atol=1e-12)
+    # Blokais vertinama taip pat kaip visa matrica
+    np.testing.assert_allclose(engine.predict_proba(X.to_numpy(), block_size=7), expected, atol=1e-12)
+
+
+def test_compiled_forest_missing_values_match_sklearn(student_frame):
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y = student_frame
+    X = X.to_numpy().copy()
+    rng = np.random.default_rng(1)
+    X[rng.random(X.shape) < 0.1] = np.nan
+    model = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0).fit(X, y)
+
+    engine = CompiledForest.from_sklearn(model)
+    np.testing.assert_allclose(engine.predict_proba(X), model.predict_proba(X), atol=1e-12)
+
+
+def test_compiled_forest_round_trips_through_arrays(trained_models):
+    X, scaler = trained_models['X'], trained_models['scaler']
+    engine = compile_model(trained_models['models']['random_forest'], scaler)
+    arrays, params = engine.to_arrays()
+    restored = CompiledForest.from_arrays(arrays, params)
+    np.testing.assert_array_equal(restored.predict_proba(X.to_numpy()), engine.predict_proba(X.to_numpy()))
+
+
+def test_fused_logistic_matches_sklearn(trained_models):
+    X, scaler = trained_models['X'], trained_models['scaler']
+    model = trained_models['models']['logistic_regression']
+    engine = compile_model(model, scaler)
+
+    assert isinstance(engine, FusedLogistic)
+    expected = model.predict_proba(scaler.transform(X))
+    np.testing.assert_allclose(engine.predict_proba(X.to_numpy()), expected, atol=1e-12)
+    np.testing.assert_allclose(engine.predict_proba(X.to_numpy()[0]), expected[:1], atol=1e-12)
+
+
+def test_fused_logistic_rejects_missing_values(trained_models):
+    engine = compile_model(trained_models['models']['logistic_regression'], trained_models['scaler'])
+    row = trained_models['X'].to_numpy()[:1].copy()
+    row[0, 0] = np.nan
+    with pytest.raises(ValueError):
+        engine.predict_proba(row)
+
+
+def test_export_fused_logistic_saves_checked_model(trained_models):
+    X, scaler = trained_models['X'], trained_models['scaler']
+    model = trained_models['models']['logistic_regression']
+
+    max_diff = export_fused_logistic(model, scaler, 'logistic_regression', X)
+
+    assert max_diff is not None and max_diff <= 1e-9
+    loaded = FusedLogistic.load(fused_artifact_path('logistic_regression'))
+    np.testing.assert_allclose(loaded.predict_proba(X.to_numpy()), model.predict_proba(scaler.transform(X)),
+                               atol=1e-12)
+    assert export_fused_logistic(trained_models['models']['random_forest'], scaler, 'random_forest', X) is None
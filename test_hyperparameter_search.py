@@ -0,0 +1,40 @@
+"""
+Hiperparametrų paieškos fold'ų talpykla: pakartotinis naudojimas ir senų duomenų raktų šalinimas
+"""
+import json
+
+import numpy as np
+
+import hyperparameter_search as hs
+
+
+def _search(data_key, cache_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 4))
+    y = (X[:, 0] > 0.3).astype(int)
+    candidates = hs.random_candidates({'logistic_regression': hs.SEARCH_SPACES['logistic_regression']}, 3, 0)
+    return hs.successive_halving(candidates, X, y, data_key, n_jobs=1, cache_path=cache_path)
+
+
+def test_repeated_search_uses_cache(tmp_path):
+    cache_path = str(tmp_path / 'folds.json')
+    first, first_stats = _search('duomenys', cache_path)
+    second, second_stats = _search('duomenys', cache_path)
+
+    assert first_stats['evaluated_folds'] > 0
+    assert second_stats['evaluated_folds'] == 0
+    assert second_stats['cached_folds'] == first_stats['evaluated_folds']
+    assert first['roc_auc_mean'].tolist() == second['roc_auc_mean'].tolist()
+
+
+def test_old_data_keys_are_evicted(tmp_path, monkeypatch):
+    cache_path = str(tmp_path / 'folds.json')
+    monkeypatch.setattr(hs, 'MAX_CACHED_DATA_KEYS', 2)
+
+    for data_key in ('a', 'b', 'c'):
+        _search(data_key, cache_path)
+    _search('b', cache_path)
+    _search('d', cache_path)
+
+    with open(cache_path, encoding='utf-8') as f:
+        assert sorted(json.load(f)) == ['b', 'd']
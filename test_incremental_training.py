@@ -0,0 +1,65 @@
+"""
+Inkrementinis atnaujinimas: perskaičiavimas naujai skalei ir registro atnaujinimas
+"""
+import numpy as np
+
+from incremental_training import (remap_linear_model, remap_tree_thresholds, update_logistic_regression,
+                                  update_random_forest, update_scaler)
+from model_registry import registry
+from utils import load_model
+
+
+def _new_rows(student_frame, n=60):
+    X, y = student_frame
+    X_new = X.tail(n).copy() * 1.1 + 2.0
+    return X_new, y[-n:]
+
+
+def test_remap_keeps_predictions(trained_models, student_frame):
+    X, scaler, models = trained_models['X'], trained_models['scaler'], trained_models['models']
+    X_new, _ = _new_rows(student_frame)
+    new_scaler = update_scaler(scaler, X_new)
+    assert not np.allclose(new_scaler.mean_, scaler.mean_)
+
+    for name, remap in (('random_forest', remap_tree_thresholds), ('logistic_regression', remap_linear_model)):
+        model = models[name]
+        before = model.predict_proba(scaler.transform(X))
+        remap(model, scaler, new_scaler)
+        np.testing.assert_allclose(model.predict_proba(new_scaler.transform(X)), before, atol=1e-9)
+
+
+def test_random_forest_update_is_served(trained_models, student_frame):
+    X = trained_models['X']
+    old_version = registry.get('random_forest').version
+    X_new, y_new = _new_rows(student_frame)
+
+    info = update_random_forest(X_new, y_new, new_trees=5)
+
+    assert (info['trees_before'], info['trees_after']) == (10, 15)
+    model, scaler = load_model('random_forest')
+    assert len(model.estimators_) == 15
+    served = registry.get('random_forest')
+    assert served.version != old_version
+    np.testing.assert_allclose(served.predict_proba(X), model.predict_proba(scaler.transform(X)), atol=1e-12)
+
+
+def test_logistic_regression_update_is_served(trained_models, student_frame):
+    X = trained_models['X']
+    before = registry.get('logistic_regression').predict_proba(X)
+    X_new, y_new = _new_rows(student_frame)
+
+    info = update_logistic_regression(X_new, y_new, epochs=3)
+
+    assert info == {'model': 'logistic_regression', 'epochs': 3}
+    model, scaler = load_model('logistic_regression')
+    assert type(model).__name__ == 'LogisticRegression'
+    served = registry.get('logistic_regression').predict_proba(X)
+    np.testing.assert_allclose(served, model.predict_proba(scaler.transform(X)), atol=1e-12)
+    assert not np.allclose(served, before)
+
+
+def test_single_class_batch_is_skipped(trained_models, student_frame):
+    X_new, _ = _new_rows(student_frame)
+    y_new = np.zeros(len(X_new), dtype=int)
+    assert update_random_forest(X_new, y_new) is None
+    assert update_logistic_regression(X_new, y_new) is None
@@ -0,0 +1,76 @@
+"""
+Prognozavimo metrikos: skaitikliai, histogramos, eksportas ir prognozavimo kelias
+"""
+import asyncio
+
+import pytest
+
+import metrics
+from metrics import MetricsRegistry
+from predict import predict_frame, predict_student_risk
+from scoring_server import ScoringServer
+
+
+def test_counter_and_histogram_export():
+    registry = MetricsRegistry(prefix='test_')
+    requests = registry.counter('requests_total', 'Užklausos', ['path'])
+    latency = registry.histogram('latency_seconds', 'Trukmė', ['path'], buckets=(0.1, 1.0))
+    requests.inc('/predict')
+    requests.inc('/predict', amount=2)
+    requests.inc('a"b\\c')
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value, '/predict')
+
+    assert requests.value('/predict') == 3
+    text = registry.to_prometheus()
+    assert '# TYPE test_requests_total counter' in text
+    assert 'test_requests_total{path="/predict"} 3' in text
+    assert 'test_requests_total{path="a\\"b\\\\c"} 1' in text
+    assert 'test_latency_seconds_bucket{path="/predict",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{path="/predict",le="1"} 3' in text
+    assert 'test_latency_seconds_bucket{path="/predict",le="+Inf"} 4' in text
+    assert 'test_latency_seconds_count{path="/predict"} 4' in text
+    assert 'test_latency_seconds_sum{path="/predict"} 4.05' in text
+
+    snapshot = registry.snapshot()
+    assert snapshot['histograms']['test_latency_seconds'][0]['count'] == 4
+    assert snapshot['histograms']['test_latency_seconds'][0]['buckets']['+Inf'] == 4
+
+
+def test_histogram_quantile_interpolates_within_bucket():
+    histogram = MetricsRegistry(prefix='test_').histogram('h', 'h', buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == pytest.approx(1.5)
+    assert histogram.quantile(1.0) == pytest.approx(4.0)
+    assert histogram.quantile(0.5, 'nera') is None
+
+
+def test_duplicate_metric_rejected():
+    registry = MetricsRegistry(prefix='test_')
+    registry.counter('x', 'x')
+    with pytest.raises(ValueError):
+        registry.histogram('x', 'x')
+
+
+def test_prediction_path_is_counted(trained_models):
+    metrics.registry.reset()
+    X = trained_models['X'].head(10).astype(object)
+    X.iloc[0, 0] = 'daug'
+    predict_frame(X)
+    predict_student_risk(trained_models['X'].iloc[1].to_dict())
+    predict_student_risk(trained_models['X'].iloc[1].to_dict())
+
+    assert metrics.PREDICTION_ERRORS.value('random_forest') == 1
+    counted = sum(value for labels, value in metrics.PREDICTIONS.samples() if labels[0] == 'random_forest')
+    assert counted == 9 + 2
+    assert metrics.CACHE_LOOKUPS.value('random_forest', 'hit') == 1
+    stages = {row['stage']: row['count'] for row in metrics.latency_summary('random_forest')}
+    assert stages['batch_inference'] == 1
+    assert stages['total'] == 2
+
+    status, body = asyncio.run(ScoringServer().handle_metrics(b'', 'format=json'))
+    assert status == 200
+    assert 'student_risk_predictions_total' in body['counters']
+    status, text = asyncio.run(ScoringServer().handle_metrics(b''))
+    assert 'student_risk_prediction_errors_total{model="random_forest"} 1' in text
@@ -0,0 +1,76 @@
+"""
+Modelių rinkinys: išsaugojimas ir įkėlimas, pickle pirmenybė ir treniravimo vidurkiai
+"""
+import os
+
+import numpy as np
+import pytest
+
+from incremental_training import update_logistic_regression, update_random_forest
+from model_bundle import (BUNDLE_FILE, BUNDLE_FORMAT_VERSION, load_bundle, load_bundle_model,
+                          load_training_means, model_source_path, read_manifest, save_bundle)
+from model_registry import ModelRegistry
+from utils import load_model, save_model
+
+
+def test_round_trip(trained_models):
+    X, scaler, models = trained_models['X'], trained_models['scaler'], trained_models['models']
+
+    manifest = read_manifest()
+    assert manifest['format_version'] == BUNDLE_FORMAT_VERSION
+    assert manifest['feature_columns'] == list(X.columns)
+    assert manifest['best_model'] == 'random_forest'
+    assert set(manifest['models']) == set(models)
+    np.testing.assert_allclose(load_training_means(), X.mean().to_numpy())
+
+    bundle = load_bundle()
+    for name, model in models.items():
+        loaded, loaded_scaler = load_model(name)
+        assert loaded_scaler is bundle['scaler']
+        np.testing.assert_array_equal(loaded.predict_proba(loaded_scaler.transform(X)),
+                                      model.predict_proba(scaler.transform(X)))
+        assert model_source_path(name) == BUNDLE_FILE
+
+
+def test_save_removes_old_pickles(trained_models):
+    scaler, models = trained_models['scaler'], trained_models['models']
+    save_model(models['decision_tree'], scaler, 'decision_tree')
+    assert os.path.exists('models/decision_tree_model.pkl')
+
+    save_bundle(models, scaler, list(trained_models['X'].columns), trained_models['X'].mean().to_numpy())
+
+    assert not os.path.exists('models/decision_tree_model.pkl')
+    assert not os.path.exists('models/decision_tree_scaler.pkl')
+
+
+def test_newer_pickle_takes_precedence(trained_models):
+    scaler, models = trained_models['scaler'], trained_models['models']
+    save_model(models['logistic_regression'], scaler, 'logistic_regression')
+
+    assert model_source_path('logistic_regression') == 'models/logistic_regression_model.pkl'
+    assert load_bundle_model('logistic_regression') is None
+    assert load_bundle_model('random_forest') is not None
+
+
+def test_mismatched_means_rejected(trained_models):
+    with pytest.raises(ValueError):
+        save_bundle(trained_models['models'], trained_models['scaler'], list(trained_models['X'].columns), [0.0])
+
+
+@pytest.mark.parametrize('artifact_format', ['pickle', 'auto'])
+def test_registry_means_follow_model_scaler(trained_models, student_frame, artifact_format):
+    X, y = student_frame
+    registry = ModelRegistry(artifact_format=artifact_format)
+    np.testing.assert_allclose(registry.get('random_forest').means, load_training_means())
+
+    update_random_forest(X.tail(60) + 5.0, y[-60:], new_trees=2)
+
+    _, updated_scaler = load_model('random_forest')
+    assert not np.allclose(updated_scaler.mean_, load_training_means())
+    np.testing.assert_allclose(registry.get('random_forest').means, updated_scaler.mean_)
+    # Kiti modeliai vis dar iš rinkinio
+    np.testing.assert_allclose(registry.get('decision_tree').means, load_training_means())
+
+    update_logistic_regression(X.tail(60) + 5.0, y[-60:], epochs=1)
+    _, updated_scaler = load_model('logistic_regression')
+    np.testing.assert_allclose(registry.get('logistic_regression').means, updated_scaler.mean_)
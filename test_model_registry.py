@@ -0,0 +1,57 @@
+"""
+Modelių registras: pakartotinis naudojimas, perkrovimas pasikeitus failams ir LRU išmetimas
+"""
+import numpy as np
+import pytest
+
+from model_registry import ModelRegistry
+from utils import save_model
+
+
+@pytest.mark.parametrize('check', ['mtime', 'hash'])
+def test_cached_until_artifacts_change(trained_models, check):
+    registry = ModelRegistry(check=check, artifact_format='pickle')
+    first = registry.get('decision_tree')
+    assert registry.get('decision_tree') is first
+    assert (registry.loads, registry.hits) == (1, 1)
+
+    # Naujesnis pickle (pvz. po pertreniravimo) pakeičia versiją
+    save_model(trained_models['models']['random_forest'], trained_models['scaler'], 'decision_tree')
+    reloaded = registry.get('decision_tree')
+    assert reloaded is not first
+    assert reloaded.version != first.version
+    assert hasattr(reloaded.model, 'estimators_')
+    assert registry.loads == 2
+
+
+def test_invalidate_forces_reload(trained_models):
+    registry = ModelRegistry(artifact_format='pickle')
+    first = registry.get('random_forest')
+    registry.invalidate('random_forest')
+    assert registry.loaded_models() == []
+    assert registry.get('random_forest') is not first
+    assert registry.loads == 2
+
+
+def test_least_recently_used_model_is_evicted(trained_models):
+    registry = ModelRegistry(max_models=2, artifact_format='pickle')
+    registry.get('logistic_regression')
+    registry.get('decision_tree')
+    registry.get('logistic_regression')
+    registry.get('random_forest')
+    assert registry.loaded_models() == ['logistic_regression', 'random_forest']
+
+
+def test_predictions_match_sklearn(trained_models):
+    X, scaler = trained_models['X'], trained_models['scaler']
+    registry = ModelRegistry(artifact_format='pickle')
+    for name, model in trained_models['models'].items():
+        expected = model.predict_proba(scaler.transform(X))
+        loaded = registry.get(name)
+        np.testing.assert_allclose(loaded.predict_proba(X), expected, atol=1e-12)
+        np.testing.assert_allclose(loaded.predict_proba(X, fast=True), expected, atol=1e-12)
+
+
+def test_missing_model_raises(trained_models):
+    with pytest.raises(FileNotFoundError):
+        ModelRegistry().get('nera_tokio_modelio')
@@ -0,0 +1,115 @@
+"""
+Vektorizuotas prognozavimas (predict_frame) ir srautinis CSV prognozavimas
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import predict
+from model_bundle import load_training_means
+from predict import predict_batch_stream, predict_frame, predict_student_risk
+from utils import RISK_THRESHOLD
+
+
+def _sklearn_risk(trained_models, X, model_name='random_forest'):
+    model, scaler = trained_models['models'][model_name], trained_models['scaler']
+    return model.predict_proba(scaler.transform(X))[:, 1]
+
+
+@pytest.mark.parametrize('model_name', ['logistic_regression', 'decision_tree', 'random_forest'])
+def test_predict_frame_matches_sklearn(trained_models, model_name):
+    X = trained_models['X']
+    results = predict_frame(X, model_name, chunk_size=70)
+
+    expected = _sklearn_risk(trained_models, X, model_name)
+    np.testing.assert_allclose(results['probability_risk'].to_numpy(), expected, atol=1e-12)
+    assert results['prediction'].tolist() == (expected >= RISK_THRESHOLD).astype(int).tolist()
+    assert (results['risk_level'] != 'ERROR').all()
+
+
+def test_predict_frame_matches_single_student(trained_models):
+    X = trained_models['X'].head(5)
+    results = predict_frame(X)
+    for (_, row), result in zip(X.iterrows(), results.itertuples()):
+        single = predict_student_risk(row.to_dict())
+        assert single['probability_risk'] == pytest.approx(result.probability_risk)
+        assert single['risk_level'] == result.risk_level
+
+
+def test_invalid_and_missing_rows(trained_models):
+    X = trained_models['X'].head(4).astype(object)
+    X.iloc[1, 0] = 'daug'
+    X.iloc[2, 1] = np.inf
+    X.iloc[3, 2] = np.nan
+    results = predict_frame(X)
+
+    assert results['risk_level'].tolist()[1:3] == ['ERROR', 'ERROR']
+    assert results['prediction'].isna().tolist() == [False, True, True, False]
+    # Trūkstama reikšmė užpildoma treniravimo vidurkiu
+    imputed = X.iloc[[3]].astype(float).fillna(pd.Series(load_training_means(), index=X.columns))
+    assert results['probability_risk'].iloc[3] == pytest.approx(_sklearn_risk(trained_models, imputed)[0])
+
+
+def test_missing_columns_raise(trained_models):
+    with pytest.raises(ValueError):
+        predict_frame(trained_models['X'].drop(columns=['lankomumas_proc']))
+
+
+def _read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_stream_resumes_from_checkpoint(trained_models, tmp_path, monkeypatch):
+    data_file = str(tmp_path / 'studentai.csv')
+    trained_models['X'].to_csv(data_file, index=False)
+    full_output = str(tmp_path / 'visas.csv')
+    predict_batch_stream(data_file, output_file=full_output, chunk_size=70)
+
+    # 3-ia dalis įrašoma, bet procesas nutrūksta prieš išsaugant jos būseną
+    output = str(tmp_path / 'tesiamas.csv')
+    write_checkpoint = predict._write_checkpoint
+    written = []
+
+    def interrupted_checkpoint(checkpoint_file, state):
+        written.append(state['chunks_done'])
+        if len(written) == 3:
+            raise KeyboardInterrupt
+        write_checkpoint(checkpoint_file, state)
+
+    monkeypatch.setattr(predict, '_write_checkpoint', interrupted_checkpoint)
+    with pytest.raises(KeyboardInterrupt):
+        predict_batch_stream(data_file, output_file=output, chunk_size=70)
+    monkeypatch.setattr(predict, '_write_checkpoint', write_checkpoint)
+
+    scored_chunks = []
+
+    def recording_frame(chunk, *args, **kwargs):
+        scored_chunks.append(chunk.index[0])
+        return predict_frame(chunk, *args, **kwargs)
+
+    monkeypatch.setattr(predict, 'predict_frame', recording_frame)
+    summary = predict_batch_stream(data_file, output_file=output, chunk_size=70, resume=True)
+
+    assert scored_chunks == [140, 210, 280]
+    assert summary['rows'] == len(trained_models['X'])
+    assert _read(output) == _read(full_output)
+    assert not os.path.exists(output + '.progress.json')
+
+
+def test_stream_ignores_checkpoint_of_other_file(trained_models, tmp_path):
+    first, second = str(tmp_path / 'pirmas.csv'), str(tmp_path / 'antras.csv')
+    trained_models['X'].head(100).to_csv(first, index=False)
+    trained_models['X'].tail(50).to_csv(second, index=False)
+    output = str(tmp_path / 'prognozes.csv')
+    predict._write_checkpoint(output + '.progress.json', {
+        'data_file': os.path.abspath(first), 'model_name': 'random_forest', 'rows_done': 100,
+        'chunks_done': 1, 'output_bytes': 0, 'risk': 0, 'no_risk': 0, 'errors': 0})
+    open(output, 'w').close()
+
+    summary = predict_batch_stream(second, output_file=output, chunk_size=30, resume=True)
+
+    assert summary['rows'] == 50
+    assert len(pd.read_csv(output)) == 50
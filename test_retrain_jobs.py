@@ -0,0 +1,101 @@
+"""
+Pertreniravimo užduočių eilė: heartbeat lease ir užduočių perėmimas
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+import retrain_jobs
+
+
+@pytest.fixture
+def jobs_db(tmp_path, monkeypatch):
+    """Užduočių eilė laikinoje duomenų bazėje"""
+    monkeypatch.setattr(retrain_jobs, 'DB_PATH', str(tmp_path / 'students.db'))
+    monkeypatch.setattr(retrain_jobs, 'JOBS_DIR', str(tmp_path / 'retrain_jobs'))
+    monkeypatch.setattr(retrain_jobs, '_table_ready', False)
+    conn = retrain_jobs._connect()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+@pytest.fixture
+def live_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+    yield process.pid
+    process.kill()
+    process.wait()
+
+
+def _add_job(conn, status='running', pid=None, host=None, heartbeat_age=None):
+    heartbeat_at = None if heartbeat_age is None else time.time() - heartbeat_age
+    return conn.execute(
+        'INSERT INTO retrain_jobs (status, data_hash, upload_path, worker_pid, worker_host, heartbeat_at) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        (status, 'hash', 'upload.csv', pid, host or socket.gethostname(), heartbeat_at)
+    ).lastrowid
+
+
+def _status(conn, job_id):
+    return conn.execute('SELECT status FROM retrain_jobs WHERE id = ?', (job_id,)).fetchone()[0]
+
+
+def test_fresh_heartbeat_is_kept(jobs_db, dead_pid):
+    job_id = _add_job(jobs_db, pid=dead_pid, heartbeat_age=1)
+    assert retrain_jobs.fail_stale_jobs(jobs_db) == 0
+    assert _status(jobs_db, job_id) == 'running'
+
+
+def test_expired_lease_of_dead_worker_fails(jobs_db, dead_pid):
+    job_id = _add_job(jobs_db, pid=dead_pid, heartbeat_age=retrain_jobs.LEASE_SECONDS + 1)
+    assert retrain_jobs.fail_stale_jobs(jobs_db) == 1
+    assert _status(jobs_db, job_id) == 'failed'
+
+
+def test_expired_lease_of_live_worker_is_kept(jobs_db, live_pid):
+    job_id = _add_job(jobs_db, pid=live_pid, heartbeat_age=retrain_jobs.LEASE_SECONDS + 1)
+    assert retrain_jobs.fail_stale_jobs(jobs_db) == 0
+    assert _status(jobs_db, job_id) == 'running'
+
+
+def test_expired_lease_on_other_host_fails(jobs_db, live_pid):
+    job_id = _add_job(jobs_db, pid=live_pid, host='kitas-kompiuteris',
+                      heartbeat_age=retrain_jobs.LEASE_SECONDS + 1)
+    assert retrain_jobs.fail_stale_jobs(jobs_db) == 1
+    assert _status(jobs_db, job_id) == 'failed'
+
+
+def test_own_process_job_kept_only_while_running(jobs_db, monkeypatch):
+    job_id = _add_job(jobs_db, pid=os.getpid(), heartbeat_age=retrain_jobs.LEASE_SECONDS + 1)
+    monkeypatch.setattr(retrain_jobs, '_running_job_ids', {job_id})
+    assert retrain_jobs.fail_stale_jobs(jobs_db) == 0
+    monkeypatch.setattr(retrain_jobs, '_running_job_ids', set())
+    assert retrain_jobs.fail_stale_jobs(jobs_db) == 1
+
+
+def test_claim_waits_for_live_worker(jobs_db, live_pid):
+    _add_job(jobs_db, pid=live_pid, heartbeat_age=retrain_jobs.LEASE_SECONDS + 1)
+    queued_id = _add_job(jobs_db, status='queued')
+    assert retrain_jobs.claim_jobs() == []
+    assert _status(jobs_db, queued_id) == 'queued'
+
+
+def test_heartbeat_detects_lost_claim(jobs_db):
+    queued_id = _add_job(jobs_db, status='queued')
+    jobs = retrain_jobs.claim_jobs()
+    assert [job['id'] for job in jobs] == [queued_id]
+    assert retrain_jobs._heartbeat(jobs) == 1
+
+    jobs_db.execute('UPDATE retrain_jobs SET status = ? WHERE id = ?', ('failed', queued_id))
+    assert retrain_jobs._heartbeat(jobs) == 0
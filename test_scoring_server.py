@@ -0,0 +1,66 @@
+"""
+Prognozavimo serveris: paketai su tinkamais ir netinkamais įrašais
+"""
+import asyncio
+
+import pytest
+
+import scoring_server
+from scoring_server import MicroBatcher, score_students
+
+
+def _student(X, row=0, **overrides):
+    student = {col: float(value) for col, value in X.iloc[row].items()}
+    student.update(overrides)
+    return student
+
+
+def test_score_students_mixed_valid_and_invalid(trained_models):
+    X = trained_models['X']
+    good = _student(X, 0, lankomumas_proc=95.0)
+    numeric_text = _student(X, 1, lankomumas_proc='95', streso_lygis='5')
+    invalid = _student(X, 2, lankomumas_proc='daug')
+
+    results = score_students([good, numeric_text, invalid])
+
+    assert [r['risk_level'] == 'ERROR' for r in results] == [False, False, True]
+    assert "✅ Aukštas lankomumas (95%)" in results[0]['reasons']
+    assert "✅ Aukštas lankomumas (95%)" in results[1]['reasons']
+    assert "❌ Aukštas streso lygis (5/5)" in results[1]['reasons']
+    assert 0.0 <= results[1]['probability_risk'] <= 1.0
+    assert 'error' in results[2]
+
+
+def test_score_students_matches_single_rows(trained_models):
+    X = trained_models['X']
+    students = [_student(X, row) for row in range(5)]
+    batch = score_students(students)
+    for student, result in zip(students, batch):
+        assert score_students([student])[0]['probability_risk'] == pytest.approx(result['probability_risk'])
+
+
+def test_micro_batch_error_is_isolated(monkeypatch):
+    def fake_score(students, model_name='random_forest'):
+        if any(student.get('bad') for student in students):
+            raise ValueError('blogas įrašas')
+        return [{'risk_level': 'ŽEMA RIZIKA', 'id': student['id']} for student in students]
+
+    monkeypatch.setattr(scoring_server, 'score_students', fake_score)
+
+    async def scenario():
+        batcher = MicroBatcher(max_batch_size=8, max_wait_ms=50)
+        runner = asyncio.create_task(batcher.run())
+        try:
+            return await asyncio.gather(
+                batcher.submit({'id': 1}),
+                batcher.submit({'id': 2, 'bad': True}),
+                batcher.submit({'id': 3}),
+                return_exceptions=True,
+            )
+        finally:
+            runner.cancel()
+
+    first, second, third = asyncio.run(scenario())
+    assert first == {'risk_level': 'ŽEMA RIZIKA', 'id': 1}
+    assert isinstance(second, ValueError)
+    assert third == {'risk_level': 'ŽEMA RIZIKA', 'id': 3}
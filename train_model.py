@@ -5,16 +5,16 @@ Trenruoja Logistinę regresiją, Sprendimų medį ir Random Forest
 import pandas as pd
 import numpy as np
 import os
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.linear_model import LogisticRegression
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, f1_score, roc_auc_score, classification_report, confusion_matrix, recall_score
-import matplotlib.pyplot as plt
-import seaborn as sns
-from imblearn.over_sampling import SMOTE
-from utils import get_feature_columns, prepare_features, normalize_features, save_model
-import joblib
+import time
+from utils import get_feature_columns, normalize_features
+from model_registry import registry
+from fast_inference import export_fused_logistic, fused_artifact_path
+from array_store import save_model_arrays
+from model_bundle import BUNDLE_FILE, save_bundle
+from profiling import StageProfiler
+from feature_cache import build_feature_matrix, cache_key, load_features, save_features
+from training_plots import (DEFAULT_DPI, PLOT_FORMATS, PLOT_MODES, render_in_background,
+                            render_training_plots, save_confusion_matrices)
 
 # Nustatome darbinį katalogą į skripto vietą
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -23,60 +23,136 @@ os.chdir(SCRIPT_DIR)
 # Sukuriame models aplanką, jei jo nėra
 os.makedirs('models', exist_ok=True)
 
-def train_all_models(data_file='data/students_data.csv'):
+def _fit_task(model, X, y):
+    """Lygiagreti užduotis: modelio treniravimas"""
+    start = time.perf_counter()
+    model.fit(X, y)
+    return model, time.perf_counter() - start
+
+
+def _cv_fold_task(model, X, y, train_idx, test_idx):
+    """Lygiagreti užduotis: vienas cross-validation fold (accuracy, kaip cross_val_score)"""
+    from sklearn.base import clone
+    from sklearn.metrics import accuracy_score
+
+    start = time.perf_counter()
+    estimator = clone(model)
+    estimator.fit(X[train_idx], y[train_idx])
+    score = accuracy_score(y[test_idx], estimator.predict(X[test_idx]))
+    return score, time.perf_counter() - start
+
+
+def fit_models_parallel(models, X, y, n_jobs=-1, cv=10):
+    """
+    Lygiagrečiai treniruoja visus modelius ir jų cross-validation fold'us
+
+    Kiekvienas modelio treniravimas ir kiekvienas fold'as yra atskira joblib užduotis.
+    Fold'ai tokie patys kaip cross_val_score(cv=10) (StratifiedKFold be maišymo),
+    todėl rezultatai sutampa su nuosekliu treniravimu.
+
+    Returns:
+        dict modelio pavadinimas -> {'model': ištreniruotas modelis, 'cv_scores': masyvas}
+    """
+    from joblib import Parallel, delayed, effective_n_jobs
+    from sklearn.model_selection import StratifiedKFold
+
+    X = np.asarray(X)
+    y = np.asarray(y)
+    folds = list(StratifiedKFold(n_splits=cv).split(X, y))
+
+    tasks, keys = [], []
+    for model_name, model in models.items():
+        tasks.append(delayed(_fit_task)(model, X, y))
+        keys.append((model_name, 'fit'))
+        for train_idx, test_idx in folds:
+            tasks.append(delayed(_cv_fold_task)(model, X, y, train_idx, test_idx))
+            keys.append((model_name, 'cv'))
+
+    workers = effective_n_jobs(n_jobs)
+    start = time.perf_counter()
+    outputs = Parallel(n_jobs=n_jobs)(tasks)
+    wall_time = time.perf_counter() - start
+
+    fitted = {model_name: {'model': None, 'cv_scores': []} for model_name in models}
+    for (model_name, kind), (value, _) in zip(keys, outputs):
+        if kind == 'fit':
+            fitted[model_name]['model'] = value
+        else:
+            fitted[model_name]['cv_scores'].append(value)
+    for entry in fitted.values():
+        entry['cv_scores'] = np.array(entry['cv_scores'])
+
+    # Nuoseklus laikas - užduočių trukmių suma
+    serial_time = sum(elapsed for _, elapsed in outputs)
+    print(f"Lygiagretus treniravimas: {len(tasks)} užduočių, {workers} procesai")
+    print(f"   Laikas: {wall_time:.2f} s (nuosekliai ~{serial_time:.2f} s), "
+          f"pagreitėjimas {serial_time / wall_time:.2f}x")
+    return fitted
+
+
+def train_all_models(data_file='data/students_data.csv', profile_memory=False, n_jobs=1, use_cache=True,
+                     plots='background', plot_dpi=DEFAULT_DPI, plot_format='png'):
     """
     Trenruoja visus tris modelius ir išsaugo rezultatus
+
+    Kiekvieno etapo laikas ir atmintis įrašomi į models/training_profile.json
+    ir grąžinami results['stage_timings'].
+
+    Args:
+        profile_memory: matuoti etapų atmintį su tracemalloc (lėčiau)
+        n_jobs: procesų skaičius modelių treniravimui ir cross-validation
+            (1 - nuosekliai, -1 - visi branduoliai)
+        use_cache: naudoti išvalytos požymių matricos talpyklą (feature_cache)
+        plots: grafikų generavimas - 'sync' (treniravimo metu), 'background'
+            (foninėje gijoje, treniravimas jų nelaukia) arba 'skip' (negeneruoti;
+            vėliau: python training_plots.py)
+        plot_dpi, plot_format: grafikų raiška ir formatas (png, jpg, svg, pdf)
     """
+    if plots not in PLOT_MODES:
+        raise ValueError(f"Nežinomas grafikų režimas: {plots} (galimi: {', '.join(PLOT_MODES)})")
+    profiler = StageProfiler(trace_memory=profile_memory)
+    profiler.begin('imports')
+
+    # Sunkios bibliotekos įkeliamos tik treniruojant, ne importuojant modulį
+    from sklearn.model_selection import train_test_split, cross_val_score
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.tree import DecisionTreeClassifier
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score, f1_score, roc_auc_score, classification_report, confusion_matrix, recall_score
+    from imblearn.over_sampling import SMOTE
+
     print("=" * 60)
     print("STUDENTŲ AKADEMINĖS SĖKMĖS PROGNOZĖS MODELIO TRENIRAVIMAS")
     print("=" * 60)
     
-    # Įkeliame duomenis
+    # Įkeliame duomenis (išvalyta požymių matrica imama iš talpyklos, jei failas nepakito)
+    profiler.begin('load')
     print("\n1. Įkeliami duomenys...")
-    df = pd.read_csv(data_file)
-    
-    # Konvertuojame originalius stulpelius jei reikia
-    if '18. Lankomumas šiame semestre (%)' in df.columns:
-        df = df.rename(columns={
-            '18. Lankomumas šiame semestre (%)': 'lankomumas_proc',
-            '20. Savarankiško mokymosi valandos per savaitę': 'savarankisko_mokymosi_val',
-            '23. Patiriu stiprų stresą': 'streso_lygis',
-            '9. Darbo valandos per savaitę': 'darbo_valandos',
-            '21. Miego valandos per parą': 'miego_valandos',
-            '22. Laikas socialiniuose tinkluose per dieną (val.)': 'socialiniu_tinklu_val',
-            '13. Koks yra jūsų bendras visų studijų semestrų vidurkis (1–10)?': 'studiju_vidurkis',
-            '17. 12 klasės metinis vidurkis (1–10)': 'dvyliktos_klases_vidurkis',
-            '14. Brandos egzaminas: Matematika (1–100, 0=nelaikiau)': 'brandos_egzaminas_1',
-            '15. Brandos egzaminas: Lietuvių kalba (1–100, 0=nelaikiau)': 'brandos_egzaminas_2',
-            '16. Brandos egzaminas: Anglų kalba (1–100, 0=nelaikiau)': 'brandos_egzaminas_3',
-            '7. Finansinis stresas (1–5)': 'finansinis_stresas',
-            '24. Ketinu nutraukti studijas': 'ketinu_mesti_studijas'
-        })
-    
-    # Sukuriame rizikos kintamąjį
-    if 'ketinu_mesti_studijas' in df.columns:
-        df['rizika'] = df['ketinu_mesti_studijas'].apply(lambda x: 1 if x >= 4 else 0)
-    
-    print(f"   Įrašų skaičius: {len(df)}")
-    print(f"   Rizikos grupė: {df['rizika'].sum()} ({df['rizika'].sum()/len(df)*100:.1f}%)")
-    print(f"   Nerizikos grupė: {(df['rizika']==0).sum()} ({(df['rizika']==0).sum()/len(df)*100:.1f}%)")
-    
-    # Paruošiame požymius
-    print("\n2. Paruošiami požymiai...")
     feature_columns = get_feature_columns()
+    key = cache_key(data_file, feature_columns) if use_cache else None
+    cached = load_features(key, feature_columns) if key is not None else None
+    cache_hit = cached is not None
+    if cache_hit:
+        X, y = cached
+        print("   Išvalyti požymiai rasti talpykloje (models/cache)")
+    else:
+        df = pd.read_csv(data_file)
+        # Pervadiname stulpelius, išvalome tekstinius simbolius ir užpildome trūkstamas reikšmes
+        profiler.begin('clean')
+        X, y = build_feature_matrix(df, feature_columns)
+        if key is not None:
+            save_features(key, X, y)
     
-    # Išvalome duomenis nuo tekstinių simbolių
-    for col in feature_columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col].astype(str).str.replace('%', '').str.replace('-', '').str.replace('/', '').str.replace(',', '.'), errors='coerce')
-    
-    X = prepare_features(df, feature_columns)
-    y = df['rizika']
+    print(f"   Įrašų skaičius: {len(y)}")
+    print(f"   Rizikos grupė: {y.sum()} ({y.sum()/len(y)*100:.1f}%)")
+    print(f"   Nerizikos grupė: {(y==0).sum()} ({(y==0).sum()/len(y)*100:.1f}%)")
     
+    print("\n2. Paruošiami požymiai...")
     print(f"   Požymių skaičius: {len(feature_columns)}")
     print(f"   Požymiai: {', '.join(feature_columns)}")
     
     # Skaidome duomenis (didesnis test set)
+    profiler.begin('split')
     print("\n3. Skaidomi duomenys (70% treniravimui, 30% testavimui)...")
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.3, random_state=42, stratify=y
@@ -85,15 +161,18 @@ def train_all_models(data_file='data/students_data.csv'):
     print(f"   Testavimo rinkinys: {len(X_test)} įrašų")
     
     # Normalizuojame
+    profiler.begin('scale')
     print("\n4. Normalizuojami duomenys...")
     X_train_scaled, X_test_scaled, scaler = normalize_features(X_train, X_test)
     
     # SMOTE balansavimas (stipresnis)
+    profiler.begin('smote')
     print("\n5. Taikomas SMOTE balansavimas...")
     smote = SMOTE(random_state=42, sampling_strategy=0.8, k_neighbors=5)  # 80% balanso
     X_train_balanced, y_train_balanced = smote.fit_resample(X_train_scaled, y_train)
     
     # Pridedame mažesnį noise
+    profiler.begin('noise')
     print("\n6. Pridedamas noise duomenims...")
     noise = np.random.normal(0, 0.05, X_train_balanced.shape)  # 5% noise
     X_train_balanced = X_train_balanced + noise
@@ -130,22 +209,34 @@ def train_all_models(data_file='data/students_data.csv'):
     }
     
     results = {}
+    confusion_matrices = {}
     
     print("\n" + "=" * 60)
     print("MODELIŲ TRENIRAVIMAS IR VERTINIMAS")
     print("=" * 60)
     print(f"Treniravimo duomenų su noise: {len(X_train_balanced)}")
     
+    # Lygiagrečiu režimu visi modeliai ir fold'ai treniruojami iš anksto
+    parallel_results = None
+    if n_jobs != 1:
+        profiler.begin('parallel_fit_cv')
+        parallel_results = fit_models_parallel(models, X_train_balanced, y_train_balanced, n_jobs=n_jobs)
+    
     for model_name, model in models.items():
         print(f"\n{'='*60}")
         print(f"Modelis: {model_name}")
         print(f"{'='*60}")
         
         # Treniruojame su SMOTE duomenimis
+        profiler.begin(f'fit[{model_name}]')
         print("Treniruojama...")
-        model.fit(X_train_balanced, y_train_balanced)
+        if parallel_results is None:
+            model.fit(X_train_balanced, y_train_balanced)
+        else:
+            model = models[model_name] = parallel_results[model_name]['model']
         
         # Prognozuojame
+        profiler.begin(f'evaluate[{model_name}]')
         y_pred = model.predict(X_test_scaled)
         y_pred_proba = model.predict_proba(X_test_scaled)[:, 1]
         
@@ -156,7 +247,12 @@ def train_all_models(data_file='data/students_data.csv'):
         recall = recall_score(y_test, y_pred)
         
         # Cross-validation su SMOTE duomenimis (10-fold)
-        cv_scores = cross_val_score(model, X_train_balanced, y_train_balanced, cv=10, scoring='accuracy')
+        profiler.begin(f'cv[{model_name}]')
+        if parallel_results is None:
+            cv_scores = cross_val_score(model, X_train_balanced, y_train_balanced, cv=10, scoring='accuracy')
+        else:
+            cv_scores = parallel_results[model_name]['cv_scores']
+        profiler.begin(f'report[{model_name}]')
         
         print(f"\nRezultatai:")
         print(f"  Accuracy:  {accuracy:.4f}")
@@ -171,20 +267,7 @@ def train_all_models(data_file='data/students_data.csv'):
         print(f"\nConfusion Matrix:")
         cm = confusion_matrix(y_test, y_pred)
         print(cm)
-        
-        # Vizualizuojame confusion matrix
-        plt.figure(figsize=(8, 6))
-        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
-                    xticklabels=['Nerizikos', 'Rizikos'],
-                    yticklabels=['Nerizikos', 'Rizikos'])
-        plt.ylabel('Tikroji klasė')
-        plt.xlabel('Prognozuota klasė')
-        plt.title(f'Confusion Matrix - {model_name}')
-        plt.tight_layout()
-        cm_filename = f"models/confusion_matrix_{model_name.lower().replace(' ', '_')}.png"
-        plt.savefig(cm_filename, dpi=300, bbox_inches='tight')
-        plt.close()
-        print(f"Confusion matrix išsaugotas: {cm_filename}")
+        confusion_matrices[model_name] = cm
         
         # Išsaugome rezultatus
         results[model_name] = {
@@ -200,23 +283,36 @@ def train_all_models(data_file='data/students_data.csv'):
     # Išsaugome geriausią modelį (Decision Tree - geriausias Recall)
     print("\n" + "=" * 60)
     print("MODELIO IŠSAUGOJIMAS")
+    profiler.begin('save')
     print("=" * 60)
     
     best_model_name = max(results.keys(), key=lambda x: results[x]['recall'])
     print(f"Geriausias modelis (pagal Recall): {best_model_name}")
     print(f"Recall: {results[best_model_name]['recall']:.4f}")
     
-    best_model = models[best_model_name]
-    save_model(best_model, scaler, 'random_forest')
-    
-    # Išsaugome visus modelius
-    for name, model in models.items():
-        model_file = name.lower().replace(' ', '_')
-        save_model(model, scaler, model_file)
+    # Visi modeliai, scaler ir treniravimo vidurkiai - viename rinkinyje
+    saved_models = {name.lower().replace(' ', '_'): model for name, model in models.items()}
+    save_bundle(saved_models, scaler, feature_columns, X.mean().to_numpy(),
+                best_model=best_model_name.lower().replace(' ', '_'),
+                metadata={'data_file': data_file, 'rows': int(len(y)), 'trainer': 'train_model'})
+    
+    # Logistinei regresijai eksportuojame sujungtą scaler + modelio variantą,
+    # visiems modeliams - masyvų formatą (memory mapping)
+    for model_file, model in saved_models.items():
+        save_model_arrays(model, scaler, model_file)
+        max_diff = export_fused_logistic(model, scaler, model_file, X_test)
+        if max_diff is None and os.path.exists(fused_artifact_path(model_file)):
+            os.remove(fused_artifact_path(model_file))
+    
+    saved_names = list(saved_models)
+    # Atnaujiname modelių registrą, kad prognozės naudotų naujus modelius
+    registry.invalidate(saved_names)
+    registry.warm('random_forest')
     
     # Feature importance (Random Forest)
     print("\n" + "=" * 60)
     print("POŽYMIŲ SVARBA (Random Forest)")
+    profiler.begin('feature_importance')
     print("=" * 60)
     
     rf_model = models['Random Forest']
@@ -230,18 +326,25 @@ def train_all_models(data_file='data/students_data.csv'):
     # Išsaugome feature importance
     feature_importance.to_csv('models/feature_importance.csv', index=False)
     
-    # Grafikas
-    plt.figure(figsize=(10, 6))
-    plt.barh(feature_importance['feature'], feature_importance['importance'])
-    plt.xlabel('Svarba')
-    plt.title('Požymių svarba (Random Forest)')
-    plt.tight_layout()
-    plt.savefig('models/feature_importance.png', dpi=300, bbox_inches='tight')
-    print("\nGrafikas išsaugotas: models/feature_importance.png")
+    save_confusion_matrices(confusion_matrices)
+    
+    # Grafikai piešiami iš išsaugotų rezultatų, todėl nebūtinai treniravimo metu
+    plot_options = {'confusion_matrices': confusion_matrices, 'feature_importance': feature_importance,
+                    'fmt': plot_format, 'dpi': plot_dpi}
+    if plots == 'sync':
+        profiler.begin('plots')
+        for path in render_training_plots(**plot_options):
+            print(f"Grafikas išsaugotas: {path}")
+    elif plots == 'background':
+        render_in_background(**plot_options)
+        print("\nGrafikai generuojami fone")
+    else:
+        print("\nGrafikai negeneruojami (python training_plots.py)")
     
     # Palyginimo lentelė
     print("\n" + "=" * 60)
     print("MODELIŲ PALYGINIMAS")
+    profiler.begin('comparison')
     print("=" * 60)
     
     comparison = pd.DataFrame({
@@ -255,36 +358,63 @@ def train_all_models(data_file='data/students_data.csv'):
     
     print(comparison.to_string(index=False))
     comparison.to_csv('models/model_comparison.csv', index=False)
+    profiler.finish()
+    
+    # Etapų trukmės
+    print("\n" + "=" * 60)
+    print("ETAPŲ TRUKMĖ")
+    print("=" * 60)
+    profiler.print_report()
+    profiler.save('models/training_profile.json', data_file=data_file, rows=len(y),
+                  feature_cache_hit=cache_hit)
+    results['stage_timings'] = profiler.summary()
     
     print("\n" + "=" * 60)
     print("TRENIRAVIMAS BAIGTAS!")
     print("=" * 60)
     print("\nIšsaugoti failai:")
-    print("  - models/random_forest_model.pkl")
-    print("  - models/random_forest_scaler.pkl")
+    print(f"  - {BUNDLE_FILE}")
     print("  - models/feature_importance.csv")
-    print("  - models/feature_importance.png")
     print("  - models/model_comparison.csv")
-    print("  - models/confusion_matrix_logistic_regression.png")
-    print("  - models/confusion_matrix_decision_tree.png")
-    print("  - models/confusion_matrix_random_forest.png")
+    print("  - models/training_profile.json")
+    print("  - models/confusion_matrices.json")
+    if plots != 'skip':
+        print(f"  - models/feature_importance.{plot_format}")
+        print(f"  - models/confusion_matrix_logistic_regression.{plot_format}")
+        print(f"  - models/confusion_matrix_decision_tree.{plot_format}")
+        print(f"  - models/confusion_matrix_random_forest.{plot_format}")
     
     return results
 
 if __name__ == "__main__":
+    import argparse
     import sys
     
-    if len(sys.argv) > 1:
-        data_file = sys.argv[1]
-    else:
-        data_file = 'data/students_data.csv'
+    parser = argparse.ArgumentParser(description="Modelių treniravimas")
+    parser.add_argument('data_file', nargs='?', default='data/students_data.csv')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="Matuoti etapų atmintį su tracemalloc")
+    parser.add_argument('--n-jobs', type=int, default=1,
+                        help="Procesų skaičius treniravimui ir cross-validation (-1 - visi branduoliai)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Nenaudoti išvalytos požymių matricos talpyklos")
+    parser.add_argument('--plots', choices=PLOT_MODES, default='background',
+                        help="Grafikų generavimas: sync, background (fone) arba skip")
+    parser.add_argument('--plot-dpi', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--plot-format', choices=PLOT_FORMATS, default='png')
+    args = parser.parse_args()
+    data_file = args.data_file
     
     try:
-        results = train_all_models(data_file)
+        results = train_all_models(data_file, profile_memory=args.profile_memory, n_jobs=args.n_jobs,
+                                   use_cache=not args.no_cache, plots=args.plots,
+                                   plot_dpi=args.plot_dpi, plot_format=args.plot_format)
     except FileNotFoundError:
         print(f"\nKlaida: Nerastas failas {data_file}")
         print("Įsitikinkite, kad CSV failas yra teisingoje vietoje.")
+        sys.exit(1)
     except Exception as e:
         print(f"\nKlaida treniruojant modelį: {e}")
         import traceback
         traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,199 @@
+"""
+Treniravimo grafikų generavimas
+Grafikai (confusion matrix ir požymių svarba) piešiami iš išsaugotų treniravimo
+rezultatų (models/confusion_matrices.json, models/feature_importance.csv),
+todėl juos galima generuoti fone, vėliau arba visai negeneruoti.
+
+Naudojama matplotlib Figure su Agg drobe (be pyplot būsenos), todėl piešti
+galima ir foniniame gijos procese.
+
+Naudojimas:
+    python training_plots.py
+    python training_plots.py --dpi 100 --format svg
+"""
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+MODELS_DIR = 'models'
+CONFUSION_MATRICES_FILE = os.path.join(MODELS_DIR, 'confusion_matrices.json')
+FEATURE_IMPORTANCE_FILE = os.path.join(MODELS_DIR, 'feature_importance.csv')
+PLOT_FORMATS = ('png', 'jpg', 'svg', 'pdf')
+# Grafikų režimai treniravimo metu
+PLOT_MODES = ('sync', 'background', 'skip')
+DEFAULT_DPI = 300
+
+_background_threads = []
+
+
+def plot_file_name(model_name):
+    """'Random Forest' -> 'random_forest'"""
+    return model_name.lower().replace(' ', '_')
+
+
+def confusion_matrix_path(model_name, fmt='png'):
+    return os.path.join(MODELS_DIR, f"confusion_matrix_{plot_file_name(model_name)}.{fmt}")
+
+
+def feature_importance_path(fmt='png'):
+    return os.path.join(MODELS_DIR, f"feature_importance.{fmt}")
+
+
+def save_confusion_matrices(confusion_matrices, path=CONFUSION_MATRICES_FILE):
+    """Išsaugo confusion matrix reikšmes (modelio pavadinimas -> 2x2 masyvas) JSON faile"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({name: np.asarray(cm).tolist() for name, cm in confusion_matrices.items()},
+                  f, ensure_ascii=False, indent=2)
+
+
+def load_confusion_matrices(path=CONFUSION_MATRICES_FILE):
+    """Returns: dict modelio pavadinimas -> masyvas arba None, jei failo nėra"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return {name: np.array(cm) for name, cm in json.load(f).items()}
+
+
+def _new_figure(figsize):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def _save_figure(figure, path, dpi):
+    """Išsaugo grafiką per laikiną failą, kad skaitytojas nematytų pusiau įrašyto failo"""
+    fmt = os.path.splitext(path)[1][1:]
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    figure.savefig(tmp_path, dpi=dpi, bbox_inches='tight', format=fmt)
+    os.replace(tmp_path, path)
+    return path
+
+
+def render_confusion_matrix(cm, model_name, fmt='png', dpi=DEFAULT_DPI):
+    """Confusion matrix šilumos žemėlapis (kaip seaborn heatmap su annot=True, cmap='Blues')"""
+    cm = np.asarray(cm)
+    figure = _new_figure((8, 6))
+    ax = figure.add_subplot()
+    image = ax.imshow(cm, cmap='Blues', aspect='auto')
+    figure.colorbar(image, ax=ax)
+    threshold = (cm.max() + cm.min()) / 2
+    for (row, col), value in np.ndenumerate(cm):
+        ax.text(col, row, f"{value:d}", ha='center', va='center',
+                color='white' if value > threshold else 'black')
+    labels = ['Nerizikos', 'Rizikos']
+    ax.set_xticks(range(len(labels)), labels)
+    ax.set_yticks(range(len(labels)), labels)
+    ax.set_ylabel('Tikroji klasė')
+    ax.set_xlabel('Prognozuota klasė')
+    ax.set_title(f'Confusion Matrix - {model_name}')
+    figure.tight_layout()
+    return _save_figure(figure, confusion_matrix_path(model_name, fmt), dpi)
+
+
+def render_feature_importance(feature_importance, fmt='png', dpi=DEFAULT_DPI):
+    """Požymių svarbos stulpelinė diagrama"""
+    figure = _new_figure((10, 6))
+    ax = figure.add_subplot()
+    ax.barh(feature_importance['feature'], feature_importance['importance'])
+    ax.set_xlabel('Svarba')
+    ax.set_title('Požymių svarba (Random Forest)')
+    figure.tight_layout()
+    return _save_figure(figure, feature_importance_path(fmt), dpi)
+
+
+def render_training_plots(confusion_matrices=None, feature_importance=None, fmt='png', dpi=DEFAULT_DPI,
+                          models=None):
+    """
+    Nupiešia treniravimo grafikus
+
+    Jei duomenys neperduoti, jie įkeliami iš išsaugotų treniravimo rezultatų.
+
+    Args:
+        models: kurių modelių confusion matrix piešti (numatyta: visų)
+
+    Returns:
+        sąrašas sukurtų failų
+    """
+    if fmt not in PLOT_FORMATS:
+        raise ValueError(f"Nežinomas grafiko formatas: {fmt} (galimi: {', '.join(PLOT_FORMATS)})")
+    if confusion_matrices is None:
+        confusion_matrices = load_confusion_matrices() or {}
+    if feature_importance is None and os.path.exists(FEATURE_IMPORTANCE_FILE):
+        feature_importance = pd.read_csv(FEATURE_IMPORTANCE_FILE)
+
+    paths = []
+    for model_name, cm in confusion_matrices.items():
+        if models is None or model_name in models:
+            paths.append(render_confusion_matrix(cm, model_name, fmt, dpi))
+    if feature_importance is not None and models is None:
+        paths.append(render_feature_importance(feature_importance, fmt, dpi))
+    return paths
+
+
+def _render_safely(kwargs):
+    try:
+        paths = render_training_plots(**kwargs)
+        print(f"Grafikai sugeneruoti fone: {len(paths)}")
+    except Exception as e:
+        print(f"Nepavyko sugeneruoti grafikų: {e}")
+
+
+def render_in_background(**kwargs):
+    """
+    Paleidžia render_training_plots foninėje gijoje
+
+    Gija nėra daemon, todėl komandinės eilutės procesas prieš baigdamasis
+    palaukia, kol grafikai bus išsaugoti.
+
+    Returns:
+        threading.Thread
+    """
+    thread = threading.Thread(target=_render_safely, args=(kwargs,), name='training-plots')
+    thread.start()
+    _background_threads.append(thread)
+    return thread
+
+
+def wait_for_background_plots(timeout=None):
+    """Palaukia, kol baigsis visos foninės grafikų gijos"""
+    while _background_threads:
+        _background_threads.pop().join(timeout)
+
+
+def ensure_confusion_matrix_plot(model_name='Random Forest', fmt='png', dpi=DEFAULT_DPI):
+    """
+    Grąžina confusion matrix grafiko kelią, jei reikia - nupiešia jį pagal poreikį
+
+    Grafikas perpiešiamas, jei jo nėra arba jis senesnis už treniravimo rezultatus.
+
+    Returns:
+        failo kelias arba None, jei treniravimo rezultatų nėra
+    """
+    path = confusion_matrix_path(model_name, fmt)
+    if not os.path.exists(CONFUSION_MATRICES_FILE):
+        return path if os.path.exists(path) else None
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(CONFUSION_MATRICES_FILE):
+        return path
+    confusion_matrices = load_confusion_matrices()
+    if model_name not in confusion_matrices:
+        return None
+    return render_confusion_matrix(confusion_matrices[model_name], model_name, fmt, dpi)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Treniravimo grafikų generavimas iš išsaugotų rezultatų")
+    parser.add_argument('--format', default='png', choices=PLOT_FORMATS)
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--models', nargs='*', help="Tik nurodytų modelių confusion matrix (pvz. 'Random Forest')")
+    args = parser.parse_args()
+
+    for path in render_training_plots(fmt=args.format, dpi=args.dpi, models=args.models):
+        print(f"Išsaugota: {path}")
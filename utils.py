@@ -3,9 +3,36 @@ Pagalbinės funkcijos duomenų tvarkymui ir modelio valdymui
 """
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-import joblib
 import os
+from cleaning import clean_numeric_columns  # bendras skaitinių stulpelių valymas
+
+# Sumažintas slenkstis rizikos grupei (30%) - modelis jautresnis rizikai
+RISK_THRESHOLD = 0.30
+# Nuo šios tikimybės rizika laikoma aukšta
+HIGH_RISK_THRESHOLD = 0.60
+
+RISK_LEVELS = ["ŽEMA RIZIKA", "VIDUTINĖ RIZIKA", "AUKŠTA RIZIKA"]
+
+# Originalios apklausos stulpeliai -> vidiniai pavadinimai
+SURVEY_COLUMN_MAP = {
+    '18. Lankomumas šiame semestre (%)': 'lankomumas_proc',
+    '20. Savarankiško mokymosi valandos per savaitę': 'savarankisko_mokymosi_val',
+    '23. Patiriu stiprų stresą': 'streso_lygis',
+    '9. Darbo valandos per savaitę': 'darbo_valandos',
+    '21. Miego valandos per parą': 'miego_valandos',
+    '22. Laikas socialiniuose tinkluose per dieną (val.)': 'socialiniu_tinklu_val',
+    '13. Koks yra jūsų bendras visų studijų semestrų vidurkis (1–10)?': 'studiju_vidurkis',
+    '17. 12 klasės metinis vidurkis (1–10)': 'dvyliktos_klases_vidurkis',
+    '14. Brandos egzaminas: Matematika (1–100, 0=nelaikiau)': 'brandos_egzaminas_1',
+    '15. Brandos egzaminas: Lietuvių kalba (1–100, 0=nelaikiau)': 'brandos_egzaminas_2',
+    '16. Brandos egzaminas: Anglų kalba (1–100, 0=nelaikiau)': 'brandos_egzaminas_3',
+    '7. Finansinis stresas (1–5)': 'finansinis_stresas',
+    '24. Ketinu nutraukti studijas': 'ketinu_mesti_studijas'
+}
+
+# Valymo taisyklių versija: pakeitus clean_numeric_columns ar požymių ruošimą,
+# ją reikia padidinti, kad nebūtų naudojamos pasenusios talpyklos (feature_cache)
+CLEANING_VERSION = 1
 
 def create_risk_label(ketinu_mesti):
     """
@@ -27,6 +54,20 @@ def load_and_prepare_data(filepath):
     
     return df
 
+def rename_survey_columns(df):
+    """
+    Pervadina originalios apklausos stulpelius į vidinius pavadinimus (jei reikia)
+    """
+    if '18. Lankomumas šiame semestre (%)' in df.columns:
+        df = df.rename(columns=SURVEY_COLUMN_MAP)
+    return df
+
+def risk_labels(ketinu_mesti):
+    """
+    Vektorizuota create_risk_label versija (trūkstama reikšmė - nerizikos grupė)
+    """
+    return (pd.to_numeric(ketinu_mesti, errors='coerce') >= 4).astype(int)
+
 def get_feature_columns():
     """
     Grąžina požymių stulpelių sąrašą
@@ -61,6 +102,8 @@ def normalize_features(X_train, X_test=None):
     """
     Normalizuoja požymius naudojant StandardScaler
     """
+    from sklearn.preprocessing import StandardScaler
+
     scaler = StandardScaler()
     X_train_scaled = scaler.fit_transform(X_train)
     
@@ -74,6 +117,8 @@ def save_model(model, scaler, model_name='random_forest'):
     """
     Išsaugo modelį ir scaler į models katalogą
     """
+    import joblib
+
     os.makedirs('models', exist_ok=True)
     joblib.dump(model, f'models/{model_name}_model.pkl')
     joblib.dump(scaler, f'models/{model_name}_scaler.pkl')
@@ -82,7 +127,16 @@ def save_model(model, scaler, model_name='random_forest'):
 def load_model(model_name='random_forest'):
     """
     Įkelia modelį ir scaler iš models katalogo
+
+    Pirmenybė teikiama modelių rinkiniui (model_bundle.py), nebent modelio
+    pickle failas už jį naujesnis.
     """
+    import joblib
+    from model_bundle import load_bundle_model
+
+    bundled = load_bundle_model(model_name)
+    if bundled is not None:
+        return bundled
     model = joblib.load(f'models/{model_name}_model.pkl')
     scaler = joblib.load(f'models/{model_name}_scaler.pkl')
     return model, scaler
@@ -98,10 +152,10 @@ def interpret_prediction(prediction, probability, risk_probability=None):
         prob = probability
     
     # 3 rizikos lygiai pagal tikimybę
-    if prob >= 0.60:
+    if prob >= HIGH_RISK_THRESHOLD:
         risk_level = "AUKŠTA RIZIKA"
         message = "Studentas priklauso aukštos rizikos grupei. Rekomenduojama skirti papildomą dėmesį."
-    elif prob >= 0.30:
+    elif prob >= RISK_THRESHOLD:
         risk_level = "VIDUTINĖ RIZIKA"
         message = "Studentas priklauso vidutinės rizikos grupei. Rekomenduojama stebėti situaciją."
     else:
@@ -116,3 +170,11 @@ def interpret_prediction(prediction, probability, risk_probability=None):
         'confidence': confidence,
         'prediction': prediction
     }
+
+def interpret_risk_levels(risk_probability):
+    """
+    Vektorizuota interpret_prediction versija: grąžina rizikos lygius masyvui tikimybių
+    """
+    prob = np.asarray(risk_probability, dtype=float)
+    level_idx = (prob >= RISK_THRESHOLD).astype(np.int8) + (prob >= HIGH_RISK_THRESHOLD)
+    return np.asarray(RISK_LEVELS, dtype=object)[level_idx]